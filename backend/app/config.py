@@ -12,6 +12,23 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
 
+    # 认证缓存时间（秒）
+    token_cache_ttl_seconds: int = 60
+    user_context_cache_ttl_seconds: int = 60
+
+    # 登录/注册限流（滑动窗口）
+    auth_rate_limit_enabled: bool = True
+    login_rate_limit_per_ip: int = 20
+    login_rate_limit_per_username: int = 5
+    login_rate_limit_window_seconds: int = 60
+    register_rate_limit_per_ip: int = 5
+    register_rate_limit_window_seconds: int = 3600
+
+    # 密码哈希配置（调整bcrypt_rounds后，用户下次登录时自动按新成本重新哈希）
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_queue_size: int = 64
+
     # 应用配置
     app_name: str = "Smart Video Platform"
     app_version: str = "1.0.0"
@@ -25,6 +42,81 @@ class Settings(BaseSettings):
     similarity_threshold: float = 60.0
     quality_threshold: float = 60.0
 
+    # 相似度索引（预处理文本缓存）：每个进程各自一份，条目按 (评论id, updated_at) 校验，
+    # 其他进程修改的评论在本进程下次检测时重新预处理（计数列的写回不改变updated_at）
+    similarity_index_max_size: int = 200000
+    similarity_index_warmup_limit: int = 50000
+
+    # 相似度检测按视频分区：评论只与同一视频下的评论比较
+    similarity_global_tier_size: int = 0  # 另外比较全站最近N条评论（跨视频复制粘贴），0为关闭
+
+    # 启动预热
+    warmup_enabled: bool = True
+    jieba_cache_file: str = "./cache/jieba.cache"
+
+    # 评分线程池（分词、TF-IDF等CPU密集任务）
+    scoring_workers: int = 2
+    scoring_queue_size: int = 32
+
+    # 用户统计对账间隔（秒），0表示关闭
+    stats_reconcile_interval_seconds: int = 3600
+
+    # 统计结果缓存时间（秒），写入时主动失效；失效只作用于写入所在的进程，
+    # 多进程部署时其他进程的缓存最长在该时间后才看到写入
+    stats_cache_ttl_seconds: int = 300
+
+    # 指标采集（/metrics）
+    metrics_enabled: bool = True
+
+    # SQL检查中间件（开发/预发环境）：N+1检测与每请求查询预算
+    query_inspector_enabled: bool = False
+    query_budget_per_request: int = 30
+    query_budget_enforce: bool = False  # 超出预算时返回500，用于让测试运行失败
+    query_repeat_threshold: int = 5  # 同形态语句重复次数达到该值时告警
+    query_route_budgets: dict = {}  # 按路由模板覆盖预算，如 {"/api/videos/learning/path": 10}
+
+    # HTTP条件请求缓存（ETag/Last-Modified/Cache-Control）
+    http_cache_enabled: bool = True
+    http_cache_catalog_max_age: int = 60
+    http_cache_stats_max_age: int = 15
+    http_cache_version_window_seconds: int = 60  # 多进程部署时其他进程写入的最大可见延迟
+
+    # 响应压缩（gzip/brotli）
+    compression_enabled: bool = True
+    compression_min_size: int = 1024  # 小于该字节数的响应不压缩
+    compression_offload_size: int = 65536  # 大于该字节数时在线程池中压缩
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+
+    # 评论异步审核队列：评论先保存为待审核，由后台worker批量评分
+    moderation_queue_enabled: bool = False
+    moderation_in_process_worker: bool = True  # API进程内运行一个消费者；使用独立worker进程时关闭
+    moderation_batch_size: int = 20
+    moderation_lease_seconds: int = 120  # 认领后未完成的任务超过该时间可被重新认领
+    moderation_max_attempts: int = 3
+    moderation_poll_interval_seconds: float = 1.0
+
+    # 实时推送（SSE / WebSocket）
+    events_enabled: bool = True
+    events_queue_size: int = 100  # 每个连接的待发送事件上限，超出时丢弃最旧事件并通知客户端
+    events_replay_size: int = 50  # 每个用户保留的最近事件数，用于断线重连补发
+    events_replay_users: int = 10000
+    events_max_connections_per_user: int = 5
+    events_heartbeat_seconds: float = 15
+
+    # 评论回复树
+    thread_page_size: int = 20  # 顶层评论每页条数
+    thread_max_depth: int = 10  # 单次取回的最大回复层级
+    thread_max_nodes: int = 500  # 单次取回的最大节点数，超出时截断并标记truncated
+
+    # 评论点赞：点赞数增量先在内存中合并，按间隔批量写回
+    likes_flush_interval_seconds: float = 2.0
+    likes_flush_batch_size: int = 1000  # 每条批量UPDATE语句的评论数
+
+    # 管理接口（CPU采样等）；令牌为空时管理接口关闭
+    admin_token: str = ""
+    profiler_max_seconds: int = 120
+
     # CORS配置
     allowed_origins: List[str] = ["http://localhost:3000", "http://localhost:5173"]
 
@@ -0,0 +1,228 @@
+# backend/app/events.py
+"""
+按用户推送的实时事件（SSE / WebSocket）
+进程内单个广播器：事件发布时只编码一次，再分发给该用户的所有连接。
+每个连接有固定长度的待发送缓冲，慢客户端积压时丢弃最旧事件并在下一次发送时附带lagged通知，
+发布方永远不会被阻塞。断线重连携带Last-Event-ID时，从该用户最近事件的回放缓冲中补发。
+
+发布可在任意线程调用（评分线程池、审核worker），由事件循环线程统一分发。
+广播器只覆盖当前进程：独立进程中的审核worker产生的结果不会推送，客户端需回退到轮询接口
+"""
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Union
+
+from .config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 事件类型
+COMMENT_MODERATED = "comment.moderated"
+REFLECTION_MODERATED = "reflection.moderated"
+VIDEO_COMPLETED = "video.completed"
+VIDEO_UNLOCKED = "video.unlocked"
+LAGGED = "lagged"
+
+
+class TooManyConnections(RuntimeError):
+    """该用户的连接数已达上限"""
+
+
+def encode_json(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+
+
+class Event:
+    """已发布的事件；SSE帧与WebSocket文本按需编码一次，所有连接共享"""
+
+    __slots__ = ("id", "type", "data", "created_at", "_sse", "_json")
+
+    def __init__(self, event_id: int, event_type: str, data: Dict):
+        self.id = event_id
+        self.type = event_type
+        self.data = data
+        self.created_at = time.time()
+        self._sse: Optional[bytes] = None
+        self._json: Optional[str] = None
+
+    @property
+    def sse(self) -> bytes:
+        if self._sse is None:
+            self._sse = b"id: %d\nevent: %s\ndata: %s\n\n" % (self.id, self.type.encode(), encode_json(self.data))
+        return self._sse
+
+    @property
+    def json(self) -> str:
+        if self._json is None:
+            self._json = encode_json({"id": self.id, "event": self.type, "data": self.data}).decode("utf-8")
+        return self._json
+
+
+class Subscription:
+    """单个连接的待发送缓冲"""
+
+    def __init__(self, user_id: int, max_pending: int):
+        self.user_id = user_id
+        self.pending: Deque[Event] = deque(maxlen=max_pending)
+        self.dropped = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+
+    def push(self, event: Event):
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1  # deque满时追加会挤掉最旧的事件
+        self.pending.append(event)
+        self._ready.set()
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+    async def next_batch(self, timeout: float) -> List[Event]:
+        """等待并取出全部待发送事件；超时返回空列表（调用方发送心跳）"""
+        if not self.pending and not self.closed:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        self._ready.clear()
+        events = list(self.pending)
+        self.pending.clear()
+        return events
+
+    def take_dropped(self) -> int:
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+
+class EventBroadcaster:
+    """
+    进程内事件广播
+    订阅与分发只在事件循环线程中进行；其他线程发布时经call_soon_threadsafe转交
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._replay: "OrderedDict[int, Deque[Event]]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._id_lock = threading.Lock()
+
+        # 指标
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """启动时绑定事件循环；未绑定时（命令行、独立worker进程）发布为空操作"""
+        self._loop = loop
+
+    def is_listening(self, user_id: int) -> bool:
+        """该用户当前在线或曾订阅（回放缓冲仍在）"""
+        return self._loop is not None and user_id in self._replay
+
+    @property
+    def connections(self) -> int:
+        return sum(len(subscriptions) for subscriptions in self._subscribers.values())
+
+    def publish(self, user_id: int, event_type: str, data: Dict):
+        """发布事件（任意线程可调用，不阻塞）"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        with self._id_lock:
+            event = Event(next(self._ids), event_type, data)
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(user_id, event)
+        else:
+            loop.call_soon_threadsafe(self._deliver, user_id, event)
+
+    def _deliver(self, user_id: int, event: Event):
+        self.published += 1
+        subscriptions = self._subscribers.get(user_id)
+        replay = self._replay.get(user_id)
+        if replay is not None:
+            replay.append(event)
+            self._replay.move_to_end(user_id)
+        if not subscriptions:
+            return
+        for subscription in subscriptions:
+            before = subscription.dropped
+            subscription.push(event)
+            self.dropped += subscription.dropped - before
+        self.delivered += len(subscriptions)
+
+    def subscribe(self, user_id: int, last_event_id: Optional[int] = None) -> Subscription:
+        """
+        新建连接订阅
+        携带last_event_id时先放入回放缓冲中该id之后的事件
+        """
+        subscriptions = self._subscribers.setdefault(user_id, set())
+        if len(subscriptions) >= settings.events_max_connections_per_user:
+            raise TooManyConnections(f"用户 {user_id} 的实时连接数已达上限")
+
+        subscription = Subscription(user_id, settings.events_queue_size)
+        subscriptions.add(subscription)
+
+        replay = self._replay.get(user_id)
+        if replay is None:
+            replay = self._replay[user_id] = deque(maxlen=settings.events_replay_size)
+            while len(self._replay) > settings.events_replay_users:
+                self._replay.popitem(last=False)
+        self._replay.move_to_end(user_id)
+
+        if last_event_id is not None:
+            for event in replay:
+                if event.id > last_event_id:
+                    subscription.push(event)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.close()
+        subscriptions = self._subscribers.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[subscription.user_id]
+
+    def close_all(self):
+        """关闭全部连接（停机时结束长连接响应）"""
+        for subscriptions in list(self._subscribers.values()):
+            for subscription in list(subscriptions):
+                subscription.close()
+
+    def stats(self) -> Dict:
+        return {
+            "connections": self.connections,
+            "users": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped
+        }
+
+
+broadcaster = EventBroadcaster()
+
+
+def publish(user_id: int, event_type: str, data: Union[Dict, Callable[[], Dict]]):
+    """
+    发布事件；关闭实时推送或该用户没有订阅时为空操作
+    data可以是返回字典的函数，只在需要推送时才调用（避免为无人订阅的事件加载数据）
+    """
+    if not settings.events_enabled or not broadcaster.is_listening(user_id):
+        return
+    broadcaster.publish(user_id, event_type, data() if callable(data) else data)
@@ -0,0 +1,159 @@
+# backend/app/http_cache.py
+"""
+HTTP条件请求缓存
+按数据类别维护版本号（目录=视频，统计=进度/评论/观后感/用户），ORM提交写入后自动递增。
+ETag由版本号派生，If-None-Match命中时在依赖阶段直接返回304，不访问数据库。
+
+多进程部署时各进程的版本计数独立（其他进程、审核worker、导入命令行及不经ORM的批量UPDATE都不会递增本进程的版本）：
+ETag附带时间片，Last-Modified不早于当前时间片的起点，两种验证方式下其他进程的写入最多延迟一个时间片可见。
+ETag不含进程标识，各进程在同一时间片内签发的ETag可以互相命中
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .config import settings
+
+CATALOG = "catalog"
+STATS = "stats"
+
+# 模型表名 -> 受影响的版本类别
+TABLE_NAMESPACES = {
+    "videos": (CATALOG, STATS),
+    "user_progress": (STATS,),
+    "comments": (STATS,),
+    "reflections": (STATS,),
+    "users": (STATS,),
+}
+
+
+class ContentVersions:
+    """进程内版本计数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        started = datetime.now(timezone.utc).replace(microsecond=0)
+        self._versions: Dict[str, Tuple[int, datetime]] = {
+            CATALOG: (0, started),
+            STATS: (0, started)
+        }
+
+    def bump(self, *namespaces: str):
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        with self._lock:
+            for namespace in namespaces:
+                version, _ = self._versions.get(namespace, (0, now))
+                self._versions[namespace] = (version + 1, now)
+
+    def get(self, namespace: str) -> Tuple[int, datetime]:
+        with self._lock:
+            return self._versions[namespace]
+
+    def etag(self, namespace: str) -> Tuple[str, datetime]:
+        """返回 (ETag, Last-Modified)；两者都随时间片推进，进程内版本没有变化时每个时间片也会重新验证一次"""
+        version, last_modified = self.get(namespace)
+        window_seconds = settings.http_cache_version_window_seconds
+        window = int(time.time() // window_seconds)
+        window_start = datetime.fromtimestamp(window * window_seconds, timezone.utc)
+        return f'W/"{namespace}-{version}-{window}"', max(last_modified, window_start)
+
+
+content_versions = ContentVersions()
+
+
+def _collect_changes(session: Session, flush_context):
+    """flush时记录涉及的类别，提交成功后再递增版本"""
+    changed = session.info.setdefault("changed_namespaces", set())
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(instance, "__tablename__", None)
+        changed.update(TABLE_NAMESPACES.get(table, ()))
+
+
+def _bump_after_commit(session: Session):
+    changed = session.info.pop("changed_namespaces", None)
+    if changed:
+        content_versions.bump(*changed)
+
+
+def _discard_after_rollback(session: Session):
+    session.info.pop("changed_namespaces", None)
+
+
+_tracking_installed = False
+
+
+def track_model_changes():
+    """注册ORM事件（重复调用无副作用）"""
+    global _tracking_installed
+    if _tracking_installed:
+        return
+    event.listen(Session, "after_flush", _collect_changes)
+    event.listen(Session, "after_commit", _bump_after_commit)
+    event.listen(Session, "after_rollback", _discard_after_rollback)
+    _tracking_installed = True
+
+
+def bump_versions(*namespaces: str):
+    """不经过ORM会话的写入（如批量UPDATE）后手动递增版本"""
+    content_versions.bump(*namespaces)
+
+
+class CacheValidators:
+    """当前请求的缓存响应头，返回Response对象的路由需手动带上"""
+
+    def __init__(self, headers: Dict[str, str]):
+        self.headers = headers
+
+
+def _not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = {tag.strip() for tag in if_none_match.split(",")}
+        # 弱比较：忽略W/前缀
+        normalized = {tag[2:] if tag.startswith("W/") else tag for tag in candidates}
+        return "*" in candidates or etag[2:] in normalized
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def http_cache(namespace: str, max_age: int, stale_while_revalidate: Optional[int] = None):
+    """
+    条件请求依赖
+    用法：@router.get(..., dependencies=...) 或参数 cache: CacheValidators = Depends(http_cache(CATALOG, 60))
+    命中时抛出304（无响应体）；未命中时把ETag/Last-Modified/Cache-Control写入响应
+    """
+    cache_control = f"public, max-age={max_age}"
+    if stale_while_revalidate:
+        cache_control += f", stale-while-revalidate={stale_while_revalidate}"
+
+    def dependency(request: Request, response: Response) -> CacheValidators:
+        if not settings.http_cache_enabled:
+            return CacheValidators({})
+
+        # 在查询之前读取版本：请求期间发生写入时ETag偏旧，客户端下次会重新验证
+        etag, last_modified = content_versions.etag(namespace)
+        headers = {
+            "ETag": etag,
+            "Last-Modified": format_datetime(last_modified, usegmt=True),
+            "Cache-Control": cache_control
+        }
+
+        if _not_modified(request, etag, last_modified):
+            raise HTTPException(status_code=304, headers=headers)
+
+        response.headers.update(headers)
+        return CacheValidators(headers)
+
+    return dependency
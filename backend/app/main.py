@@ -1,14 +1,71 @@
 # backend/app/main.py - 修复版本
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+import importlib
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from .config import settings
+from .responses import DefaultJSONResponse
+from .services.warmup import warmup_state, warm_up, is_ready
+
+# 启动耗时统计（毫秒）
+startup_timings = {}
 
 # 创建FastAPI应用
 app = FastAPI(
     title="Smart Video Platform",
     description="智能视频学习平台 - 集成相似度检测和质量评估的观后感系统",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=DefaultJSONResponse
 )
 
+# 响应压缩（最内层，指标统计包含压缩耗时）
+if settings.compression_enabled:
+    from .middleware import CompressionMiddleware
+
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_min_size,
+        offload_size=settings.compression_offload_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality
+    )
+
+# 请求指标中间件（路由耗时、每请求SQL数）
+if settings.metrics_enabled:
+    from .metrics import registry as metrics_registry, register_runtime_gauges
+    from .middleware import MetricsMiddleware, instrument_engine
+    from .models.base import engine
+
+    instrument_engine(engine)
+    register_runtime_gauges()
+    app.add_middleware(MetricsMiddleware)
+
+# SQL检查中间件（开发/预发环境）
+if settings.query_inspector_enabled:
+    from .middleware import QueryInspectorMiddleware, instrument_engine
+    from .models.base import engine
+
+    instrument_engine(engine)
+    app.add_middleware(
+        QueryInspectorMiddleware,
+        budget=settings.query_budget_per_request,
+        repeat_threshold=settings.query_repeat_threshold,
+        enforce=settings.query_budget_enforce,
+        route_budgets=settings.query_route_budgets
+    )
+
+# 写入提交后递增目录/统计版本（ETag）
+if settings.http_cache_enabled:
+    from .http_cache import track_model_changes
+
+    track_model_changes()
+
 # CORS中间件配置
 app.add_middleware(
     CORSMiddleware,
@@ -29,39 +86,254 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    # 预热完成前返回503，负载均衡不会将流量转发到未就绪的进程
+    if not is_ready():
+        return JSONResponse(status_code=503, content={
+            "status": "warming_up",
+            "message": "Smart Video Platform API正在预热",
+            "warmup": warmup_state
+        })
+
     return {
         "status": "healthy",
         "message": "Smart Video Platform API运行正常"
     }
 
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus指标导出"""
+    if not settings.metrics_enabled:
+        return PlainTextResponse("metrics disabled\n", status_code=404)
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health/live")
+async def liveness_check():
+    """存活检查：进程能响应即可，不访问任何依赖"""
+    return {"status": "alive"}
+
+
+def _check_database() -> dict:
+    """数据库连通性与连接池状态"""
+    from sqlalchemy import text
+    from .models.base import engine
+
+    started = time.perf_counter()
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except Exception as e:
+        return {"ok": False, "error": str(e), "pool": engine.pool.status()}
+
+    return {
+        "ok": True,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        "pool": engine.pool.status()
+    }
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    """
+    就绪检查：预热完成、数据库可用、评分线程池未饱和且所有路由注册成功时返回200，
+    否则返回503，负载均衡只将流量转发到已预热的进程
+    """
+    from .services.pools import scoring_pool, hashing_pool
+    from .services.similarity_detector import similarity_index
+
+    database = await asyncio.to_thread(_check_database)
+    scoring = scoring_pool.stats()
+    scoring["available"] = scoring_pool.available
+
+    checks = {
+        "warmup": warmup_state["status"] == "ready",
+        "database": database["ok"],
+        "scoring_pool": scoring["available"],
+        "routers": not failed_routers
+    }
+    ready = all(checks.values())
+
+    content = {
+        "status": "ready" if ready else "not_ready",
+        "checks": checks,
+        "warmup": warmup_state,
+        "startup_timings": startup_timings,
+        "database": database,
+        "similarity_index": similarity_index.stats(),
+        "pools": {
+            "scoring": scoring,
+            "password_hashing": hashing_pool.stats()
+        },
+        "routers": {
+            "registered": registered_routers,
+            "failed": failed_routers
+        }
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=content)
+
 # 条件导入和注册路由 - 避免导入错误
-try:
-    from .routes import videos
-    app.include_router(videos.router, prefix="/api/videos", tags=["videos"])
-    print("✅ Videos路由注册成功")
-except ImportError as e:
-    print(f"❌ Videos路由导入失败: {e}")
-
-try:
-    from .routes import comments
-    app.include_router(comments.router, prefix="/api/comments", tags=["comments"])
-    print("✅ Comments路由注册成功")
-except ImportError as e:
-    print(f"❌ Comments路由导入失败: {e}")
-
-try:
-    from .routes import reflections
-    app.include_router(reflections.router, prefix="/api/reflections", tags=["reflections"])
-    print("✅ Reflections路由注册成功")
-except ImportError as e:
-    print(f"❌ Reflections路由导入失败: {e}")
+_routes_started = time.perf_counter()
+
+# 路由注册状态，供就绪检查使用
+registered_routers = []
+failed_routers = {}
+
+
+def _register_router(module_name: str, prefix: str, tag: str):
+    """导入并注册路由模块，失败时记录原因而不中断启动"""
+    try:
+        module = importlib.import_module(f".routes.{module_name}", __package__)
+        app.include_router(module.router, prefix=prefix, tags=[tag])
+        registered_routers.append(module_name)
+        print(f"✅ {module_name.capitalize()}路由注册成功")
+    except ImportError as e:
+        failed_routers[module_name] = str(e)
+        print(f"❌ {module_name.capitalize()}路由导入失败: {e}")
+
+
+_register_router("videos", "/api/videos", "videos")
+_register_router("comments", "/api/comments", "comments")
+_register_router("reflections", "/api/reflections", "reflections")
+_register_router("events", "/api/events", "events")
+_register_router("admin", "/api/admin", "admin")
+
+startup_timings["route_registration_ms"] = round((time.perf_counter() - _routes_started) * 1000, 2)
+startup_timings["module_import_ms"] = round((time.perf_counter() - _import_started) * 1000, 2)
+
+# 后台定时任务
+_background_tasks = []
+
+
+async def _run_periodic(name: str, func, interval_seconds: int):
+    """在线程池中周期性执行同步任务，异常不影响后续执行"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            result = await asyncio.to_thread(func)
+            print(f"🔄 定时任务 {name} 完成: {result}")
+        except Exception as e:
+            print(f"❌ 定时任务 {name} 失败: {e}")
+
+
+def _start_periodic_job(name: str, func, interval_seconds: int):
+    """注册定时任务（间隔为0时不启动）"""
+    if interval_seconds <= 0:
+        return
+    _background_tasks.append(asyncio.create_task(_run_periodic(name, func, interval_seconds)))
+
+
+async def _warm_up():
+    """在评分线程池中执行预热，不阻塞事件循环"""
+    from .services.pools import scoring_pool
+
+    state = await scoring_pool.run(warm_up)
+    startup_timings["warmup_ms"] = state["total_ms"]
+    startup_timings["ready_ms"] = round((time.perf_counter() - _import_started) * 1000, 2)
+    print(f"⏱️  启动耗时: {startup_timings}")
+
+
+async def _run_like_flusher():
+    """按间隔批量写回点赞数增量；每个周期都执行，以便及时读到对账设置的直写标记"""
+    from .services.like_service import flush_like_counts
+
+    while True:
+        await asyncio.sleep(settings.likes_flush_interval_seconds)
+        try:
+            await asyncio.to_thread(flush_like_counts)
+        except Exception as e:
+            print(f"❌ 点赞数写回失败: {e}")
+
+
+async def _run_moderation_worker():
+    """进程内审核队列消费者：在评分线程池中处理，队列为空或线程池繁忙时等待"""
+    from .services.moderation_queue import ModerationWorker
+    from .services.pools import scoring_pool, PoolSaturatedError
+
+    worker = ModerationWorker()
+    while True:
+        try:
+            processed = await scoring_pool.run(worker.run_once)
+        except PoolSaturatedError:
+            processed = 0
+        except Exception as e:
+            print(f"❌ 审核任务处理失败: {e}")
+            processed = 0
+        if not processed:
+            await asyncio.sleep(settings.moderation_poll_interval_seconds)
+
 
 # 启动事件
 @app.on_event("startup")
 async def startup_event():
+    from .services.user_stats import run_user_stats_reconciliation
+    from .models.base import ensure_schema
+    from .services.thread_service import run_reply_count_reconciliation
+    from .services.like_service import run_like_reconciliation
+    from .events import broadcaster
+
+    # 其他线程（评分线程池、审核worker）发布的事件经此事件循环分发
+    broadcaster.bind_loop(asyncio.get_running_loop())
+
+    # 已有数据库补齐新增的表、列与索引（comments.video_id、点赞记录表、回复树索引等）
+    schema_changes = await asyncio.to_thread(ensure_schema)
+    if any(schema_changes.values()):
+        print(f"🔧 数据库结构已升级: {schema_changes}")
+
+    if settings.warmup_enabled:
+        _background_tasks.append(asyncio.create_task(_warm_up()))
+    else:
+        warmup_state["status"] = "ready"
+
+    _start_periodic_job(
+        "user_stats_reconciliation",
+        run_user_stats_reconciliation,
+        settings.stats_reconcile_interval_seconds
+    )
+
+    # 回复数对账同时回填维护逻辑上线前的历史数据
+    _start_periodic_job(
+        "reply_count_reconciliation",
+        run_reply_count_reconciliation,
+        settings.stats_reconcile_interval_seconds
+    )
+
+    # 点赞数增量在内存中合并后批量写回，对账从点赞记录表重新计数（只在持有租约的进程中执行）
+    _background_tasks.append(asyncio.create_task(_run_like_flusher()))
+    _start_periodic_job(
+        "like_count_reconciliation",
+        run_like_reconciliation,
+        settings.stats_reconcile_interval_seconds
+    )
+
+    # 审核任务表已由ensure_schema创建
+    if settings.moderation_queue_enabled and settings.moderation_in_process_worker:
+        _background_tasks.append(asyncio.create_task(_run_moderation_worker()))
+
     print("🚀 Smart Video Platform API启动完成")
     print("📖 API文档: http://127.0.0.1:8000/docs")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in _background_tasks:
+        task.cancel()
+
+    # 结束SSE/WebSocket长连接，避免停机等待
+    from .events import broadcaster
+    broadcaster.close_all()
+
+    # 写回尚未刷写的点赞数增量
+    from .services.like_service import flush_like_counts
+    try:
+        flush_like_counts()
+    except Exception as e:
+        print(f"❌ 点赞数写回失败: {e}")
+
+    from .services.pools import hashing_pool, scoring_pool
+    hashing_pool.shutdown()
+    scoring_pool.shutdown()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
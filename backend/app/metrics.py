@@ -0,0 +1,276 @@
+# backend/app/metrics.py
+"""
+进程内指标（Prometheus文本格式）
+计数器/直方图按标签元组聚合，记录时只做加法和二分查找，可在生产环境常开
+"""
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# 默认延迟分桶（秒）
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """单调递增计数器"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in items]
+
+
+class Gauge:
+    """
+    仪表值
+    可直接设置，也可以注册回调在导出时读取（如线程池排队深度），记录路径零开销
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 callback: Optional[Callable[[], Iterable[Tuple[Tuple, float]]]] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.callback = callback
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, labels: Tuple = ()):
+        with self._lock:
+            self._values[labels] = value
+
+    def collect(self) -> List[str]:
+        if self.callback is not None:
+            items = list(self.callback())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in items]
+
+
+class Histogram:
+    """累积分桶直方图"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, list] = {}  # labels -> [各桶计数..., 总和, 总数]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Tuple = ()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = [0] * (len(self.buckets) + 1) + [0.0, 0]
+                self._series[labels] = series
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+
+        lines = []
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                bucket_label = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, bucket_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                return self._metrics[metric.name]
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        """导出Prometheus文本格式"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+    return registry.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Tuple[str, ...] = (), callback=None) -> Gauge:
+    return registry.register(Gauge(name, documentation, labelnames, callback))
+
+
+def histogram(name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+              buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+    return registry.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# ---- 应用指标 ----
+
+http_request_duration = histogram(
+    "http_request_duration_seconds", "HTTP请求耗时", ("method", "route", "status")
+)
+
+stage_duration = histogram(
+    "stage_duration_seconds", "业务流程各阶段耗时", ("operation", "stage")
+)
+
+db_queries_per_request = histogram(
+    "db_queries_per_request", "每个请求执行的SQL语句数", ("route",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+)
+
+db_queries_total = counter(
+    "db_queries_total", "执行的SQL语句总数", ("route",)
+)
+
+
+class _StageTimer:
+    __slots__ = ("labels", "started")
+
+    def __init__(self, labels: Tuple[str, str]):
+        self.labels = labels
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stage_duration.observe(time.perf_counter() - self.started, self.labels)
+        return False
+
+
+def stage_timer(operation: str, stage: str) -> _StageTimer:
+    """
+    记录业务阶段耗时
+    用法：with stage_timer("create_comment", "quality"): ...
+    """
+    return _StageTimer((operation, stage))
+
+
+def _cache_samples(field: str):
+    from .services.cache import TTLCache
+
+    def collect():
+        for cache in TTLCache.instances:
+            stats = cache.stats()
+            yield (cache.name,), stats[field]
+    return collect
+
+
+def _pool_samples(field: str):
+    from .services.pools import BoundedExecutor
+
+    def collect():
+        for pool in BoundedExecutor.instances:
+            yield (pool.name,), pool.stats()[field]
+    return collect
+
+
+def register_runtime_gauges():
+    """注册导出时读取的运行时指标（缓存命中率、线程池排队深度等）"""
+    gauge("cache_hits", "缓存命中次数", ("cache",), _cache_samples("hits"))
+    gauge("cache_misses", "缓存未命中次数", ("cache",), _cache_samples("misses"))
+    gauge("cache_hit_ratio", "缓存命中率", ("cache",), _cache_samples("hit_ratio"))
+    gauge("cache_size", "缓存条目数", ("cache",), _cache_samples("size"))
+
+    gauge("pool_queue_depth", "线程池排队中的任务数", ("pool",), _pool_samples("queue_depth"))
+    gauge("pool_running", "线程池执行中的任务数", ("pool",), _pool_samples("running"))
+    gauge("pool_rejected", "线程池拒绝的任务数", ("pool",), _pool_samples("rejected"))
+    gauge("pool_average_wait_ms", "线程池平均排队等待时间（毫秒）", ("pool",), _pool_samples("average_wait_ms"))
+
+    def similarity_index_size():
+        from .services.similarity_detector import similarity_index
+        yield (), similarity_index.size
+
+    gauge("similarity_index_size", "相似度索引中的评论数", (), similarity_index_size)
+
+    def event_stats(field: str):
+        def collect():
+            from .events import broadcaster
+            yield (), broadcaster.stats()[field]
+        return collect
+
+    gauge("event_connections", "实时推送连接数", (), event_stats("connections"))
+    gauge("events_published", "已发布的实时事件数", (), event_stats("published"))
+    gauge("events_dropped", "因客户端积压被丢弃的实时事件数", (), event_stats("dropped"))
+
+    def like_buffer_stats(field: str):
+        def collect():
+            from .services.like_service import like_buffer
+            yield (), like_buffer.stats()[field]
+        return collect
+
+    gauge("like_buffer_pending", "尚未写回点赞数增量的评论数", (), like_buffer_stats("pending_comments"))
+    gauge("like_flushed_rows", "已批量写回的点赞数更新行数", (), like_buffer_stats("flushed_rows"))
+
+    def auth_attempts(field: str):
+        def collect():
+            from .services.rate_limiter import auth_rate_limiter
+            for action, value in auth_rate_limiter.stats()[field].items():
+                yield (action,), value
+        return collect
+
+    gauge("auth_attempts_admitted", "限流放行的认证尝试数", ("action",), auth_attempts("admitted"))
+    gauge("auth_attempts_rejected", "限流拒绝的认证尝试数", ("action",), auth_attempts("rejected"))
@@ -0,0 +1,382 @@
+# backend/app/middleware.py
+"""
+请求级中间件
+纯ASGI实现，避免BaseHTTPMiddleware的额外开销
+"""
+import asyncio
+import contextvars
+import gzip
+import json
+import re
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # 未安装brotli时只提供gzip
+    brotli = None
+
+from .metrics import http_request_duration, db_queries_per_request, db_queries_total
+
+
+class QueryBudgetExceeded(AssertionError):
+    """请求执行的SQL语句数超过预算"""
+
+
+class RequestQueryStats:
+    """
+    单个请求内的SQL执行统计
+    默认只计数；开启track后额外记录累计耗时和语句形态（用于N+1检测）
+    """
+
+    __slots__ = ("count", "track", "duration", "shapes")
+
+    def __init__(self, track: bool = False):
+        self.count = 0
+        self.track = track
+        self.duration = 0.0
+        self.shapes: Dict[str, int] = {}
+
+    def repeated_shapes(self, threshold: int) -> Dict[str, int]:
+        """重复执行次数达到阈值的语句形态"""
+        return {shape: count for shape, count in self.shapes.items() if count >= threshold}
+
+
+# 当前请求的SQL统计；同步路由在线程池中执行时会复制上下文，共享同一个统计对象
+current_query_stats: contextvars.ContextVar[Optional[RequestQueryStats]] = contextvars.ContextVar(
+    "current_query_stats", default=None
+)
+
+_instrumented_engines = set()
+
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|:\w+)\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    """归一化SQL语句：折叠空白和IN列表占位符，参数不同的同一查询得到相同形态"""
+    return _PLACEHOLDER_LIST.sub("(?...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        if stats.track:
+            shape = statement_shape(statement)
+            stats.shapes[shape] = stats.shapes.get(shape, 0) + 1
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_query_stats.get()
+    if stats is not None and stats.track:
+        started = conn.info.get("query_started")
+        if started:
+            stats.duration += time.perf_counter() - started.pop()
+
+
+def instrument_engine(engine: Engine):
+    """在引擎上注册SQL计数钩子（重复调用无副作用）"""
+    if id(engine) in _instrumented_engines:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    _instrumented_engines.add(id(engine))
+
+
+@contextmanager
+def query_budget(max_queries: int, label: str = ""):
+    """
+    在测试中限制代码块的SQL语句数，超出时抛出QueryBudgetExceeded
+    用法：with query_budget(3): service.get_video_reflections(1, db)
+    """
+    stats = RequestQueryStats(track=True)
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+    if stats.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{label or '代码块'} 执行了 {stats.count} 条SQL，超过预算 {max_queries}；"
+            f"重复语句: {stats.repeated_shapes(2)}"
+        )
+
+
+def route_template(scope) -> str:
+    """取路由模板（如 /api/videos/{video_id}），避免按实际路径产生无限多的标签"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """记录每个路由的请求耗时和SQL语句数"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # 外层中间件已创建统计对象时复用
+        stats = current_query_stats.get()
+        token = None
+        if stats is None:
+            stats = RequestQueryStats()
+            token = current_query_stats.set(stats)
+        status_holder = [500]
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            if token is not None:
+                current_query_stats.reset(token)
+
+            route = route_template(scope)
+            http_request_duration.observe(elapsed, (scope["method"], route, str(status_holder[0])))
+            db_queries_per_request.observe(stats.count, (route,))
+            if stats.count:
+                db_queries_total.inc((route,), stats.count)
+
+
+class QueryInspectorMiddleware:
+    """
+    SQL检查中间件（开发/预发环境使用）
+    统计每个请求的SQL语句数和累计耗时，标记重复执行的同形态语句（N+1），
+    超过查询预算时告警；开启强制模式后直接返回500，使测试运行失败
+    """
+
+    def __init__(self, app, budget: int, repeat_threshold: int, enforce: bool = False,
+                 route_budgets: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.budget = budget
+        self.repeat_threshold = repeat_threshold
+        self.enforce = enforce
+        self.route_budgets = route_budgets or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(track=True)
+        token = current_query_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                violation = self._inspect(scope, stats)
+                if violation and self.enforce:
+                    await self._send_budget_error(send, violation)
+                    return
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-db-query-count", str(stats.count).encode()),
+                    (b"x-db-time-ms", f"{stats.duration * 1000:.2f}".encode())
+                ]
+            elif message["type"] == "http.response.body" and scope.get("query_budget_violation") and self.enforce:
+                # 已替换为错误响应，丢弃原响应体
+                return
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_stats.reset(token)
+
+    def _inspect(self, scope, stats: RequestQueryStats) -> Optional[Dict]:
+        route = route_template(scope)
+        budget = self.route_budgets.get(route, self.budget)
+        repeated = stats.repeated_shapes(self.repeat_threshold)
+
+        for shape, count in repeated.items():
+            print(f"⚠️  疑似N+1查询 {scope['method']} {route}: 同形态语句执行{count}次: {shape[:200]}")
+
+        if stats.count <= budget:
+            return None
+
+        violation = {
+            "route": route,
+            "query_count": stats.count,
+            "query_budget": budget,
+            "db_time_ms": round(stats.duration * 1000, 2),
+            "repeated_statements": repeated
+        }
+        scope["query_budget_violation"] = violation
+        print(f"❌ 查询预算超限 {scope['method']} {route}: {stats.count} > {budget}")
+        return violation
+
+    async def _send_budget_error(self, send, violation: Dict):
+        body = json.dumps({"detail": "查询预算超限", "violation": violation}, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 500,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+# 可压缩的响应类型；SSE需要逐条即时送达，不压缩
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/javascript", "application/xml", "text/")
+UNCOMPRESSIBLE_TYPES = ("text/event-stream",)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """按Accept-Encoding协商编码，权重相同时优先brotli"""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name] = quality
+
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class _StreamEncoder:
+    """流式压缩：每个分块同步刷出，客户端可以边收边解压"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            output = self._compressor.process(data)
+            return output + (self._compressor.finish() if final else self._compressor.flush())
+        output = self._compressor.compress(data)
+        return output + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    响应压缩（gzip/brotli）
+    小于阈值的完整响应不压缩；大响应体在线程池中压缩，避免阻塞事件循环；
+    流式响应逐块压缩并同步刷出
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, offload_size: int = 65536,
+                 gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        mode = None  # identity / stream
+        encoder: Optional[_StreamEncoder] = None
+
+        async def send_wrapper(message):
+            nonlocal start_message, mode, encoder
+
+            if message["type"] == "http.response.start":
+                # 等到第一个响应体分块再决定是否压缩
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if mode is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                if not self._compressible(start_message["status"], headers) or \
+                        (not more_body and len(body) < self.minimum_size):
+                    mode = "identity"
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+
+                if not more_body:
+                    compressed = await self._run(len(body), self._compress_whole, encoding, body)
+                    headers["Content-Length"] = str(len(compressed))
+                    mode = "identity"
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+
+                del headers["Content-Length"]
+                mode = "stream"
+                encoder = _StreamEncoder(encoding, self.gzip_level, self.brotli_quality)
+                await send(start_message)
+
+            if mode == "identity":
+                await send(message)
+                return
+
+            chunk = await self._run(len(body), encoder.compress, body, not more_body)
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _compressible(self, status_code: int, headers: MutableHeaders) -> bool:
+        if status_code < 200 or status_code in (204, 304) or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").lower()
+        if content_type.startswith(UNCOMPRESSIBLE_TYPES):
+            return False
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _compress_whole(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    async def _run(self, size: int, func, *args):
+        """大数据量的压缩放到线程池执行（zlib/brotli压缩时释放GIL）"""
+        if size >= self.offload_size:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
@@ -5,6 +5,9 @@ from .video import Video
 from .reflection import Reflection
 from .comment import Comment
 from .user_progress import UserProgress
+from .moderation_job import ModerationJob, JobStatus
+from .comment_like import CommentLike
+from .job_lease import JobLease
 
 __all__ = [
     "Base",
@@ -12,5 +15,9 @@ __all__ = [
     "Video",
     "Reflection",
     "Comment",
-    "UserProgress"
+    "UserProgress",
+    "ModerationJob",
+    "JobStatus",
+    "CommentLike",
+    "JobLease"
 ]
\ No newline at end of file
@@ -1,5 +1,6 @@
 # backend/app/models/base.py
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import create_engine, MetaData, inspect, text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -27,4 +28,68 @@ def get_db():
 
 def create_tables():
     """创建所有表"""
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+
+
+def _apply_ddl(bind, execute, exists) -> bool:
+    """
+    单独一个事务执行一步DDL；返回False表示对象已由其他进程创建
+    多个进程同时启动时都可能检查到缺失并同时执行，失败方重新检查，对象已存在则视为完成
+    """
+    try:
+        with bind.begin() as connection:
+            execute(connection)
+        return True
+    except DBAPIError:
+        if exists():
+            return False
+        raise
+
+
+def ensure_schema(bind=None) -> dict:
+    """
+    已有数据库的轻量升级（无迁移工具时在启动时调用，多个进程可同时执行）
+    创建缺失的表；已有表补充模型中新增的可空列（ALTER TABLE ADD COLUMN，不含外键约束）与缺失的索引。
+    不修改、不删除已有列；新增非空且无默认值的列无法自动补充，需手动迁移
+    """
+    bind = bind or engine
+    report = {"created_tables": [], "added_columns": [], "created_indexes": []}
+
+    existing = set(inspect(bind).get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name in existing:
+            continue
+        if _apply_ddl(bind, lambda connection, table=table: table.create(connection),
+                      lambda table=table: inspect(bind).has_table(table.name)):
+            report["created_tables"].append(table.name)
+
+    def column_names(table_name):
+        return {column["name"] for column in inspect(bind).get_columns(table_name)}
+
+    def index_names(table_name):
+        return {index["name"] for index in inspect(bind).get_indexes(table_name)}
+
+    quote = bind.dialect.identifier_preparer.quote
+    for table in Base.metadata.sorted_tables:
+        columns = column_names(table.name)
+        for column in table.columns:
+            if column.name in columns:
+                continue
+            if column.primary_key or (not column.nullable and column.server_default is None):
+                raise RuntimeError(f"无法自动添加非空列 {table.name}.{column.name}，请手动迁移")
+            statement = text(
+                f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} "
+                f"{column.type.compile(dialect=bind.dialect)}"
+            )
+            if _apply_ddl(bind, lambda connection, statement=statement: connection.execute(statement),
+                          lambda table=table, column=column: column.name in column_names(table.name)):
+                report["added_columns"].append(f"{table.name}.{column.name}")
+
+        indexes = index_names(table.name)
+        for index in table.indexes:
+            if index.name in indexes:
+                continue
+            if _apply_ddl(bind, lambda connection, index=index: index.create(bind=connection),
+                          lambda table=table, index=index: index.name in index_names(table.name)):
+                report["created_indexes"].append(index.name)
+    return report
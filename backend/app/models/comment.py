@@ -1,6 +1,6 @@
 # backend/app/models/comment.py
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Float, Boolean, DateTime, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Float, Boolean, DateTime, Enum, Index
+from sqlalchemy.orm import relationship, deferred
 from .base import Base
 from datetime import datetime
 import enum
@@ -17,9 +17,10 @@ class Comment(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    video_id = Column(Integer, ForeignKey("videos.id"))  # 所属视频；为空表示全站评论（含历史数据）
 
     # 评论内容
-    content = Column(Text, nullable=False)
+    content = deferred(Column(Text, nullable=False), group="text")  # 大文本列默认延迟加载
     word_count = Column(Integer, default=0)
 
     # 相似度检测
@@ -28,7 +29,7 @@ class Comment(Base):
 
     # 质量检测
     quality_passed = Column(Boolean, default=False)
-    quality_issues = Column(Text)  # 质量问题描述
+    quality_issues = deferred(Column(Text), group="text")  # 质量问题描述
 
     # 审核状态
     status = Column(Enum(CommentStatus), default=CommentStatus.PENDING)
@@ -36,11 +37,13 @@ class Comment(Base):
 
     # 互动数据
     like_count = Column(Integer, default=0)
-    reply_count = Column(Integer, default=0)
-    parent_id = Column(Integer, ForeignKey("comments.id"))  # 回复的父评论
+    reply_count = Column(Integer, default=0)  # 直接回复数，插入/删除回复时原子维护
+    parent_id = Column(Integer, ForeignKey("comments.id"), index=True)  # 回复的父评论
 
     # 时间戳
     created_at = Column(DateTime, default=datetime.utcnow)
+    # 内容/状态修改时更新；点赞数、回复数等计数列的UPDATE显式保留原值（updated_at=updated_at），
+    # 相似度索引按 (id, updated_at) 校验预处理文本，计数变化不应使其失效
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     reviewed_at = Column(DateTime)
 
@@ -48,6 +51,11 @@ class Comment(Base):
     user = relationship("User", back_populates="comments")
     replies = relationship("Comment", backref="parent", remote_side=[id])
 
+    __table_args__ = (
+        # 按视频分区的相似度检测、评论列表和统计都按 video_id 过滤、按 id 排序
+        Index("ix_comments_video_id_id", "video_id", "id"),
+    )
+
     def __repr__(self):
         return f"<Comment(id={self.id}, user_id={self.user_id}, status={self.status.value})>"
 
@@ -55,6 +63,7 @@ class Comment(Base):
         return {
             "id": self.id,
             "user_id": self.user_id,
+            "video_id": self.video_id,
             "content": self.content,
             "word_count": self.word_count,
             "similarity_score": self.similarity_score,
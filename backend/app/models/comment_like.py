@@ -0,0 +1,18 @@
+# backend/app/models/comment_like.py
+from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from .base import Base
+from datetime import datetime
+
+
+class CommentLike(Base):
+    """评论点赞记录（每个用户对每条评论最多一行，是点赞数的准确来源）"""
+    __tablename__ = "comment_likes"
+
+    # 主键以comment_id开头，按评论计数时直接使用主键索引
+    comment_id = Column(Integer, ForeignKey("comments.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<CommentLike(comment_id={self.comment_id}, user_id={self.user_id})>"
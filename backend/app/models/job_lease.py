@@ -0,0 +1,17 @@
+# backend/app/models/job_lease.py
+from sqlalchemy import Column, String, DateTime
+from .base import Base
+
+
+class JobLease(Base):
+    """定时任务租约（多进程部署时同一任务同一时间只由持有租约的进程执行）"""
+    __tablename__ = "job_leases"
+
+    name = Column(String(64), primary_key=True)
+
+    # 持有者与租约到期时间，持有者每次执行时续约，进程退出后租约到期由其他进程接手
+    locked_by = Column(String(64), nullable=False)
+    locked_until = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<JobLease(name={self.name}, locked_by={self.locked_by})>"
@@ -0,0 +1,42 @@
+# backend/app/models/moderation_job.py
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum, Index
+from .base import Base
+from datetime import datetime
+import enum
+
+
+class JobStatus(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ModerationJob(Base):
+    """评论审核任务（每条待评分评论一行）"""
+    __tablename__ = "moderation_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    comment_id = Column(Integer, ForeignKey("comments.id"), nullable=False, unique=True)
+
+    status = Column(Enum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+    attempts = Column(Integer, default=0)
+
+    # 认领信息：locked_by为本次认领的令牌，租约到期未完成的任务可被其他worker重新认领
+    locked_by = Column(String(64))
+    locked_until = Column(DateTime)
+
+    # 结果
+    decision = Column(String(20))  # approved / rejected / pending（需人工审核）
+    last_error = Column(Text)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_moderation_jobs_status_id", "status", "id"),
+    )
+
+    def __repr__(self):
+        return f"<ModerationJob(id={self.id}, comment_id={self.comment_id}, status={self.status.value})>"
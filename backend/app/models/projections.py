@@ -0,0 +1,92 @@
+# backend/app/models/projections.py
+"""
+轻量投影查询
+列表/统计接口只查询需要的列，返回命名元组行（Row），不构造ORM对象、不加载大文本列
+需要全文的详情接口应直接查询模型并使用 undefer_group("text")
+"""
+from sqlalchemy import func
+from sqlalchemy.orm import Session, Query
+
+from .comment import Comment
+from .reflection import Reflection
+from .video import Video
+from .user import User
+
+# 列表中内容摘要的长度
+PREVIEW_LENGTH = 100
+
+COMMENT_SUMMARY_COLUMNS = (
+    Comment.id,
+    Comment.user_id,
+    Comment.video_id,
+    Comment.word_count,
+    Comment.similarity_score,
+    Comment.original_score,
+    Comment.quality_passed,
+    Comment.status,
+    Comment.reject_reason,
+    Comment.like_count,
+    Comment.reply_count,
+    Comment.parent_id,
+    Comment.created_at
+)
+
+REFLECTION_SUMMARY_COLUMNS = (
+    Reflection.id,
+    Reflection.user_id,
+    Reflection.video_id,
+    Reflection.word_count,
+    Reflection.quality_score,
+    Reflection.has_thought_words,
+    Reflection.has_specific_examples,
+    Reflection.has_questions,
+    Reflection.is_approved,
+    Reflection.created_at
+)
+
+VIDEO_SUMMARY_COLUMNS = (
+    Video.id,
+    Video.title,
+    Video.duration,
+    Video.order_index,
+    Video.thumbnail_url,
+    Video.category,
+    Video.difficulty_level,
+    Video.is_published,
+    Video.is_free
+)
+
+
+def content_preview(column, length: int = PREVIEW_LENGTH):
+    """在数据库端截取内容摘要"""
+    return func.substr(column, 1, length).label("content_preview")
+
+
+def comment_summaries(db: Session, with_preview: bool = False) -> Query:
+    """评论摘要查询"""
+    columns = COMMENT_SUMMARY_COLUMNS + ((content_preview(Comment.content),) if with_preview else ())
+    return db.query(*columns)
+
+
+def reflection_summaries(db: Session, with_preview: bool = False,
+                         with_username: bool = False, with_video_title: bool = False) -> Query:
+    """观后感摘要查询，可附带作者用户名和视频标题（JOIN一次取回，避免逐条查询）"""
+    columns = REFLECTION_SUMMARY_COLUMNS
+    if with_preview:
+        columns += (content_preview(Reflection.content),)
+    if with_username:
+        columns += (User.username,)
+    if with_video_title:
+        columns += (Video.title.label("video_title"),)
+
+    query = db.query(*columns)
+    if with_username:
+        query = query.outerjoin(User, User.id == Reflection.user_id)
+    if with_video_title:
+        query = query.outerjoin(Video, Video.id == Reflection.video_id)
+    return query
+
+
+def video_summaries(db: Session) -> Query:
+    """视频摘要查询（不含描述等大文本）"""
+    return db.query(*VIDEO_SUMMARY_COLUMNS)
@@ -1,6 +1,6 @@
 # backend/app/models/reflection.py
 from sqlalchemy import Column, Integer, String, Text, ForeignKey, Float, Boolean, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from .base import Base
 from datetime import datetime
 
@@ -13,7 +13,7 @@ class Reflection(Base):
     video_id = Column(Integer, ForeignKey("videos.id"), nullable=False)
 
     # 观后感内容
-    content = Column(Text, nullable=False)
+    content = deferred(Column(Text, nullable=False), group="text")  # 大文本列默认延迟加载
     word_count = Column(Integer, default=0)
 
     # 质量评估
@@ -25,7 +25,7 @@ class Reflection(Base):
     # 审核状态
     is_approved = Column(Boolean, default=False)
     reviewed_at = Column(DateTime)
-    feedback = Column(Text)  # 反馈意见
+    feedback = deferred(Column(Text), group="text")  # 反馈意见
 
     # 时间戳
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,6 +1,6 @@
 # backend/app/models/video.py
 from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from .base import Base
 from datetime import datetime
 
@@ -10,7 +10,7 @@ class Video(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False, index=True)
-    description = Column(Text)
+    description = deferred(Column(Text), group="text")  # 大文本列默认延迟加载
 
     # 视频属性
     duration = Column(Integer, nullable=False)  # 持续时间（秒）
@@ -21,7 +21,7 @@ class Video(Base):
     # 课程信息
     category = Column(String(100))  # 分类
     difficulty_level = Column(String(20), default="beginner")  # 难度级别
-    prerequisites = Column(Text)  # 前置要求
+    prerequisites = deferred(Column(Text), group="text")  # 前置要求
 
     # 状态管理
     is_published = Column(Boolean, default=True)
@@ -0,0 +1,138 @@
+# backend/app/profiler.py
+"""
+采样分析器
+按固定间隔抓取所有线程的调用栈，输出collapsed stack格式（flamegraph.pl / speedscope可直接读取）。
+只在采样期间运行一个后台线程，关闭时没有任何钩子和开销，可常驻在生产代码中。
+
+命令行用法（向运行中的服务发起一次采样）：
+    python -m app.profiler --url http://127.0.0.1:8000 --token <ADMIN_TOKEN> --seconds 30 -o cpu.folded
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+
+class ProfilerBusyError(RuntimeError):
+    """已有采样在进行中"""
+
+
+class SamplingProfiler:
+    """
+    基于 sys._current_frames() 的采样分析器
+    同一进程内同时只允许一次采样
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.running = False
+        self.last_run: Optional[Dict] = None
+
+    def profile(self, seconds: float, interval: float = 0.005, include_idle: bool = False) -> str:
+        """
+        采样指定秒数，返回collapsed stack文本（每行："帧;帧;帧 次数"）
+        include_idle为False时跳过停在等待/轮询上的线程栈
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("已有采样正在进行")
+
+        try:
+            self.running = True
+            stacks = self._sample(seconds, interval, include_idle)
+        finally:
+            self.running = False
+            self._lock.release()
+
+        return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
+
+    def _sample(self, seconds: float, interval: float, include_idle: bool) -> Counter:
+        stacks: Counter = Counter()
+        own_thread = threading.get_ident()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        samples = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+
+        while time.perf_counter() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                if not include_idle and _is_idle(frame):
+                    continue
+                stack = _collapse(frame)
+                name = thread_names.get(thread_id) or str(thread_id)
+                stacks[f"{name};{stack}"] += 1
+            samples += 1
+            time.sleep(interval)
+
+        self.last_run = {
+            "seconds": round(time.perf_counter() - started, 3),
+            "interval_ms": interval * 1000,
+            "samples": samples,
+            "unique_stacks": len(stacks)
+        }
+        return stacks
+
+    def stats(self) -> Dict:
+        return {"running": self.running, "last_run": self.last_run}
+
+
+# 线程阻塞在这些函数上时视为空闲（等待锁、IO轮询、事件循环select）
+_IDLE_FUNCTIONS = {"wait", "select", "poll", "accept", "_wait_for_tstate_lock"}
+
+
+def _is_idle(frame) -> bool:
+    return frame.f_code.co_name in _IDLE_FUNCTIONS
+
+
+def _collapse(frame) -> str:
+    """把帧链转换为 根;...;叶 形式，帧名为 模块文件:函数"""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    parts.reverse()
+    return ";".join(parts)
+
+
+profiler = SamplingProfiler()
+
+
+def main():
+    """向运行中的服务请求一次采样并保存结果"""
+    import urllib.request
+    import urllib.parse
+
+    parser = argparse.ArgumentParser(description="对运行中的服务进行CPU采样")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="服务地址")
+    parser.add_argument("--token", default=os.environ.get("ADMIN_TOKEN", ""), help="管理员令牌")
+    parser.add_argument("--seconds", type=float, default=10, help="采样时长（秒）")
+    parser.add_argument("--interval-ms", type=float, default=5, help="采样间隔（毫秒）")
+    parser.add_argument("--include-idle", action="store_true", help="包含空闲线程栈")
+    parser.add_argument("-o", "--output", default="profile.folded", help="输出文件")
+    args = parser.parse_args()
+
+    query = urllib.parse.urlencode({
+        "seconds": args.seconds,
+        "interval_ms": args.interval_ms,
+        "include_idle": str(args.include_idle).lower()
+    })
+    request = urllib.request.Request(
+        f"{args.url.rstrip('/')}/api/admin/profile?{query}",
+        method="POST",
+        headers={"X-Admin-Token": args.token}
+    )
+    with urllib.request.urlopen(request, timeout=args.seconds + 30) as response:
+        body = response.read()
+
+    with open(args.output, "wb") as f:
+        f.write(body)
+    print(f"✅ 采样结果已保存到 {args.output}（{len(body.splitlines())} 条调用栈）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+# backend/app/responses.py
+"""
+响应序列化
+默认响应类使用orjson；大负载接口用预编译的Pydantic TypeAdapter校验后直接输出JSON字节，
+不经过jsonable_encoder逐层转换
+"""
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultJSONResponse
+except ImportError:  # orjson未安装时退回标准库json
+    DefaultJSONResponse = JSONResponse
+
+
+@lru_cache(maxsize=None)
+def adapter_for(model: Any) -> TypeAdapter:
+    """按类型缓存TypeAdapter（校验器和序列化器只构建一次）"""
+    return TypeAdapter(model)
+
+
+def serialize(adapter: TypeAdapter, content: Any) -> bytes:
+    """按模型校验（支持ORM对象属性读取）并序列化为JSON字节"""
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+def model_response(adapter: TypeAdapter, content: Any, status_code: int = 200,
+                   headers: Optional[Dict[str, str]] = None) -> Response:
+    """返回已序列化的JSON响应；路由直接返回Response时FastAPI不再做通用编码"""
+    return Response(serialize(adapter, content), status_code=status_code,
+                    media_type="application/json", headers=headers)
@@ -24,4 +24,16 @@ try:
 except ImportError as e:
     print(f"❌ 无法导入reflections路由: {e}")
 
+try:
+    from . import events
+    __all__.append("events")
+except ImportError as e:
+    print(f"❌ 无法导入events路由: {e}")
+
+try:
+    from . import admin
+    __all__.append("admin")
+except ImportError as e:
+    print(f"❌ 无法导入admin路由: {e}")
+
 print(f"✅ 成功导入路由模块: {__all__}")
@@ -0,0 +1,79 @@
+# backend/app/routes/admin.py
+import asyncio
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from ..config import settings
+from ..profiler import profiler, ProfilerBusyError
+from ..services.export_service import EXPORT_TABLES, EXPORT_FORMATS, stream_export
+
+router = APIRouter()
+
+
+def require_admin(x_admin_token: str = Header("", description="管理员令牌")):
+    """校验管理员令牌；未配置令牌时管理接口整体关闭"""
+    if not settings.admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not hmac.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="无权访问")
+
+
+# CPU采样
+@router.post("/profile", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+async def run_profile(
+        seconds: float = Query(10, gt=0, description="采样时长（秒）"),
+        interval_ms: float = Query(5, ge=1, le=1000, description="采样间隔（毫秒）"),
+        include_idle: bool = Query(False, description="包含空闲线程栈")
+):
+    """
+    在当前工作进程上采样指定秒数
+    返回collapsed stack文本，可直接交给flamegraph.pl或speedscope生成火焰图
+    """
+    if seconds > settings.profiler_max_seconds:
+        raise HTTPException(status_code=400, detail=f"采样时长不能超过{settings.profiler_max_seconds}秒")
+
+    try:
+        # 采样线程独立运行，不占用评分线程池
+        folded = await asyncio.to_thread(profiler.profile, seconds, interval_ms / 1000, include_idle)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    return PlainTextResponse(
+        folded,
+        headers={"Content-Disposition": "attachment; filename=profile.folded"}
+    )
+
+
+# 采样状态
+@router.get("/profile", dependencies=[Depends(require_admin)])
+async def profile_status():
+    """当前是否在采样及上一次采样的概况"""
+    return profiler.stats()
+
+
+# 数据导出
+@router.get("/export/{table}", dependencies=[Depends(require_admin)])
+async def export_table(
+        table: str,
+        format: str = Query("ndjson", description="ndjson 或 csv"),
+        after_id: Optional[int] = Query(None, ge=0, description="断点续传：只导出id大于该值的记录"),
+        limit: Optional[int] = Query(None, ge=1, description="最多导出的记录数")
+):
+    """
+    流式导出评论/观后感/学习进度（按id升序）
+    中断后以最后收到的记录id作为after_id重新请求即可续传
+    """
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"不支持导出的表: {table}")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"不支持的格式: {format}")
+
+    filename = f"{table}.{format}"
+    return StreamingResponse(
+        stream_export(table, format, after_id, limit),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
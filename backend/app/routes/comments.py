@@ -1,8 +1,20 @@
 # backend/app/routes/comments.py - 最小功能版本
-from fastapi import APIRouter, HTTPException, Body
-from typing import Dict, Any
+import asyncio
+import time
+
+from fastapi import APIRouter, HTTPException, Body, Depends, Header, Query, Response, status
+from sqlalchemy.orm import Session
+from typing import Dict, Any, Optional
+
+from ..config import settings
+from ..models.base import get_db
+from ..services.comment_service import CommentService
 
 router = APIRouter()
+comment_service = CommentService()
+
+# 长轮询检查间隔（秒）
+MODERATION_POLL_INTERVAL = 0.5
 
 @router.get("/")
 async def get_comments():
@@ -14,13 +26,42 @@ async def get_comments():
     }
 
 @router.post("/")
-async def create_comment(content: str = Body(..., embed=True)):
+async def create_comment(
+        response: Response,
+        content: str = Body(..., embed=True),
+        parent_id: Optional[int] = Body(None, embed=True),
+        video_id: Optional[int] = Body(None, embed=True, description="所属视频；回复时沿用父评论的视频"),
+        db: Session = Depends(get_db)
+):
     """创建评论"""
     if not content or len(content.strip()) < 10:
         raise HTTPException(
             status_code=400, 
             detail="评论内容至少需要10个字符"
         )
+
+    if settings.moderation_queue_enabled:
+        # TODO: 从认证中获取用户ID
+        user_id = 1
+
+        result = comment_service.submit_comment(content, user_id, parent_id, db, video_id=video_id)
+        if not result["success"]:
+            raise HTTPException(status_code=400, detail=result["error"])
+
+        comment = result["comment"]
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {
+            "success": True,
+            "comment": {
+                "id": comment.id,
+                "video_id": comment.video_id,
+                "content": comment.content,
+                "status": comment.status.value,
+                "created_at": comment.created_at
+            },
+            "moderation_url": f"/api/comments/{comment.id}/moderation",
+            "message": "评论已提交，正在审核"
+        }
     
     return {
         "success": True,
@@ -34,6 +75,109 @@ async def create_comment(content: str = Body(..., embed=True)):
         "message": "评论创建成功"
     }
 
+@router.get("/threads")
+async def list_comment_threads(
+        video_id: Optional[int] = Query(None, description="只返回该视频下的评论"),
+        before_id: Optional[int] = Query(None, description="游标：上一页返回的next_cursor"),
+        limit: int = Query(settings.thread_page_size, ge=1, le=100),
+        depth: int = Query(0, ge=0, le=settings.thread_max_depth, description="一并返回的回复层级，0为只返回顶层评论"),
+        db: Session = Depends(get_db)
+):
+    """顶层评论分页（最新在前），可附带回复树"""
+    from ..services.thread_service import list_threads
+
+    return list_threads(db, video_id=video_id, before_id=before_id, limit=limit, depth=depth)
+
+@router.get("/{comment_id}/thread")
+async def get_comment_thread(
+        comment_id: int,
+        depth: Optional[int] = Query(None, ge=1, le=settings.thread_max_depth),
+        db: Session = Depends(get_db)
+):
+    """获取评论及其全部回复（树形）"""
+    from ..services.thread_service import get_thread
+
+    result = get_thread(comment_id, db, max_depth=depth)
+    if result is None:
+        raise HTTPException(status_code=404, detail="评论不存在")
+    return result
+
+@router.delete("/{comment_id}")
+async def delete_comment(comment_id: int, db: Session = Depends(get_db)):
+    """删除评论及其全部回复"""
+    # TODO: 从认证中获取用户ID
+    user_id = 1
+
+    result = comment_service.delete_comment(comment_id, db, user_id=user_id)
+    if not result["success"]:
+        code = 403 if result.get("code") == "FORBIDDEN" else 404
+        raise HTTPException(status_code=code, detail=result["error"])
+    return result
+
+def current_user_id(authorization: str = Header("", description="Bearer 访问令牌"),
+                    db: Session = Depends(get_db)) -> int:
+    """
+    从访问令牌取得当前用户（点赞记录按 (comment_id, user_id) 去重，不能使用占位用户）
+    令牌缺失、无效或账户已停用时返回401
+    """
+    from ..services.auth_service import auth_service
+
+    scheme, _, token = authorization.partition(" ")
+    claims = auth_service.verify_token(token) if scheme.lower() == "bearer" and token else None
+    context = auth_service.get_user_context(claims["user_id"], db) if claims and claims.get("user_id") else None
+    if context is None or not context.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="请先登录",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return context.id
+
+@router.post("/{comment_id}/like")
+async def like_comment(comment_id: int, user_id: int = Depends(current_user_id),
+                       db: Session = Depends(get_db)):
+    """点赞（重复点赞不重复计数；返回的点赞数为最终一致的近似值）"""
+    from ..services.like_service import like_comment as like
+
+    result = like(comment_id, user_id, db)
+    if not result["success"]:
+        code = 404 if result.get("code") == "NOT_FOUND" else 400
+        raise HTTPException(status_code=code, detail=result["error"])
+    return result
+
+@router.delete("/{comment_id}/like")
+async def unlike_comment(comment_id: int, user_id: int = Depends(current_user_id),
+                         db: Session = Depends(get_db)):
+    """取消点赞"""
+    from ..services.like_service import unlike_comment as unlike
+
+    result = unlike(comment_id, user_id, db)
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["error"])
+    return result
+
+@router.get("/{comment_id}/moderation")
+async def get_comment_moderation(
+        comment_id: int,
+        wait: float = Query(0, ge=0, le=30, description="长轮询：最多等待审核完成的秒数"),
+        db: Session = Depends(get_db)
+):
+    """
+    查询评论审核结果
+    wait>0时在审核完成或超时后返回，客户端可循环请求实现订阅
+    """
+    from ..services.moderation_queue import get_moderation_status
+
+    deadline = time.monotonic() + wait
+    while True:
+        result = get_moderation_status(comment_id, db)
+        # 结束读事务，避免SQLite读锁阻塞worker写回
+        db.rollback()
+        if result is None:
+            raise HTTPException(status_code=404, detail="评论不存在")
+        if result["finished"] or time.monotonic() >= deadline:
+            return result
+        await asyncio.sleep(MODERATION_POLL_INTERVAL)
+
 @router.post("/preview")
 async def preview_comment(content: str = Body(..., embed=True)):
     """评论预检测"""
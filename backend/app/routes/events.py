@@ -0,0 +1,124 @@
+# backend/app/routes/events.py
+import asyncio
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+
+from ..config import settings
+from ..events import broadcaster, Subscription, TooManyConnections, LAGGED, encode_json
+
+router = APIRouter()
+
+# 客户端断线后的重连间隔（毫秒）
+SSE_RETRY_MS = 3000
+
+
+def _parse_event_id(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def _subscribe(user_id: int, last_event_id: Optional[int]) -> Subscription:
+    if not settings.events_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="实时推送未开启")
+    try:
+        return broadcaster.subscribe(user_id, last_event_id)
+    except TooManyConnections as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+
+
+async def _sse_stream(subscription: Subscription) -> AsyncIterator[bytes]:
+    """积压的事件合并为一次写出；空闲时发送注释行作为心跳，防止代理断开空闲连接"""
+    try:
+        yield b"retry: %d\n\n" % SSE_RETRY_MS
+        while not subscription.closed:
+            events = await subscription.next_batch(settings.events_heartbeat_seconds)
+            if subscription.closed:
+                break
+            if not events:
+                yield b": ping\n\n"
+                continue
+            chunk = b"".join(event.sse for event in events)
+            dropped = subscription.take_dropped()
+            if dropped:
+                # 客户端收到lagged后应重新拉取一次完整状态
+                chunk = b"event: %s\ndata: %s\n\n" % (LAGGED.encode(), encode_json({"dropped": dropped})) + chunk
+            yield chunk
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+# SSE
+@router.get("/stream")
+async def event_stream(
+        last_event_id: Optional[str] = Header(None, description="断线重连时浏览器自动携带"),
+        since: Optional[int] = Query(None, description="不支持自定义请求头的客户端使用，同Last-Event-ID")
+):
+    """
+    订阅当前用户的实时事件（text/event-stream）
+    事件：comment.moderated / reflection.moderated / video.completed / video.unlocked / lagged
+    """
+    # TODO: 从认证中获取用户ID
+    user_id = 1
+
+    subscription = _subscribe(user_id, _parse_event_id(last_event_id) or since)
+    return StreamingResponse(
+        _sse_stream(subscription),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # 关闭Nginx响应缓冲
+        }
+    )
+
+
+# WebSocket
+@router.websocket("/ws")
+async def event_socket(websocket: WebSocket, since: Optional[int] = Query(None)):
+    """与SSE相同的事件，每条事件一个JSON文本帧"""
+    # TODO: 从认证中获取用户ID
+    user_id = 1
+
+    if not settings.events_enabled:
+        await websocket.close(code=1008)
+        return
+    try:
+        subscription = broadcaster.subscribe(user_id, since)
+    except TooManyConnections:
+        await websocket.close(code=1013)
+        return
+
+    await websocket.accept()
+
+    async def watch_disconnect():
+        # 客户端不需要发送消息；收到断开时结束订阅，唤醒发送循环
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            subscription.close()
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        while not subscription.closed:
+            events = await subscription.next_batch(settings.events_heartbeat_seconds)
+            if subscription.closed:
+                break
+            if not events:
+                await websocket.send_text('{"event":"ping"}')
+                continue
+            dropped = subscription.take_dropped()
+            if dropped:
+                await websocket.send_text(encode_json({"event": LAGGED, "data": {"dropped": dropped}}).decode("utf-8"))
+            for event in events:
+                await websocket.send_text(event.json)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        watcher.cancel()
+        broadcaster.unsubscribe(subscription)
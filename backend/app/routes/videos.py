@@ -1,16 +1,32 @@
 # backend/app/routes/videos.py
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer
 from typing import List, Optional
 from ..models.base import get_db
 from ..models.video import Video
 from ..schemas.video import VideoCreate, VideoUpdate, VideoResponse
 from ..schemas.progress import ProgressResponse, ProgressUpdate
+from ..schemas.responses import (
+    VideoDetailResponse, LearningPathResponse, PopularVideosResponse, SystemOverviewResponse
+)
 from ..services.video_service import VideoService
+from ..responses import adapter_for, model_response
+from ..http_cache import http_cache, CacheValidators, CATALOG, STATS
+from ..config import settings
 
 router = APIRouter()
 video_service = VideoService()
 
+# 预编译的响应序列化器（导入时构建一次）
+video_detail_adapter = adapter_for(VideoDetailResponse)
+learning_path_adapter = adapter_for(LearningPathResponse)
+popular_videos_adapter = adapter_for(PopularVideosResponse)
+system_overview_adapter = adapter_for(SystemOverviewResponse)
+
+# 条件请求缓存：目录类数据变化少，统计类随学习进度变化
+catalog_cache = http_cache(CATALOG, settings.http_cache_catalog_max_age, settings.http_cache_catalog_max_age * 5)
+stats_cache = http_cache(STATS, settings.http_cache_stats_max_age, settings.http_cache_stats_max_age)
+
 # 获取视频列表
 @router.get("/", response_model=List[VideoResponse])
 async def get_videos(
@@ -19,6 +35,7 @@ async def get_videos(
         category: Optional[str] = Query(None, description="按分类筛选"),
         difficulty: Optional[str] = Query(None, description="按难度筛选"),
         published_only: bool = Query(True, description="只显示已发布的视频"),
+        cache: CacheValidators = Depends(catalog_cache),
         db: Session = Depends(get_db)
 ):
     """
@@ -26,7 +43,8 @@ async def get_videos(
     - 支持分页、筛选
     - 按播放顺序排序
     """
-    query = db.query(Video)
+    # 列表响应包含描述字段，显式加载（其余大文本列保持延迟）
+    query = db.query(Video).options(undefer(Video.description))
 
     # 筛选条件
     if published_only:
@@ -48,26 +66,27 @@ async def get_videos(
 @router.get("/{video_id}", response_model=VideoResponse)
 async def get_video(
         video_id: int,
+        cache: CacheValidators = Depends(catalog_cache),
         db: Session = Depends(get_db)
 ):
     """获取指定视频的详细信息"""
-    # TODO: 从认证中获取用户ID
-    user_id = 1  # 临时固定值
-
-    # 使用服务层获取详情
-    video_data = video_service.get_video_with_progress(video_id, user_id, db)
+    # 只返回视频本身，不需要进度和统计（见 /{video_id}/details）
+    video = db.query(Video).options(undefer(Video.description)).filter(
+        Video.id == video_id,
+        Video.is_published == True
+    ).first()
 
-    if not video_data:
+    if not video:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="视频不存在或未发布"
         )
 
-    return video_data["video"]
+    return video
 
 
 # 获取视频详情和进度（新接口）
-@router.get("/{video_id}/details")
+@router.get("/{video_id}/details", response_model=VideoDetailResponse)
 async def get_video_details(
         video_id: int,
         db: Session = Depends(get_db)
@@ -84,7 +103,7 @@ async def get_video_details(
             detail="视频不存在或未发布"
         )
 
-    return video_data
+    return model_response(video_detail_adapter, video_data)
 
 
 # 更新观看进度（使用服务层）
@@ -117,7 +136,7 @@ async def update_video_progress(
 
 
 # 获取用户学习路径
-@router.get("/learning/path")
+@router.get("/learning/path", response_model=LearningPathResponse)
 async def get_learning_path(
         db: Session = Depends(get_db)
 ):
@@ -126,23 +145,27 @@ async def get_learning_path(
     user_id = 1
 
     learning_data = video_service.get_user_learning_path(user_id, db)
-    return learning_data
+    return model_response(learning_path_adapter, learning_data)
 
 
 # 获取热门视频
-@router.get("/popular/list")
+@router.get("/popular/list", response_model=PopularVideosResponse)
 async def get_popular_videos(
         limit: int = Query(10, ge=1, le=50, description="返回数量"),
+        cache: CacheValidators = Depends(stats_cache),
         db: Session = Depends(get_db)
 ):
     """获取热门视频排行"""
     popular_videos = video_service.get_popular_videos(db, limit)
-    return {"popular_videos": popular_videos}
+    return model_response(popular_videos_adapter, {"popular_videos": popular_videos}, headers=cache.headers)
 
 
 # 获取系统统计概览
-@router.get("/stats/overview")
-async def get_video_stats(db: Session = Depends(get_db)):
+@router.get("/stats/overview", response_model=SystemOverviewResponse)
+async def get_video_stats(
+        cache: CacheValidators = Depends(stats_cache),
+        db: Session = Depends(get_db)
+):
     """获取视频系统统计概览"""
     stats = video_service.get_system_overview(db)
-    return stats
\ No newline at end of file
+    return model_response(system_overview_adapter, stats, headers=cache.headers)
\ No newline at end of file
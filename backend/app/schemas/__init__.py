@@ -6,11 +6,17 @@ from .video import VideoCreate, VideoUpdate, VideoResponse
 from .reflection import ReflectionCreate, ReflectionUpdate, ReflectionResponse
 from .comment import CommentCreate, CommentUpdate, CommentResponse, SimilarityCheckRequest, SimilarityCheckResponse
 from .progress import ProgressCreate, ProgressUpdate, ProgressResponse
+from .responses import (
+    VideoDetailResponse, LearningPathResponse, PopularVideosResponse, SystemOverviewResponse,
+    CommentStatsResponse, ReflectionStatsResponse, CommentSummary, ReflectionSummary, ReflectionFeedItem
+)
 
 __all__ = [
     "UserCreate", "UserUpdate", "UserResponse", "UserStats",
     "VideoCreate", "VideoUpdate", "VideoResponse",
     "ReflectionCreate", "ReflectionUpdate", "ReflectionResponse",
     "CommentCreate", "CommentUpdate", "CommentResponse", "SimilarityCheckRequest", "SimilarityCheckResponse",
-    "ProgressCreate", "ProgressUpdate", "ProgressResponse"
+    "ProgressCreate", "ProgressUpdate", "ProgressResponse",
+    "VideoDetailResponse", "LearningPathResponse", "PopularVideosResponse", "SystemOverviewResponse",
+    "CommentStatsResponse", "ReflectionStatsResponse", "CommentSummary", "ReflectionSummary", "ReflectionFeedItem"
 ]
\ No newline at end of file
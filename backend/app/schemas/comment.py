@@ -17,6 +17,7 @@ class CommentBase(BaseModel):
 
 class CommentCreate(CommentBase):
     parent_id: Optional[int] = None
+    video_id: Optional[int] = None  # 回复时取父评论所属视频
 
 
 class CommentUpdate(BaseModel):
@@ -26,6 +27,7 @@ class CommentUpdate(BaseModel):
 class CommentResponse(CommentBase):
     id: int
     user_id: int
+    video_id: Optional[int] = None
     word_count: int
     similarity_score: float
     original_score: float
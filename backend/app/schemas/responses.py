@@ -0,0 +1,186 @@
+# backend/app/schemas/responses.py
+"""
+服务层返回结构对应的响应模型
+路由通过预编译的TypeAdapter直接序列化为JSON字节，跳过jsonable_encoder的通用遍历
+"""
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+from ..models.comment import CommentStatus
+from .progress import ProgressResponse
+
+
+class ORMModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+
+# ---- 视频 ----
+
+class VideoSummary(ORMModel):
+    id: int
+    title: str
+    duration: int
+    order_index: int
+    video_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    category: Optional[str] = None
+    difficulty_level: Optional[str] = None
+    is_published: bool
+    is_free: bool
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class VideoDetail(VideoSummary):
+    description: Optional[str] = None
+    prerequisites: Optional[str] = None
+
+
+class VideoStats(ORMModel):
+    total_viewers: int
+    completed_viewers: int
+    completion_rate: float
+    average_progress: float
+    reflection_count: int
+    comment_count: int
+
+
+class VideoDetailResponse(ORMModel):
+    video: VideoDetail
+    progress: Optional[ProgressResponse] = None
+    stats: VideoStats
+    next_video: Optional[VideoSummary] = None
+    prev_video: Optional[VideoSummary] = None
+
+
+class LearningPathItem(ORMModel):
+    video: VideoSummary
+    progress: Optional[ProgressResponse] = None
+    status: str
+    can_access: bool
+
+
+class LearningPathResponse(ORMModel):
+    learning_path: List[LearningPathItem]
+    total_videos: int
+    completed_videos: int
+    completion_rate: float
+    current_video: Optional[VideoSummary] = None
+    recommendations: List[str]
+
+
+class PopularVideo(ORMModel):
+    id: int
+    title: str
+    description: Optional[str] = None
+    duration: int
+    category: Optional[str] = None
+    viewer_count: int
+    completion_rate: float
+    average_progress: float
+
+
+class PopularVideosResponse(ORMModel):
+    popular_videos: List[PopularVideo]
+
+
+class VideoOverviewStats(ORMModel):
+    total_videos: int
+    total_duration_hours: float
+    categories: int
+
+
+class UserOverviewStats(ORMModel):
+    total_users: int
+    active_users: int
+    engagement_rate: float
+
+
+class LearningOverviewStats(ORMModel):
+    total_views: int
+    completed_views: int
+    completion_rate: float
+    recent_activity: int
+
+
+class SystemOverviewResponse(ORMModel):
+    video_stats: VideoOverviewStats
+    user_stats: UserOverviewStats
+    learning_stats: LearningOverviewStats
+
+
+# ---- 统计 ----
+
+class CommentStatsResponse(ORMModel):
+    total_comments: int
+    approved_comments: int
+    pending_comments: int
+    rejected_comments: int
+    approval_rate: float
+    average_quality_score: float
+    average_originality_score: float
+
+
+class ReflectionQualityIndicators(ORMModel):
+    has_thought_words: int
+    has_specific_examples: int
+    has_questions: int
+
+
+class ReflectionStatsResponse(ORMModel):
+    total_reflections: int
+    approved_reflections: int
+    approval_rate: float
+    average_quality_score: float
+    quality_indicators: ReflectionQualityIndicators
+
+
+# ---- 信息流（摘要行） ----
+
+class CommentSummary(ORMModel):
+    id: int
+    user_id: int
+    video_id: Optional[int] = None
+    word_count: Optional[int] = None
+    similarity_score: Optional[float] = None
+    original_score: Optional[float] = None
+    quality_passed: Optional[bool] = None
+    status: Optional[CommentStatus] = None
+    reject_reason: Optional[str] = None
+    like_count: Optional[int] = None
+    reply_count: Optional[int] = None
+    parent_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    content_preview: Optional[str] = None
+
+
+class ReflectionSummary(ORMModel):
+    id: int
+    user_id: int
+    video_id: int
+    word_count: Optional[int] = None
+    quality_score: Optional[float] = None
+    has_thought_words: Optional[bool] = None
+    has_specific_examples: Optional[bool] = None
+    has_questions: Optional[bool] = None
+    is_approved: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    content_preview: Optional[str] = None
+
+
+class FeedUser(ORMModel):
+    id: int
+    username: str
+
+
+class FeedVideo(ORMModel):
+    id: int
+    title: str
+
+
+class ReflectionFeedItem(ORMModel):
+    reflection: ReflectionSummary
+    user: Optional[FeedUser] = None
+    video: Optional[FeedVideo] = None
@@ -2,20 +2,28 @@
 """
 业务逻辑服务层
 包含核心算法和复杂业务逻辑处理
+
+服务类按需导入：相似度检测依赖 jieba / numpy / scikit-learn，
+导入包本身不应触发这些重量级依赖的加载（由启动预热阶段统一加载）
 """
+import importlib
+
+_LAZY_EXPORTS = {
+    "SimilarityDetector": ".similarity_detector",
+    "QualityChecker": ".quality_checker",
+    "VideoService": ".video_service",
+    "CommentService": ".comment_service",
+    "ReflectionService": ".reflection_service",
+    "AuthService": ".auth_service"
+}
+
+__all__ = list(_LAZY_EXPORTS)
 
-from .similarity_detector import SimilarityDetector
-from .quality_checker import QualityChecker
-from .video_service import VideoService
-from .comment_service import CommentService
-from .reflection_service import ReflectionService
-from .auth_service import AuthService
 
-__all__ = [
-    "SimilarityDetector",
-    "QualityChecker",
-    "VideoService",
-    "CommentService",
-    "ReflectionService",
-    "AuthService"
-]
\ No newline at end of file
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -1,12 +1,31 @@
 # backend/app/services/auth_service.py
+import hashlib
+import time
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple, NamedTuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
 from ..models.user import User
 from ..config import settings
+from .pools import hashing_pool, PoolSaturatedError
+from .cache import TTLCache
+from .rate_limiter import auth_rate_limiter, RateLimitDecision
+
+
+class UserContext(NamedTuple):
+    """认证所需的最小用户信息，可缓存且不绑定数据库会话"""
+    id: int
+    username: str
+    is_active: bool
+
+
+# 已验证令牌的声明缓存（按令牌摘要），过期时间不超过令牌本身的exp
+token_claims_cache = TTLCache("token_claims", settings.token_cache_ttl_seconds, max_size=50000)
+
+# 用户上下文缓存（按user_id），停用账户或修改资料时失效；多进程部署下其他进程依赖TTL收敛
+user_context_cache = TTLCache("user_context", settings.user_context_cache_ttl_seconds, max_size=50000)
 
 class AuthService:
     """
@@ -15,7 +34,14 @@ class AuthService:
     """
 
     def __init__(self):
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        # 固定bcrypt成本：成本调整后，旧成本的哈希会被标记为需要更新
+        self.pwd_context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=settings.bcrypt_rounds,
+            bcrypt__min_rounds=settings.bcrypt_rounds,
+            bcrypt__max_rounds=settings.bcrypt_rounds
+        )
         self.secret_key = settings.secret_key
         self.algorithm = settings.algorithm
         self.access_token_expire_minutes = settings.access_token_expire_minutes
@@ -28,6 +54,26 @@ class AuthService:
         """对密码进行哈希处理"""
         return self.pwd_context.hash(password)
 
+    def verify_and_update_password(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        验证密码，若哈希成本与当前配置不一致则同时生成新哈希
+        返回：(是否验证通过, 新哈希或None)
+        """
+        return self.pwd_context.verify_and_update(plain_password, hashed_password)
+
+    async def verify_password_async(self, plain_password: str, hashed_password: str) -> bool:
+        """在哈希线程池中验证密码，不阻塞事件循环"""
+        return await hashing_pool.run(self.verify_password, plain_password, hashed_password)
+
+    async def get_password_hash_async(self, password: str) -> str:
+        """在哈希线程池中计算密码哈希，不阻塞事件循环"""
+        return await hashing_pool.run(self.get_password_hash, password)
+
+    async def verify_and_update_password_async(self, plain_password: str,
+                                               hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """在哈希线程池中验证密码并按需重新哈希"""
+        return await hashing_pool.run(self.verify_and_update_password, plain_password, hashed_password)
+
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
         """创建JWT访问令牌"""
         to_encode = data.copy()
@@ -42,23 +88,57 @@ class AuthService:
         return encoded_jwt
 
     def verify_token(self, token: str) -> Optional[Dict]:
-        """验证JWT令牌"""
+        """验证JWT令牌（已验证的声明按令牌摘要短期缓存）"""
+        token_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        cached = token_claims_cache.get(token_key)
+        if cached is not None:
+            return cached
+
         try:
             payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            username: str = payload.get("sub")
-            if username is None:
-                return None
-            return {"username": username, "payload": payload}
         except JWTError:
             return None
 
+        username: str = payload.get("sub")
+        if username is None:
+            return None
+
+        token_data = {"username": username, "user_id": payload.get("user_id"), "payload": payload}
+
+        # 缓存时间不超过令牌剩余有效期
+        ttl = token_claims_cache.ttl_seconds
+        if payload.get("exp") is not None:
+            ttl = min(ttl, payload["exp"] - time.time())
+        token_claims_cache.set(token_key, token_data, ttl_seconds=ttl)
+
+        return token_data
+
     def authenticate_user(self, username: str, password: str, db: Session) -> Optional[User]:
-        """验证用户登录"""
+        """验证用户登录（哈希成本变化时顺带更新密码哈希，由调用方提交；失败计入用户名限流）"""
+        user = self.get_user_by_username(username, db)
+        if not user:
+            auth_rate_limiter.record_login_failure(username)
+            return None
+        valid, new_hash = self.verify_and_update_password(password, user.hashed_password)
+        if not valid:
+            auth_rate_limiter.record_login_failure(username)
+            return None
+        if new_hash:
+            user.hashed_password = new_hash
+        return user
+
+    async def authenticate_user_async(self, username: str, password: str, db: Session) -> Optional[User]:
+        """验证用户登录（异步版本，bcrypt在哈希线程池中执行）"""
         user = self.get_user_by_username(username, db)
         if not user:
+            auth_rate_limiter.record_login_failure(username)
             return None
-        if not self.verify_password(password, user.hashed_password):
+        valid, new_hash = await self.verify_and_update_password_async(password, user.hashed_password)
+        if not valid:
+            auth_rate_limiter.record_login_failure(username)
             return None
+        if new_hash:
+            user.hashed_password = new_hash
         return user
 
     def get_user_by_username(self, username: str, db: Session) -> Optional[User]:
@@ -70,13 +150,64 @@ class AuthService:
         return db.query(User).filter(User.email == email).first()
 
     def get_user_by_id(self, user_id: int, db: Session) -> Optional[User]:
-        """根据ID获取用户"""
-        return db.query(User).filter(User.id == user_id).first()
+        """根据ID获取用户（主键查找，优先命中会话标识映射）"""
+        return db.get(User, user_id)
+
+    def get_user_context(self, user_id: int, db: Session) -> Optional[UserContext]:
+        """获取用户上下文，只查询认证所需的列并缓存"""
+        context = user_context_cache.get(user_id)
+        if context is not None:
+            return context
+
+        row = db.query(User.id, User.username, User.is_active).filter(User.id == user_id).first()
+        if not row:
+            return None
+
+        context = UserContext(id=row.id, username=row.username, is_active=bool(row.is_active))
+        user_context_cache.set(user_id, context)
+        return context
 
-    def register_user(self, username: str, email: str, password: str, db: Session) -> Dict:
+    def register_user(self, username: str, email: str, password: str, db: Session,
+                      client_ip: Optional[str] = None) -> Dict:
         """
         用户注册
         """
+        # 0. 限流（在数据库查询和哈希计算之前）
+        decision = auth_rate_limiter.check_registration(client_ip)
+        if not decision.allowed:
+            return self._rate_limited_result(decision)
+
+        # 1-3. 校验用户名、邮箱和密码强度
+        error = self._check_registration(username, email, password, db)
+        if error:
+            return error
+
+        # 4. 创建新用户
+        hashed_password = self.get_password_hash(password)
+        return self._create_registered_user(username, email, hashed_password, db)
+
+    async def register_user_async(self, username: str, email: str, password: str, db: Session,
+                                  client_ip: Optional[str] = None) -> Dict:
+        """
+        用户注册（异步版本，bcrypt在哈希线程池中执行）
+        """
+        decision = auth_rate_limiter.check_registration(client_ip)
+        if not decision.allowed:
+            return self._rate_limited_result(decision)
+
+        error = self._check_registration(username, email, password, db)
+        if error:
+            return error
+
+        try:
+            hashed_password = await self.get_password_hash_async(password)
+        except PoolSaturatedError:
+            return self._busy_result()
+
+        return self._create_registered_user(username, email, hashed_password, db)
+
+    def _check_registration(self, username: str, email: str, password: str, db: Session) -> Optional[Dict]:
+        """注册前校验，先做廉价检查再进入哈希；通过时返回None"""
         # 1. 验证用户名是否已存在
         if self.get_user_by_username(username, db):
             return {
@@ -102,8 +233,10 @@ class AuthService:
                 "code": "WEAK_PASSWORD"
             }
 
-        # 4. 创建新用户
-        hashed_password = self.get_password_hash(password)
+        return None
+
+    def _create_registered_user(self, username: str, email: str, hashed_password: str, db: Session) -> Dict:
+        """保存新用户并签发令牌"""
         new_user = User(
             username=username,
             email=email,
@@ -129,12 +262,38 @@ class AuthService:
             "token_type": "bearer"
         }
 
-    def login_user(self, username: str, password: str, db: Session) -> Dict:
+    def login_user(self, username: str, password: str, db: Session,
+                   client_ip: Optional[str] = None) -> Dict:
         """
         用户登录
         """
+        # 0. 限流（在数据库查询和哈希计算之前）
+        decision = auth_rate_limiter.check_login(username, client_ip)
+        if not decision.allowed:
+            return self._rate_limited_result(decision)
+
         # 1. 验证用户凭据
         user = self.authenticate_user(username, password, db)
+        return self._complete_login(user, db)
+
+    async def login_user_async(self, username: str, password: str, db: Session,
+                               client_ip: Optional[str] = None) -> Dict:
+        """
+        用户登录（异步版本，bcrypt在哈希线程池中执行）
+        """
+        decision = auth_rate_limiter.check_login(username, client_ip)
+        if not decision.allowed:
+            return self._rate_limited_result(decision)
+
+        try:
+            user = await self.authenticate_user_async(username, password, db)
+        except PoolSaturatedError:
+            return self._busy_result()
+
+        return self._complete_login(user, db)
+
+    def _complete_login(self, user: Optional[User], db: Session) -> Dict:
+        """凭据验证之后的登录流程"""
         if not user:
             return {
                 "success": False,
@@ -150,7 +309,7 @@ class AuthService:
                 "code": "ACCOUNT_DISABLED"
             }
 
-        # 3. 更新最后登录时间
+        # 3. 更新最后登录时间（同时提交可能的重新哈希）
         user.last_login = datetime.utcnow()
         db.commit()
 
@@ -166,6 +325,23 @@ class AuthService:
             "token_type": "bearer"
         }
 
+    def _rate_limited_result(self, decision: RateLimitDecision) -> Dict:
+        """尝试过于频繁"""
+        return {
+            "success": False,
+            "error": f"尝试过于频繁，请{decision.retry_after}秒后重试",
+            "code": "RATE_LIMITED",
+            "retry_after": decision.retry_after
+        }
+
+    def _busy_result(self) -> Dict:
+        """哈希线程池排队已满"""
+        return {
+            "success": False,
+            "error": "服务繁忙，请稍后重试",
+            "code": "AUTH_BUSY"
+        }
+
     def _validate_password(self, password: str) -> Dict:
         """
         验证密码强度
@@ -189,42 +365,78 @@ class AuthService:
         """
         修改密码
         """
-        # 1. 获取用户
+        # 1. 获取用户并做廉价检查
+        user, error = self._check_password_change(user_id, old_password, new_password, db)
+        if error:
+            return error
+
+        # 2. 验证旧密码
+        if not self.verify_password(old_password, user.hashed_password):
+            return self._invalid_old_password_result()
+
+        # 3. 更新密码
+        return self._save_new_password(user, self.get_password_hash(new_password), db)
+
+    async def change_password_async(self, user_id: int, old_password: str, new_password: str, db: Session) -> Dict:
+        """
+        修改密码（异步版本，bcrypt在哈希线程池中执行）
+        """
+        user, error = self._check_password_change(user_id, old_password, new_password, db)
+        if error:
+            return error
+
+        try:
+            if not await self.verify_password_async(old_password, user.hashed_password):
+                return self._invalid_old_password_result()
+            new_hash = await self.get_password_hash_async(new_password)
+        except PoolSaturatedError:
+            return self._busy_result()
+
+        return self._save_new_password(user, new_hash, db)
+
+    def _check_password_change(self, user_id: int, old_password: str, new_password: str,
+                               db: Session) -> Tuple[Optional[User], Optional[Dict]]:
+        """
+        修改密码前的廉价检查（不涉及bcrypt）
+        旧密码验证通过后，新旧密码相同等价于明文相等，无需再做一次bcrypt验证
+        """
         user = self.get_user_by_id(user_id, db)
         if not user:
-            return {
+            return None, {
                 "success": False,
                 "error": "用户不存在",
                 "code": "USER_NOT_FOUND"
             }
 
-        # 2. 验证旧密码
-        if not self.verify_password(old_password, user.hashed_password):
-            return {
-                "success": False,
-                "error": "当前密码错误",
-                "code": "INVALID_OLD_PASSWORD"
-            }
-
-        # 3. 验证新密码强度
+        # 验证新密码强度
         password_check = self._validate_password(new_password)
         if not password_check["valid"]:
-            return {
+            return None, {
                 "success": False,
                 "error": password_check["error"],
                 "code": "WEAK_PASSWORD"
             }
 
-        # 4. 检查新密码是否与旧密码相同
-        if self.verify_password(new_password, user.hashed_password):
-            return {
+        # 检查新密码是否与旧密码相同
+        if new_password == old_password:
+            return None, {
                 "success": False,
                 "error": "新密码不能与当前密码相同",
                 "code": "SAME_PASSWORD"
             }
 
-        # 5. 更新密码
-        user.hashed_password = self.get_password_hash(new_password)
+        return user, None
+
+    def _invalid_old_password_result(self) -> Dict:
+        return {
+            "success": False,
+            "error": "当前密码错误",
+            "code": "INVALID_OLD_PASSWORD"
+        }
+
+    def _save_new_password(self, user: User, hashed_password: str, db: Session) -> Dict:
+        """保存新密码哈希"""
+        user.hashed_password = hashed_password
         user.updated_at = datetime.utcnow()
         db.commit()
 
@@ -271,6 +483,7 @@ class AuthService:
         user.updated_at = datetime.utcnow()
         db.commit()
         db.refresh(user)
+        user_context_cache.invalidate(user_id)
 
         return {
             "success": True,
@@ -291,6 +504,7 @@ class AuthService:
         user.is_active = False
         user.updated_at = datetime.utcnow()
         db.commit()
+        user_context_cache.invalidate(user_id)
 
         return {
             "success": True,
@@ -328,30 +542,50 @@ class AuthService:
         if not token_data:
             return None
 
-        username = token_data["username"]
-        user = self.get_user_by_username(username, db)
+        # 优先使用令牌中的user_id做主键查找，兼容只含用户名的旧令牌
+        if token_data["user_id"] is not None:
+            user = self.get_user_by_id(token_data["user_id"], db)
+        else:
+            user = self.get_user_by_username(token_data["username"], db)
 
         if not user or not user.is_active:
             return None
 
         return user
 
-    def refresh_token(self, old_token: str, db: Session) -> Dict:
+    def validate_token_and_get_user_context(self, token: str, db: Session) -> Optional[UserContext]:
         """
-        刷新访问令牌
+        验证令牌并返回用户上下文
+        令牌声明与用户上下文均命中缓存时不访问数据库
         """
-        token_data = self.verify_token(old_token)
+        token_data = self.verify_token(token)
         if not token_data:
-            return {
-                "success": False,
-                "error": "无效的令牌",
-                "code": "INVALID_TOKEN"
-            }
+            return None
 
-        username = token_data["username"]
-        user = self.get_user_by_username(username, db)
+        if token_data["user_id"] is not None:
+            context = self.get_user_context(token_data["user_id"], db)
+        else:
+            user = self.get_user_by_username(token_data["username"], db)
+            context = self.get_user_context(user.id, db) if user else None
 
-        if not user or not user.is_active:
+        if not context or not context.is_active:
+            return None
+
+        return context
+
+    def refresh_token(self, old_token: str, db: Session) -> Dict:
+        """
+        刷新访问令牌
+        """
+        user = self.validate_token_and_get_user_context(old_token, db)
+        if not user:
+            # 区分令牌无效与用户不可用
+            if not self.verify_token(old_token):
+                return {
+                    "success": False,
+                    "error": "无效的令牌",
+                    "code": "INVALID_TOKEN"
+                }
             return {
                 "success": False,
                 "error": "用户不存在或已被禁用",
@@ -367,4 +601,8 @@ class AuthService:
             "success": True,
             "access_token": new_token,
             "token_type": "bearer"
-        }
\ No newline at end of file
+        }
+
+
+# 路由依赖共用的实例（令牌校验与用户上下文缓存为模块级，多个实例之间共享）
+auth_service = AuthService()
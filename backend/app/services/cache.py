@@ -0,0 +1,76 @@
+# backend/app/services/cache.py
+import copy
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    进程内TTL缓存
+    线程安全，超过容量时按最近最少使用淘汰；写入和读取都复制值，调用方修改返回值不影响缓存
+    """
+
+    # 所有缓存实例，供指标导出
+    instances: "weakref.WeakSet" = weakref.WeakSet()
+
+    def __init__(self, name: str, ttl_seconds: float, max_size: int = 10000):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        TTLCache.instances.add(self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取缓存，过期或不存在时返回default"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(entry[0])
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """写入缓存，可单独指定过期时间"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0:
+            return
+
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """删除指定键"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict:
+        """缓存命中统计"""
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total > 0 else 0.0
+        }
@@ -1,13 +1,27 @@
 # backend/app/services/comment_service.py
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer_group
+from sqlalchemy import func, case, select, delete
+from collections import Counter
 from typing import Dict, List, Optional
 from datetime import datetime
 
 from ..models.comment import Comment, CommentStatus
-from ..models.user import User
-from .similarity_detector import SimilarityDetector
+from ..models.video import Video
+from ..models.projections import comment_summaries
+from .similarity_detector import SimilarityDetector, similarity_index
 from .quality_checker import QualityChecker
+from .thread_service import add_reply, adjust_reply_counts, subtree
+from .user_stats import increment_user_stats
+from .cache import TTLCache
 from ..config import settings
+from ..metrics import stage_timer
+from ..events import publish, COMMENT_MODERATED
+
+# 用户评论统计缓存（按user_id），该用户的评论写入时失效
+comment_stats_cache = TTLCache("comment_stats", settings.stats_cache_ttl_seconds)
+
+# 删除回复树时每条DELETE语句的评论数
+DELETE_BATCH_SIZE = 500
 
 class CommentService:
     """
@@ -19,9 +33,11 @@ class CommentService:
         self.similarity_detector = SimilarityDetector()
         self.quality_checker = QualityChecker()
 
-    def create_comment(self, content: str, user_id: int, parent_id: Optional[int], db: Session) -> Dict:
+    def create_comment(self, content: str, user_id: int, parent_id: Optional[int], db: Session,
+                       video_id: Optional[int] = None) -> Dict:
         """
         创建新评论，包含完整的检测流程
+        相似度只与同一视频下的评论比较；回复沿用父评论所属的视频
         """
         # 1. 基础验证
         if not content or len(content.strip()) < 10:
@@ -33,15 +49,25 @@ class CommentService:
 
         content = content.strip()
 
+        scope = self._resolve_video_id(parent_id, video_id, db)
+        if not scope["success"]:
+            return scope
+        video_id = scope["video_id"]
+
         # 2. 质量检测
-        quality_result = self.quality_checker.analyze_text_quality(content, "comment")
+        with stage_timer("create_comment", "quality"):
+            quality_result = self.quality_checker.analyze_text_quality(content, "comment")
 
         # 3. 相似度检测
-        similarity_result = self.similarity_detector.check_comment_originality(content, db)
+        with stage_timer("create_comment", "similarity"):
+            similarity_result = self.similarity_detector.check_comment_originality(
+                content, db, video_id=video_id
+            )
 
         # 4. 创建评论记录
         new_comment = Comment(
             user_id=user_id,
+            video_id=video_id,
             content=content,
             word_count=len(content),
             parent_id=parent_id,
@@ -62,14 +88,18 @@ class CommentService:
         if approval_result["status"] == "rejected":
             new_comment.reject_reason = approval_result["reason"]
 
-        # 6. 保存到数据库
-        db.add(new_comment)
-        db.commit()
-        db.refresh(new_comment)
-
-        # 7. 更新用户统计
-        if approval_result["status"] == "approved":
-            self._update_user_stats(user_id, similarity_result["originality_score"], db)
+        # 6. 保存到数据库（用户统计与父评论回复数在同一事务内原子更新）
+        with stage_timer("create_comment", "db_commit"):
+            if parent_id is not None and not add_reply(parent_id, db):
+                db.rollback()
+                return self._parent_not_found()
+            db.add(new_comment)
+            if approval_result["status"] == "approved":
+                self._update_user_stats(user_id, similarity_result["originality_score"], db)
+            db.commit()
+            db.refresh(new_comment)
+        comment_stats_cache.invalidate(user_id)
+        self._publish_result(new_comment)
 
         return {
             "success": True,
@@ -79,6 +109,75 @@ class CommentService:
             "approval_result": approval_result
         }
 
+    def submit_comment(self, content: str, user_id: int, parent_id: Optional[int], db: Session,
+                       video_id: Optional[int] = None) -> Dict:
+        """
+        提交评论（异步审核）
+        评论以待审核状态保存并写入审核任务，质量与相似度评分由审核队列worker批量完成
+        """
+        from .moderation_queue import enqueue
+
+        if not content or len(content.strip()) < 10:
+            return {
+                "success": False,
+                "error": "评论内容至少需要10个字符",
+                "code": "CONTENT_TOO_SHORT"
+            }
+
+        content = content.strip()
+        scope = self._resolve_video_id(parent_id, video_id, db)
+        if not scope["success"]:
+            return scope
+
+        new_comment = Comment(
+            user_id=user_id,
+            video_id=scope["video_id"],
+            content=content,
+            word_count=len(content),
+            parent_id=parent_id,
+            status=CommentStatus.PENDING
+        )
+
+        # 评论、任务与父评论回复数在同一事务内提交
+        with stage_timer("submit_comment", "db_commit"):
+            if parent_id is not None and not add_reply(parent_id, db):
+                db.rollback()
+                return self._parent_not_found()
+            db.add(new_comment)
+            db.flush()
+            job = enqueue(new_comment.id, db)
+            db.commit()
+        comment_stats_cache.invalidate(user_id)
+
+        return {
+            "success": True,
+            "comment": new_comment,
+            "job": job
+        }
+
+    def _resolve_video_id(self, parent_id: Optional[int], video_id: Optional[int], db: Session) -> Dict:
+        """确定评论所属视频：回复与父评论属于同一视频，否则校验指定的视频存在（为空表示全站评论）"""
+        if parent_id is not None:
+            parent = db.execute(select(Comment.video_id).where(Comment.id == parent_id)).first()
+            if parent is None:
+                return self._parent_not_found()
+            return {"success": True, "video_id": parent.video_id}
+
+        if video_id is not None and db.execute(select(Video.id).where(Video.id == video_id)).first() is None:
+            return {
+                "success": False,
+                "error": "视频不存在",
+                "code": "VIDEO_NOT_FOUND"
+            }
+        return {"success": True, "video_id": video_id}
+
+    def _parent_not_found(self) -> Dict:
+        return {
+            "success": False,
+            "error": "回复的评论不存在",
+            "code": "PARENT_NOT_FOUND"
+        }
+
     def _determine_approval_status(self, quality_result: Dict, similarity_result: Dict) -> Dict:
         """
         根据质量和相似度检测结果确定审核状态
@@ -124,16 +223,22 @@ class CommentService:
             "auto_decision": True
         }
 
-    def _update_user_stats(self, user_id: int, originality_score: float, db: Session):
-        """更新用户统计信息"""
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            return
+    def _publish_result(self, comment: Comment):
+        """向评论作者推送审核结果（提交后调用）"""
+        publish(comment.user_id, COMMENT_MODERATED, lambda: {
+            "comment_id": comment.id,
+            "status": comment.status.value,
+            "similarity_score": comment.similarity_score,
+            "original_score": comment.original_score,
+            "quality_passed": comment.quality_passed,
+            "reject_reason": comment.reject_reason
+        })
 
-        # 增加通过的评论数
-        user.comments_approved += 1
-
-        # 更新原创度分数
+    def _update_user_stats(self, user_id: int, originality_score: float, db: Session):
+        """
+        更新用户统计信息
+        通过评论数与原创度分数在同一条UPDATE中原子更新，由调用方提交
+        """
         self.similarity_detector.update_user_originality_score(user_id, originality_score, db)
 
     def update_comment(self, comment_id: int, new_content: str, db: Session) -> Dict:
@@ -159,10 +264,11 @@ class CommentService:
         # 重新检测
         quality_result = self.quality_checker.analyze_text_quality(new_content, "comment")
         similarity_result = self.similarity_detector.check_comment_originality(
-            new_content, db, exclude_id=comment_id
+            new_content, db, exclude_id=comment_id, video_id=comment.video_id
         )
 
-        # 更新评论
+        # 更新评论（内容变化后移除旧的索引文本）
+        similarity_index.remove(comment_id)
         comment.content = new_content.strip()
         comment.word_count = len(new_content)
         comment.quality_passed = quality_result["quality_passed"]
@@ -178,6 +284,8 @@ class CommentService:
 
         db.commit()
         db.refresh(comment)
+        comment_stats_cache.invalidate(comment.user_id)
+        self._publish_result(comment)
 
         return {
             "success": True,
@@ -188,11 +296,79 @@ class CommentService:
         }
 
     def get_comments_by_status(self, status: CommentStatus, db: Session, limit: int = 50) -> List[Comment]:
-        """获取指定状态的评论"""
-        return db.query(Comment).filter(
+        """获取指定状态的评论（加载全文）"""
+        return db.query(Comment).options(undefer_group("text")).filter(
             Comment.status == status
         ).order_by(Comment.created_at.desc()).limit(limit).all()
 
+    def get_comment_summaries_by_status(self, status: CommentStatus, db: Session, limit: int = 50) -> List:
+        """获取指定状态的评论（摘要行，不含全文）"""
+        return comment_summaries(db, with_preview=True).filter(
+            Comment.status == status
+        ).order_by(Comment.created_at.desc()).limit(limit).all()
+
+    def get_comment_detail(self, comment_id: int, db: Session) -> Optional[Comment]:
+        """获取评论详情（加载全文）"""
+        return db.query(Comment).options(undefer_group("text")).filter(
+            Comment.id == comment_id
+        ).first()
+
+    def delete_comment(self, comment_id: int, db: Session, user_id: Optional[int] = None) -> Dict:
+        """
+        删除评论及其全部回复
+        父评论回复数、作者的通过评论数与评论删除在同一事务内原子扣减，审核任务与点赞记录一并删除；
+        指定user_id时只允许删除本人的评论
+        """
+        from .moderation_queue import delete_jobs
+        from .like_service import delete_likes
+
+        rows = db.execute(
+            select(subtree(Comment.id == comment_id, with_preview=False)).order_by("depth")
+        ).all()
+        if not rows:
+            return {
+                "success": False,
+                "error": "评论不存在"
+            }
+
+        root = rows[0]
+        if user_id is not None and root.user_id != user_id:
+            return {
+                "success": False,
+                "error": "只能删除自己的评论",
+                "code": "FORBIDDEN"
+            }
+
+        # 由深到浅删除，分批时子评论总先于父评论删除
+        comment_ids = [row.id for row in reversed(rows)]
+        with stage_timer("delete_comment", "db_commit"):
+            for start in range(0, len(comment_ids), DELETE_BATCH_SIZE):
+                batch = comment_ids[start:start + DELETE_BATCH_SIZE]
+                delete_jobs(batch, db)
+                delete_likes(batch, db)
+                db.execute(
+                    delete(Comment)
+                    .where(Comment.id.in_(batch))
+                    .execution_options(synchronize_session=False)
+                )
+            if root.parent_id is not None:
+                adjust_reply_counts({root.parent_id: -1}, db)
+            approved = Counter(row.user_id for row in rows if row.status == CommentStatus.APPROVED)
+            for author_id, count in approved.items():
+                increment_user_stats(author_id, db, comments_approved=-count)
+            db.commit()
+
+        for removed_id in comment_ids:
+            similarity_index.remove(removed_id)
+        for author_id in {row.user_id for row in rows}:
+            comment_stats_cache.invalidate(author_id)
+
+        return {
+            "success": True,
+            "deleted": len(comment_ids),
+            "deleted_ids": comment_ids
+        }
+
     def manual_review_comment(self, comment_id: int, approved: bool, reviewer_feedback: str, db: Session) -> Dict:
         """
         人工审核评论
@@ -221,6 +397,8 @@ class CommentService:
             self._update_user_stats(comment.user_id, comment.original_score, db)
 
         db.commit()
+        comment_stats_cache.invalidate(comment.user_id)
+        self._publish_result(comment)
 
         return {
             "success": True,
@@ -229,37 +407,41 @@ class CommentService:
         }
 
     def get_user_comment_stats(self, user_id: int, db: Session) -> Dict:
-        """获取用户评论统计"""
-        total_comments = db.query(Comment).filter(Comment.user_id == user_id).count()
-        approved_comments = db.query(Comment).filter(
-            Comment.user_id == user_id,
-            Comment.status == CommentStatus.APPROVED
-        ).count()
-        pending_comments = db.query(Comment).filter(
-            Comment.user_id == user_id,
-            Comment.status == CommentStatus.PENDING
-        ).count()
-        rejected_comments = db.query(Comment).filter(
-            Comment.user_id == user_id,
-            Comment.status == CommentStatus.REJECTED
-        ).count()
-
-        # 计算平均分数
-        user_comments = db.query(Comment).filter(Comment.user_id == user_id).all()
-        avg_quality = sum(c.quality_passed for c in user_comments) / len(user_comments) * 100 if user_comments else 0
-        avg_originality = sum(c.original_score for c in user_comments) / len(user_comments) if user_comments else 0
-
-        return {
+        """
+        获取用户评论统计
+        单条聚合语句完成计数与平均分计算，结果按用户缓存
+        """
+        cached = comment_stats_cache.get(user_id)
+        if cached is not None:
+            return cached
+
+        row = db.execute(
+            select(
+                func.count(Comment.id).label("total"),
+                func.sum(case((Comment.status == CommentStatus.APPROVED, 1), else_=0)).label("approved"),
+                func.sum(case((Comment.status == CommentStatus.PENDING, 1), else_=0)).label("pending"),
+                func.sum(case((Comment.status == CommentStatus.REJECTED, 1), else_=0)).label("rejected"),
+                func.avg(case((Comment.quality_passed == True, 100.0), else_=0.0)).label("avg_quality"),
+                func.avg(Comment.original_score).label("avg_originality")
+            ).where(Comment.user_id == user_id)
+        ).one()
+
+        total_comments = row.total or 0
+        approved_comments = row.approved or 0
+
+        stats = {
             "total_comments": total_comments,
             "approved_comments": approved_comments,
-            "pending_comments": pending_comments,
-            "rejected_comments": rejected_comments,
+            "pending_comments": row.pending or 0,
+            "rejected_comments": row.rejected or 0,
             "approval_rate": (approved_comments / total_comments * 100) if total_comments > 0 else 0,
-            "average_quality_score": round(avg_quality, 2),
-            "average_originality_score": round(avg_originality, 2)
+            "average_quality_score": round(row.avg_quality or 0, 2),
+            "average_originality_score": round(row.avg_originality or 0, 2)
         }
+        comment_stats_cache.set(user_id, stats)
+        return stats
 
-    def check_comment_preview(self, content: str, db: Session) -> Dict:
+    def check_comment_preview(self, content: str, db: Session, video_id: Optional[int] = None) -> Dict:
         """
         评论预检测（不保存到数据库）
         用于给用户实时反馈
@@ -276,7 +458,7 @@ class CommentService:
         quality_result = self.quality_checker.analyze_text_quality(content, "comment")
 
         # 相似度检测
-        similarity_result = self.similarity_detector.check_comment_originality(content, db)
+        similarity_result = self.similarity_detector.check_comment_originality(content, db, video_id=video_id)
 
         # 预测审核结果
         approval_result = self._determine_approval_status(quality_result, similarity_result)
@@ -0,0 +1,302 @@
+# backend/app/services/export_service.py
+"""
+数据导出（NDJSON / CSV）
+服务端游标（yield_per）逐批读取，逐块编码输出，内存占用与表大小无关。
+按主键升序导出，断点续传时传入上次收到的最后一个id（after_id）。
+命令行导出每写完一块记录检查点（<output>.checkpoint：最后一个id与文件长度），
+--resume 时截掉检查点之后未写完的部分再追加；没有检查点的旧文件从文件内容中解析最后一条完整记录
+
+命令行用法（在backend目录下）：
+    python -m app.services.export_service comments --format ndjson -o comments.ndjson
+    python -m app.services.export_service progress --format csv -o progress.csv --resume
+"""
+import argparse
+import csv
+import enum
+import io
+import json
+import os
+from datetime import date, datetime
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models.base import SessionLocal
+from ..models.comment import Comment
+from ..models.reflection import Reflection
+from ..models.user_progress import UserProgress
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 可导出的表：名称 -> (模型, 导出列)
+EXPORT_TABLES: Dict[str, Tuple[type, Tuple[str, ...]]] = {
+    "comments": (Comment, (
+        "id", "user_id", "video_id", "parent_id", "content", "word_count", "similarity_score", "original_score",
+        "quality_passed", "status", "reject_reason", "like_count", "reply_count",
+        "created_at", "updated_at", "reviewed_at"
+    )),
+    "reflections": (Reflection, (
+        "id", "user_id", "video_id", "content", "word_count", "quality_score", "has_thought_words",
+        "has_specific_examples", "has_questions", "is_approved", "feedback",
+        "created_at", "updated_at", "reviewed_at"
+    )),
+    "progress": (UserProgress, (
+        "id", "user_id", "video_id", "watched_time", "completion_percentage", "is_completed",
+        "last_watched_position", "watch_count", "started_at", "completed_at", "updated_at"
+    )),
+}
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8"
+}
+
+# 服务端游标每批行数 / 每个输出块包含的行数
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_ROWS = 500
+
+
+def export_columns(table: str) -> Tuple[str, ...]:
+    return EXPORT_TABLES[table][1]
+
+
+def iter_rows(db: Session, table: str, after_id: Optional[int] = None,
+              limit: Optional[int] = None, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Tuple]:
+    """按主键升序流式读取（键集游标：id > after_id）"""
+    model, columns = EXPORT_TABLES[table]
+    stmt = select(*[getattr(model, column) for column in columns]).order_by(model.id)
+    if after_id is not None:
+        stmt = stmt.where(model.id > after_id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        for row in partition:
+            yield tuple(row)
+
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def encode_ndjson(rows: Iterator[Tuple], columns: Sequence[str]) -> Iterator[bytes]:
+    """每行一个JSON对象，按块输出"""
+    chunk = []
+    for row in rows:
+        record = dict(zip(columns, row))
+        if orjson is not None:
+            chunk.append(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+        else:
+            chunk.append((json.dumps(record, ensure_ascii=False, default=_plain) + "\n").encode("utf-8"))
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            yield b"".join(chunk)
+            chunk = []
+    if chunk:
+        yield b"".join(chunk)
+
+
+def encode_csv(rows: Iterator[Tuple], columns: Sequence[str], header: bool = True) -> Iterator[bytes]:
+    """CSV（首行为列名），按块输出"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+
+    count = 0
+    for row in rows:
+        writer.writerow([_plain(value) for value in row])
+        count += 1
+        if count >= EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def stream_export(table: str, fmt: str, after_id: Optional[int] = None,
+                  limit: Optional[int] = None, header: bool = True) -> Iterator[bytes]:
+    """
+    使用独立会话导出（会话生命周期与流式响应一致）
+    同步生成器：由StreamingResponse在线程池中迭代，不阻塞事件循环
+    """
+    columns = export_columns(table)
+    db = SessionLocal()
+    try:
+        rows = iter_rows(db, table, after_id, limit)
+        if fmt == "csv":
+            yield from encode_csv(rows, columns, header=header)
+        else:
+            yield from encode_ndjson(rows, columns)
+    finally:
+        db.close()
+
+
+def checkpoint_path(output: str) -> str:
+    return output + ".checkpoint"
+
+
+def save_checkpoint(path: str, state: Dict):
+    """先写临时文件再原子替换"""
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def _last_ndjson_record(path: str) -> Tuple[Optional[int], int]:
+    """从文件末尾向前找最后一个以换行结尾的完整行（JSON中的换行已转义，一行即一条记录）"""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        block = b""
+        while position > 0:
+            step = min(4096, position)
+            position -= step
+            f.seek(position)
+            block = f.read(step) + block
+            complete = block[:block.rfind(b"\n") + 1]  # 末尾没有换行的是写到一半的行
+            lines = [line for line in complete.splitlines() if line.strip()]
+            # 块首的行可能不完整，至少需要两行（或已读到文件开头）才能确定最后一行
+            if len(lines) >= 2 or (position == 0 and lines):
+                try:
+                    return int(json.loads(lines[-1])["id"]), position + len(complete)
+                except (ValueError, KeyError, TypeError):
+                    return None, 0
+        return None, 0
+
+
+def _last_csv_record(path: str, column_count: int) -> Tuple[Optional[int], int]:
+    """
+    用csv.reader从文件开头解析（引号内的字段可以包含换行，不能从末尾按行切分）
+    只认列数完整且以换行结尾的记录，返回最后一条的id与其结束位置（只有列名行时id为None、位置在列名行之后）
+    """
+    last_id, last_end = None, 0
+    with open(path, "rb") as f:
+        position = [0]
+
+        def lines():
+            while True:
+                line = f.readline()
+                if not line:
+                    return
+                position[0] = f.tell()
+                yield line.decode("utf-8")
+
+        reader = csv.reader(lines())
+        try:
+            header = next(reader, None)
+            if header is None:
+                return None, 0
+            last_end = position[0]
+            for row in reader:
+                if len(row) != column_count:
+                    continue
+                f.seek(position[0] - 1)
+                terminated = f.read(1) == b"\n"
+                f.seek(position[0])
+                if not terminated:
+                    break
+                try:
+                    last_id, last_end = int(row[0]), position[0]
+                except ValueError:
+                    continue
+        except (csv.Error, UnicodeDecodeError):
+            # 末尾不完整的记录（写到一半中断）
+            pass
+    return last_id, last_end
+
+
+def resume_position(path: str, table: str, fmt: str) -> Tuple[Optional[int], int]:
+    """
+    已导出文件的续传位置：(最后一条完整记录的id, 其后的文件偏移)，找不到时id为None
+    优先使用检查点；偏移之后的内容是未写完的部分，续传前截掉
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None, 0
+
+    checkpoint_file = checkpoint_path(path)
+    if os.path.exists(checkpoint_file):
+        with open(checkpoint_file, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if (checkpoint.get("table"), checkpoint.get("format")) == (table, fmt) \
+                and checkpoint.get("offset", 0) <= os.path.getsize(path):
+            return checkpoint.get("last_id"), checkpoint["offset"]
+
+    if fmt == "csv":
+        return _last_csv_record(path, len(export_columns(table)))
+    return _last_ndjson_record(path)
+
+
+def _tracked(rows: Iterator[Tuple], last: list) -> Iterator[Tuple]:
+    """记录最近取出的行的id（编码器在取出一块的最后一行后立即输出该块，此时即为块内最后一个id）"""
+    for row in rows:
+        last[0] = row[0]
+        yield row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出评论/观后感/学习进度")
+    parser.add_argument("table", choices=sorted(EXPORT_TABLES))
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson")
+    parser.add_argument("--after-id", type=int, default=None, help="从该id之后开始导出")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("-o", "--output", required=True, help="输出文件")
+    parser.add_argument("--resume", action="store_true", help="从输出文件最后一条完整记录的id之后继续追加")
+    args = parser.parse_args()
+
+    after_id = args.after_id
+    offset = 0
+    header = True
+    if args.resume:
+        resumed, offset = resume_position(args.output, args.table, args.format)
+        header = offset == 0
+        if resumed is not None:
+            after_id = resumed
+            print(f"⏩ 从 id > {after_id} 继续导出")
+        elif offset == 0 and os.path.exists(args.output) and os.path.getsize(args.output) > 0:
+            # 找不到续传位置时不覆盖已有内容
+            parser.error(f"无法从 {args.output} 确定续传位置，请检查文件或去掉 --resume 重新导出")
+
+    checkpoint_file = checkpoint_path(args.output)
+    if not offset and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)  # 重新导出，旧检查点作废
+    columns = export_columns(args.table)
+    last = [after_id]
+    written = 0
+    with open(args.output, "r+b" if offset else "wb") as f:
+        f.truncate(offset)
+        f.seek(offset)
+        db = SessionLocal()
+        try:
+            rows = _tracked(iter_rows(db, args.table, after_id, args.limit), last)
+            chunks = encode_csv(rows, columns, header=header) if args.format == "csv" else encode_ndjson(rows, columns)
+            for chunk in chunks:
+                f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+                written += len(chunk)
+                save_checkpoint(checkpoint_file, {
+                    "table": args.table, "format": args.format, "last_id": last[0], "offset": f.tell()
+                })
+        finally:
+            db.close()
+
+    print(f"✅ 导出完成：{args.output}（新增 {written} 字节）")
+
+
+if __name__ == "__main__":
+    main()
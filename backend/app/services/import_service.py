@@ -0,0 +1,914 @@
+# backend/app/services/import_service.py
+"""
+评论/观后感批量导入（历史数据迁移）
+逐条调用create_comment会对每一行重新拟合TF-IDF并单独提交，百万级数据不可行。
+批量管线：
+    1. 流式读取NDJSON/CSV（与export_service的导出格式一致），按批处理
+    2. 批量校验：用户/视频/父评论/已有观后感/观看进度各一次查询
+    3. 批量质量评分（可用多进程），同时完成相似度预处理（分词）
+    4. 相似度：按视频分区，一次稀疏矩阵乘法同时比较分区内已有评论语料与本批中排在前面的行
+    5. 批量INSERT（RETURNING取回id），用户计数在同一事务内累加
+    6. 提交后再把本批写入相似度索引
+每批提交后写检查点（源文件字节偏移），中断后可从检查点继续，已提交的批次不会重复导入。
+
+父评论关系：--keep-ids 时源id即目标id；默认分配新id，源id -> 新id 的映射随检查点保存在 <checkpoint>.ids，
+回复的parent_id经映射换算为新id（父评论须先于回复导入），映射不到的回复按 PARENT_NOT_FOUND 跳过。
+
+相似度说明：TF-IDF向量化器在语料上拟合，语料规模翻倍时重新拟合，
+分数与在线检测（每条评论单独拟合）基本一致但不完全相同
+
+命令行用法（在backend目录下）：
+    python -m app.services.import_service comments comments.ndjson
+    python -m app.services.import_service reflections reflections.csv --workers 4 --keep-ids
+"""
+import argparse
+import copy
+import csv
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert, select, text as sql_text, tuple_
+from sqlalchemy.orm import Session
+
+from ..http_cache import STATS, bump_versions
+from ..metrics import stage_timer
+from ..models.base import SessionLocal, engine, ensure_schema
+from ..models.comment import Comment, CommentStatus
+from ..models.reflection import Reflection
+from ..models.user import User
+from ..models.user_progress import UserProgress
+from ..models.video import Video
+from .comment_service import CommentService, comment_stats_cache
+from .reflection_service import ReflectionService, reflection_stats_cache, REFLECTION_STATS_KEY
+from .similarity_detector import similarity_index
+from .thread_service import adjust_reply_counts, count_replies
+from .user_stats import increment_user_stats, recompute_originality_scores
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+IMPORT_TABLES = ("comments", "reflections")
+IMPORT_FORMATS = ("ndjson", "csv")
+
+# 每批处理的记录数（一次事务）
+IMPORT_BATCH_SIZE = 500
+
+# 多进程评分时每个任务包含的文本数
+SCORING_CHUNK_SIZE = 100
+
+# 相似度计算时每次与之相乘的语料行数，限制中间结果内存
+SIMILARITY_CHUNK_ROWS = 20000
+
+# 语料分块数超过该值时合并，避免逐批vstack带来的平方复杂度
+SIMILARITY_MAX_BLOCKS = 32
+
+# 与在线创建一致的最短长度
+MIN_LENGTH = {"comments": 10, "reflections": 50}
+
+# 表名 -> 质量检测的文本类型
+TEXT_TYPES = {"comments": "comment", "reflections": "reflection"}
+
+
+class ImportRecordError(ValueError):
+    """记录无法导入（原因代码与在线接口的错误代码一致）"""
+
+    def __init__(self, code: str, message: str = ""):
+        super().__init__(message or code)
+        self.code = code
+
+
+# ---- 流式读取 ----
+
+def detect_format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def _parse_ndjson(line: bytes) -> Dict:
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+def read_records(path: str, fmt: str, offset: int = 0) -> Iterator[Tuple[int, Optional[Dict]]]:
+    """
+    从字节偏移处开始逐条读取，产出 (该记录结束处的偏移, 记录)
+    无法解析的行产出None，由调用方计入跳过数
+    """
+    with open(path, "rb") as f:
+        if fmt == "ndjson":
+            f.seek(offset)
+            while True:
+                line = f.readline()
+                if not line:
+                    return
+                if not line.strip():
+                    continue
+                try:
+                    record = _parse_ndjson(line)
+                except ValueError:
+                    record = None
+                yield f.tell(), record if isinstance(record, dict) else None
+            return
+
+        # CSV：csv.reader逐物理行向生成器取数（不预读），每条记录结束时的文件位置即检查点
+        position = [0]
+
+        def lines():
+            while True:
+                line = f.readline()
+                if not line:
+                    return
+                position[0] = f.tell()
+                yield line.decode("utf-8")
+
+        reader = csv.reader(lines())
+        header = next(reader, None)
+        if header is None:
+            return
+        if offset > position[0]:
+            f.seek(offset)
+            position[0] = offset
+            reader = csv.reader(lines())
+
+        for row in reader:
+            if not row:
+                continue
+            if len(row) != len(header):
+                yield position[0], None
+                continue
+            yield position[0], {name: (value if value != "" else None) for name, value in zip(header, row)}
+
+
+def _optional_int(value) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    return int(value)
+
+
+def _optional_datetime(value) -> Optional[datetime]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00")).replace(tzinfo=None)
+
+
+def normalize_record(table: str, record: Optional[Dict], keep_ids: bool) -> Dict:
+    """校验并转换字段类型；失败抛出ImportRecordError"""
+    if record is None:
+        raise ImportRecordError("INVALID_RECORD")
+
+    try:
+        content = record.get("content")
+        content = content.strip() if isinstance(content, str) else ""
+        normalized = {
+            "id": _optional_int(record.get("id")) if keep_ids else None,
+            "user_id": _optional_int(record.get("user_id")),
+            "content": content,
+            "created_at": _optional_datetime(record.get("created_at")),
+        }
+        if table == "comments":
+            # parent_id为源数据中的id，不保留id时在校验阶段换算为新id
+            normalized["source_id"] = _optional_int(record.get("id"))
+            normalized["parent_id"] = _optional_int(record.get("parent_id"))
+            normalized["video_id"] = _optional_int(record.get("video_id"))
+        else:
+            normalized["video_id"] = _optional_int(record.get("video_id"))
+    except (TypeError, ValueError):
+        raise ImportRecordError("INVALID_RECORD")
+
+    if normalized["user_id"] is None or (table == "reflections" and normalized["video_id"] is None):
+        raise ImportRecordError("INVALID_RECORD")
+    if keep_ids and normalized["id"] is None:
+        raise ImportRecordError("INVALID_RECORD", "--keep-ids 需要记录包含id")
+    if len(content) < MIN_LENGTH[table]:
+        raise ImportRecordError("CONTENT_TOO_SHORT")
+    return normalized
+
+
+# ---- 评分（可在子进程中执行） ----
+
+_worker_services = None
+
+
+def _services():
+    """每个进程各持有一份检测器（停用词表、jieba词典只加载一次）"""
+    global _worker_services
+    if _worker_services is None:
+        from .quality_checker import QualityChecker
+        from .similarity_detector import SimilarityDetector
+        _worker_services = (QualityChecker(), SimilarityDetector())
+    return _worker_services
+
+
+def score_texts(texts: Sequence[str], table: Optional[str]) -> List[Tuple[Optional[Dict], str]]:
+    """
+    质量评分 + 相似度预处理
+    table为None时只做预处理（加载已有语料）；观后感不需要预处理文本
+    """
+    quality_checker, detector = _services()
+    results = []
+    for text in texts:
+        quality = quality_checker.analyze_text_quality(text, TEXT_TYPES[table]) if table else None
+        processed = detector.preprocess_text(text) if table != "reflections" else ""
+        results.append((quality, processed))
+    return results
+
+
+class Scorer:
+    """单进程直接计算；workers>1时按块分发到进程池"""
+
+    def __init__(self, workers: int = 1):
+        self.workers = workers
+        self._pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def score(self, texts: Sequence[str], table: Optional[str]) -> List[Tuple[Optional[Dict], str]]:
+        if self._pool is None or len(texts) <= SCORING_CHUNK_SIZE:
+            return score_texts(texts, table)
+
+        chunks = [texts[i:i + SCORING_CHUNK_SIZE] for i in range(0, len(texts), SCORING_CHUNK_SIZE)]
+        results = []
+        for chunk_result in self._pool.map(score_texts, chunks, [table] * len(chunks)):
+            results.extend(chunk_result)
+        return results
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+
+
+# ---- 批量相似度 ----
+
+class BatchSimilarity:
+    """
+    评论语料的TF-IDF矩阵（L2归一化，点积即余弦相似度）
+    新一批同时与语料（分块相乘）及本批前面的行（下三角）比较
+    """
+
+    def __init__(self):
+        self.ids: List[int] = []
+        self.texts: List[str] = []
+        self._blocks = []  # 与ids顺序对应的稀疏矩阵块
+        self._vectorizer = None
+        self._fitted_size = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    def _fit(self, extra_texts: Sequence[str]):
+        """在语料+新批上重新拟合词表，并重算语料矩阵"""
+        from .similarity_detector import SimilarityDetector
+
+        corpus = self.texts + list(extra_texts)
+        if not any(corpus):
+            return
+        self._vectorizer = SimilarityDetector()._new_vectorizer()
+        try:
+            self._vectorizer.fit(corpus)
+        except ValueError:
+            # 语料过小时max_df过滤掉全部词，放宽后重试
+            self._vectorizer.set_params(max_df=1.0)
+            self._vectorizer.fit(corpus)
+        self._fitted_size = len(corpus)
+        self._blocks = [self._vectorizer.transform(self.texts)] if self.texts else []
+
+    def _compact(self):
+        from scipy.sparse import vstack
+
+        if len(self._blocks) > SIMILARITY_MAX_BLOCKS:
+            self._blocks = [vstack(self._blocks, format="csr")]
+
+    def score(self, texts: Sequence[str]) -> Tuple[List[float], List[Optional[int]], object]:
+        """
+        返回 (最高相似度0-100, 最相似的语料评论id, 本批矩阵)
+        本批内与前面行的相似度也计入最高分，此时id为None（插入后才有id）
+        """
+        import numpy as np
+        from scipy.sparse import tril
+
+        if not texts:
+            return [], [], None
+        if self._vectorizer is None or self.size + len(texts) > 2 * self._fitted_size:
+            self._fit(texts)
+        if self._vectorizer is None:
+            return [0.0] * len(texts), [None] * len(texts), None
+
+        batch = self._vectorizer.transform(texts)
+        best = np.zeros(len(texts))
+        best_ids: List[Optional[int]] = [None] * len(texts)
+
+        # 与已有语料比较
+        base = 0
+        for block in self._blocks:
+            for start in range(0, block.shape[0], SIMILARITY_CHUNK_ROWS):
+                chunk = block[start:start + SIMILARITY_CHUNK_ROWS]
+                product = (batch @ chunk.T).tocsr()
+                if product.nnz == 0:
+                    continue
+                maxima = product.max(axis=1).toarray().ravel()
+                positions = np.asarray(product.argmax(axis=1)).ravel()
+                for row in np.flatnonzero(maxima > best):
+                    best[row] = maxima[row]
+                    best_ids[row] = self.ids[base + start + int(positions[row])]
+            base += block.shape[0]
+
+        # 与本批前面的行比较
+        within = tril(batch @ batch.T, k=-1).tocsr()
+        if within.nnz:
+            maxima = within.max(axis=1).toarray().ravel()
+            for row in np.flatnonzero(maxima > best):
+                best[row] = maxima[row]
+                best_ids[row] = None
+
+        return [float(min(value, 1.0) * 100) for value in best], best_ids, batch
+
+    def add(self, ids: Sequence[int], texts: Sequence[str], matrix=None):
+        """插入提交后把本批加入语料"""
+        if not ids:
+            return
+        self.ids.extend(ids)
+        self.texts.extend(texts)
+        if self._vectorizer is not None:
+            self._blocks.append(matrix if matrix is not None else self._vectorizer.transform(texts))
+            self._compact()
+
+
+class PartitionedSimilarity:
+    """
+    按视频分区的批量相似度，与在线检测的分区口径一致（见 SimilarityDetector._candidate_ids）
+    每个分区独立的语料与词表，本批按分区分组后分别评分，工作量只与所属视频的评论数有关。
+    全站层（similarity_global_tier_size）只用于在线检测，导入时不参与比较
+    """
+
+    def __init__(self):
+        self.partitions: Dict[Optional[int], BatchSimilarity] = {}
+
+    @property
+    def size(self) -> int:
+        return sum(partition.size for partition in self.partitions.values())
+
+    def _partition(self, video_id: Optional[int]) -> BatchSimilarity:
+        partition = self.partitions.get(video_id)
+        if partition is None:
+            partition = self.partitions[video_id] = BatchSimilarity()
+        return partition
+
+    @staticmethod
+    def _group(video_ids: Sequence[Optional[int]]) -> Dict[Optional[int], List[int]]:
+        groups: Dict[Optional[int], List[int]] = {}
+        for position, video_id in enumerate(video_ids):
+            groups.setdefault(video_id, []).append(position)
+        return groups
+
+    def score(self, texts: Sequence[str], video_ids: Sequence[Optional[int]]
+              ) -> Tuple[List[float], List[Optional[int]], Dict]:
+        """返回 (最高相似度0-100, 最相似的语料评论id, 各分区的本批矩阵 {video_id: (行号, 矩阵)})"""
+        scores = [0.0] * len(texts)
+        best_ids: List[Optional[int]] = [None] * len(texts)
+        matrices = {}
+        for video_id, positions in self._group(video_ids).items():
+            group_scores, group_ids, matrix = self._partition(video_id).score([texts[p] for p in positions])
+            for position, score, best_id in zip(positions, group_scores, group_ids):
+                scores[position] = score
+                best_ids[position] = best_id
+            matrices[video_id] = (positions, matrix)
+        return scores, best_ids, matrices
+
+    def add(self, ids: Sequence[int], texts: Sequence[str], video_ids: Sequence[Optional[int]],
+            matrices: Optional[Dict] = None):
+        """插入提交后把本批按分区加入语料（ids、texts与评分时顺序一致）"""
+        if not ids:
+            return
+        groups = {
+            video_id: (positions, None) for video_id, positions in self._group(video_ids).items()
+        } if matrices is None else matrices
+        for video_id, (positions, matrix) in groups.items():
+            self._partition(video_id).add([ids[p] for p in positions], [texts[p] for p in positions], matrix)
+
+    def load(self, db: Session, scorer: Scorer, progress: Optional[Callable[[int], None]] = None) -> int:
+        """加载全部已有评论到各自分区（优先取相似度索引中的预处理文本）"""
+        rows = db.execute(
+            select(Comment.id, Comment.video_id, Comment.content, Comment.updated_at)
+            .where(Comment.content.isnot(None))
+            .order_by(Comment.id)
+            .execution_options(yield_per=IMPORT_BATCH_SIZE * 10)
+        )
+        for chunk in rows.partitions():
+            cached = similarity_index.get_many({row.id: row.updated_at for row in chunk})
+            missing = [row for row in chunk if row.id not in cached]
+            if missing:
+                processed = scorer.score([row.content for row in missing], None)
+                cached.update({row.id: text for row, (_, text) in zip(missing, processed)})
+            self.add([row.id for row in chunk], [cached[row.id] for row in chunk], [row.video_id for row in chunk])
+            if progress:
+                progress(self.size)
+        return self.size
+
+
+# ---- 检查点 ----
+
+def default_checkpoint_path(source: str) -> str:
+    return source + ".checkpoint"
+
+
+def load_checkpoint(path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, state: Dict):
+    """先写临时文件再原子替换，写到一半中断不会损坏检查点"""
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def id_map_path(checkpoint_path: str) -> str:
+    return checkpoint_path + ".ids"
+
+
+def load_id_map(path: str) -> Dict[int, int]:
+    """读取源id -> 新id映射（同一源id重复出现时以后写入的为准）"""
+    id_map: Dict[int, int] = {}
+    if not os.path.exists(path):
+        return id_map
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            source_id, _, new_id = line.partition("\t")
+            if new_id.strip():
+                id_map[int(source_id)] = int(new_id)
+    return id_map
+
+
+def append_id_map(path: str, mapping: Dict[int, int]):
+    """追加一批映射（批次提交后调用；重复追加同一批次不影响结果）"""
+    if not mapping:
+        return
+    with open(path, "a", encoding="utf-8") as f:
+        f.writelines(f"{source_id}\t{new_id}\n" for source_id, new_id in mapping.items())
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _new_stats() -> Dict:
+    return {"records": 0, "inserted": 0, "approved": 0, "pending": 0, "rejected": 0, "skipped": {}}
+
+
+# ---- 导入 ----
+
+class BulkImporter:
+    """
+    批量导入
+    progress回调在每批提交后调用，参数为当前检查点状态
+    """
+
+    def __init__(self, table: str, source: str, fmt: Optional[str] = None,
+                 batch_size: int = IMPORT_BATCH_SIZE, workers: int = 1, keep_ids: bool = False,
+                 checkpoint_path: Optional[str] = None,
+                 progress: Optional[Callable[[Dict], None]] = None):
+        if table not in IMPORT_TABLES:
+            raise ValueError(f"不支持导入的表: {table}")
+        self.table = table
+        self.source = source
+        self.fmt = fmt or detect_format(source)
+        self.batch_size = batch_size
+        self.keep_ids = keep_ids
+        self.checkpoint_path = checkpoint_path or default_checkpoint_path(source)
+        self.id_map_path = id_map_path(self.checkpoint_path)
+        self.progress = progress
+        self.scorer = Scorer(workers)
+        self.similarity = PartitionedSimilarity() if table == "comments" else None
+        self.comment_service = CommentService()
+        self.reflection_service = ReflectionService()
+        self.state = self._initial_state()
+        # 不保留id时已导入评论的 源id -> 新id
+        self.id_map: Dict[int, int] = {}
+
+    def _initial_state(self) -> Dict:
+        return {
+            "source": os.path.abspath(self.source),
+            "table": self.table,
+            "format": self.fmt,
+            "source_size": os.path.getsize(self.source),
+            "offset": 0,
+            "last_id": None,
+            "completed": False,
+            "pending": None,
+            "stats": _new_stats(),
+        }
+
+    def resume(self, db: Session) -> bool:
+        """
+        读取检查点；返回是否从检查点继续
+        提交前写入的pending批次：若其最后一个id已在库中说明提交成功，采用该批次之后的状态（含其id映射）
+        """
+        checkpoint = load_checkpoint(self.checkpoint_path)
+        if checkpoint is None:
+            return False
+        if checkpoint.get("source") != self.state["source"] or checkpoint.get("table") != self.table:
+            raise ValueError(f"检查点 {self.checkpoint_path} 不属于当前导入任务")
+
+        pending = checkpoint.pop("pending", None)
+        if pending:
+            model = Comment if self.table == "comments" else Reflection
+            committed = db.execute(select(model.id).where(model.id == pending["last_id"])).first()
+            if committed:
+                self._append_id_map(pending.pop("id_map", None))
+                checkpoint.update(pending)
+        checkpoint["pending"] = None
+        self.state = checkpoint
+        if self._maps_ids:
+            self.id_map = load_id_map(self.id_map_path)
+        return True
+
+    @property
+    def _maps_ids(self) -> bool:
+        return self.table == "comments" and not self.keep_ids
+
+    def _append_id_map(self, mapping: Optional[Dict]):
+        if not mapping:
+            return
+        mapping = {int(source_id): new_id for source_id, new_id in mapping.items()}
+        append_id_map(self.id_map_path, mapping)
+        self.id_map.update(mapping)
+
+    def run(self, db: Session) -> Dict:
+        started = time.perf_counter()
+        if self._maps_ids and self.state["offset"] == 0 and os.path.exists(self.id_map_path):
+            # 从头导入：丢弃上次的id映射
+            os.remove(self.id_map_path)
+            self.id_map = {}
+        try:
+            if self.similarity is not None:
+                with stage_timer("bulk_import", "load_corpus"):
+                    self.similarity.load(db, self.scorer)
+                db.rollback()  # 结束只读事务，释放SQLite读锁
+
+            batch: List[Tuple[int, Optional[Dict]]] = []
+            for end_offset, record in read_records(self.source, self.fmt, self.state["offset"]):
+                batch.append((end_offset, record))
+                if len(batch) >= self.batch_size:
+                    self._process_batch(db, batch)
+                    batch = []
+            if batch:
+                self._process_batch(db, batch)
+
+            if self.table == "comments" and self.state["stats"]["approved"]:
+                # 原创度分数是按时间顺序的加权平均，导入结束后统一重放
+                with stage_timer("bulk_import", "originality"):
+                    recompute_originality_scores(db)
+            self._sync_sequence(db)
+
+            self.state["completed"] = True
+            save_checkpoint(self.checkpoint_path, self.state)
+        finally:
+            self.scorer.close()
+
+        result = dict(self.state["stats"])
+        result["seconds"] = round(time.perf_counter() - started, 2)
+        return result
+
+    def _process_batch(self, db: Session, batch: List[Tuple[int, Optional[Dict]]]):
+        # 在副本上累计：提交失败时检查点中的统计保持不变
+        stats = copy.deepcopy(self.state["stats"])
+        skipped = Counter()
+        stats["records"] += len(batch)
+        end_offset = batch[-1][0]
+
+        candidates = []
+        for _, record in batch:
+            try:
+                candidates.append(normalize_record(self.table, record, self.keep_ids))
+            except ImportRecordError as e:
+                skipped[e.code] += 1
+
+        with stage_timer("bulk_import", "validate"):
+            candidates = self._validate(db, candidates, skipped)
+
+        with stage_timer("bulk_import", "quality"):
+            scored = self.scorer.score([item["content"] for item in candidates], self.table)
+
+        if self.table == "comments":
+            rows, processed, matrix = self._comment_rows(candidates, scored, stats)
+        else:
+            rows, processed, matrix = self._reflection_rows(db, candidates, scored, stats, skipped), [], None
+
+        for code, count in skipped.items():
+            stats["skipped"][code] = stats["skipped"].get(code, 0) + count
+        new_state = dict(self.state, offset=end_offset)
+
+        with stage_timer("bulk_import", "insert"):
+            ids, batch_map = self._insert(db, rows, stats, candidates) if rows else ([], {})
+            if ids:
+                new_state["last_id"] = ids[-1]
+                # 提交前记录pending：提交后、写检查点前中断时，续传可判断本批是否已落库
+                save_checkpoint(self.checkpoint_path, dict(self.state, pending={
+                    "offset": end_offset, "last_id": ids[-1], "stats": stats, "id_map": batch_map
+                }))
+            db.commit()
+
+        self._append_id_map(batch_map)
+        new_state["stats"] = stats
+        new_state["pending"] = None
+        self.state = new_state
+        save_checkpoint(self.checkpoint_path, self.state)
+
+        # 提交后更新索引与缓存
+        if self.table == "comments":
+            self.similarity.add(ids, processed, [row["video_id"] for row in rows], matrix)
+            for comment_id, text, row in zip(ids, processed, rows):
+                similarity_index.add(comment_id, text, row["updated_at"])
+            comment_stats_cache.clear()
+        else:
+            reflection_stats_cache.invalidate(REFLECTION_STATS_KEY)
+        if ids:
+            bump_versions(STATS)
+
+        if self.progress:
+            self.progress(self.state)
+
+    def _validate(self, db: Session, candidates: List[Dict], skipped: Counter) -> List[Dict]:
+        """批量存在性检查，每类一次查询"""
+        if not candidates:
+            return candidates
+        model = Comment if self.table == "comments" else Reflection
+
+        user_ids = {item["user_id"] for item in candidates}
+        known_users = set(db.execute(select(User.id).where(User.id.in_(user_ids))).scalars())
+
+        existing_ids = set()
+        if self.keep_ids:
+            existing_ids = set(db.execute(
+                select(model.id).where(model.id.in_([item["id"] for item in candidates]))
+            ).scalars())
+
+        if self.table == "comments":
+            # 父评论 -> 所属视频；回复与父评论属于同一视频
+            parent_ids = {self._target_parent(item["parent_id"]) for item in candidates} - {None}
+            known_parents = dict(db.execute(
+                select(Comment.id, Comment.video_id).where(Comment.id.in_(parent_ids))
+            ).all()) if parent_ids else {}
+            video_ids = {item["video_id"] for item in candidates if item["video_id"] is not None}
+            known_videos = set(db.execute(
+                select(Video.id).where(Video.id.in_(video_ids))
+            ).scalars()) if video_ids else set()
+            batch_videos: Dict[int, Optional[int]] = {}
+        else:
+            video_ids = {item["video_id"] for item in candidates}
+            known_videos = set(db.execute(select(Video.id).where(Video.id.in_(video_ids))).scalars())
+            pairs = {(item["user_id"], item["video_id"]) for item in candidates}
+            existing_pairs = set(tuple(row) for row in db.execute(
+                select(Reflection.user_id, Reflection.video_id)
+                .where(tuple_(Reflection.user_id, Reflection.video_id).in_(list(pairs)))
+            ))
+
+        valid = []
+        batch_ids = set()
+        for item in candidates:
+            if item["user_id"] not in known_users:
+                skipped["USER_NOT_FOUND"] += 1
+                continue
+            if self.keep_ids:
+                if item["id"] in existing_ids or item["id"] in batch_ids:
+                    skipped["DUPLICATE_ID"] += 1
+                    continue
+            if self.table == "comments":
+                # batch_videos按源id记录本批前面已通过校验的评论
+                parent_id = item["parent_id"]
+                target_parent = self._target_parent(parent_id)
+                if parent_id is not None:
+                    if parent_id in batch_videos:
+                        # 本批内的父评论：不保留id时插入后才有新id，由_insert回填
+                        item["video_id"] = batch_videos[parent_id]
+                        item["parent_id"] = parent_id if self.keep_ids else None
+                        item["parent_source"] = parent_id
+                    elif target_parent in known_parents:
+                        item["video_id"] = known_parents[target_parent]
+                        item["parent_id"] = target_parent
+                    else:
+                        skipped["PARENT_NOT_FOUND"] += 1
+                        continue
+                elif item["video_id"] is not None and item["video_id"] not in known_videos:
+                    skipped["VIDEO_NOT_FOUND"] += 1
+                    continue
+                if item["source_id"] is not None:
+                    batch_videos[item["source_id"]] = item["video_id"]
+            else:
+                pair = (item["user_id"], item["video_id"])
+                if item["video_id"] not in known_videos:
+                    skipped["VIDEO_NOT_FOUND"] += 1
+                    continue
+                if pair in existing_pairs:
+                    skipped["REFLECTION_EXISTS"] += 1
+                    continue
+                existing_pairs.add(pair)
+            if self.keep_ids:
+                batch_ids.add(item["id"])
+            valid.append(item)
+        return valid
+
+    def _target_parent(self, parent_id: Optional[int]) -> Optional[int]:
+        """源数据中的parent_id对应的目标库id（不保留id时经映射换算，映射不到为None）"""
+        if parent_id is None or self.keep_ids:
+            return parent_id
+        return self.id_map.get(parent_id)
+
+    def _comment_rows(self, candidates: List[Dict], scored: List[Tuple[Dict, str]], stats: Dict):
+        processed = [text for _, text in scored]
+        with stage_timer("bulk_import", "similarity"):
+            similarity_scores, _, matrix = self.similarity.score(
+                processed, [item["video_id"] for item in candidates]
+            )
+
+        now = datetime.utcnow()
+        rows = []
+        for item, (quality, _), similarity in zip(candidates, scored, similarity_scores):
+            similarity = round(similarity, 2)
+            approval = self.comment_service._determine_approval_status(quality, {"similarity_score": similarity})
+            status = CommentStatus(approval["status"])
+            stats[approval["status"]] += 1
+            row = {
+                "user_id": item["user_id"],
+                "video_id": item["video_id"],
+                "parent_id": item["parent_id"],
+                "content": item["content"],
+                "word_count": len(item["content"]),
+                "quality_passed": quality["quality_passed"],
+                "quality_issues": "; ".join(quality["issues"]) if quality["issues"] else None,
+                "similarity_score": similarity,
+                "original_score": round(max(0, 100 - similarity), 2),
+                "status": status,
+                "reject_reason": approval["reason"] if status == CommentStatus.REJECTED else None,
+                "created_at": item["created_at"] or now,
+                "updated_at": item["created_at"] or now,
+            }
+            if self.keep_ids:
+                row["id"] = item["id"]
+            rows.append(row)
+        return rows, processed, matrix
+
+    def _reflection_rows(self, db: Session, candidates: List[Dict], scored: List[Tuple[Dict, str]],
+                         stats: Dict, skipped: Counter):
+        """观后感审核规则与在线创建一致：需先观看至少50%"""
+        if not candidates:
+            return []
+        pairs = {(item["user_id"], item["video_id"]) for item in candidates}
+        progress_rows = {
+            (row.user_id, row.video_id): row for row in db.execute(
+                select(UserProgress.user_id, UserProgress.video_id, UserProgress.completion_percentage)
+                .where(tuple_(UserProgress.user_id, UserProgress.video_id).in_(list(pairs)))
+            )
+        }
+
+        service = self.reflection_service
+        now = datetime.utcnow()
+        rows = []
+        for item, (quality, _) in zip(candidates, scored):
+            progress = progress_rows.get((item["user_id"], item["video_id"]))
+            if progress is None or progress.completion_percentage < 50:
+                skipped["INSUFFICIENT_WATCH_TIME"] += 1
+                continue
+
+            approval = service._determine_approval_status(quality, progress)
+            stats["approved" if approval["approved"] else "rejected"] += 1
+            content = item["content"]
+            row = {
+                "user_id": item["user_id"],
+                "video_id": item["video_id"],
+                "content": content,
+                "word_count": len(content),
+                "quality_score": quality["quality_score"],
+                "has_thought_words": service._has_thought_indicators(content),
+                "has_specific_examples": service._has_specific_examples(content),
+                "has_questions": service._has_questions(content),
+                "is_approved": approval["approved"],
+                "feedback": None if approval["approved"] else approval["feedback"],
+                "created_at": item["created_at"] or now,
+                "updated_at": item["created_at"] or now,
+            }
+            if self.keep_ids:
+                row["id"] = item["id"]
+            rows.append(row)
+        return rows
+
+    def _insert(self, db: Session, rows: List[Dict], stats: Dict,
+                candidates: List[Dict]) -> Tuple[List[int], Dict[int, int]]:
+        """
+        批量INSERT并按参数顺序取回id；通过的记录按用户累加计数，回复按父评论累加回复数（同一事务）
+        返回 (新id, 本批 源id -> 新id 映射)；映射只在不保留id导入评论时记录
+        """
+        model = Comment if self.table == "comments" else Reflection
+        statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+        batch_map: Dict[int, int] = {}
+        if not self._maps_ids:
+            ids = list(db.execute(statement, rows).scalars())
+        else:
+            # rows与candidates一一对应；回复引用本批尚未插入的父评论时，先插入前面的行取回新id再回填
+            ids = []
+            start = 0
+            unsent = set()
+
+            def flush(end: int):
+                new_ids = list(db.execute(statement, rows[start:end]).scalars())
+                for item, new_id in zip(candidates[start:end], new_ids):
+                    if item["source_id"] is not None:
+                        batch_map[item["source_id"]] = new_id
+                ids.extend(new_ids)
+                unsent.clear()
+
+            for position, item in enumerate(candidates):
+                parent_source = item.get("parent_source")
+                if parent_source is not None:
+                    if parent_source in unsent:
+                        flush(position)
+                        start = position
+                    rows[position]["parent_id"] = batch_map[parent_source]
+                if item["source_id"] is not None:
+                    unsent.add(item["source_id"])
+            flush(len(rows))
+
+        if self.table == "comments":
+            approved = Counter(row["user_id"] for row in rows if row["status"] == CommentStatus.APPROVED)
+            for user_id, count in approved.items():
+                increment_user_stats(user_id, db, comments_approved=count)
+            adjust_reply_counts(count_replies(rows), db)
+        else:
+            approved = Counter(row["user_id"] for row in rows if row["is_approved"])
+            for user_id, count in approved.items():
+                increment_user_stats(user_id, db, reflections_written=count)
+
+        stats["inserted"] += len(ids)
+        return ids, batch_map
+
+    def _sync_sequence(self, db: Session):
+        """保留原id导入后同步PostgreSQL序列"""
+        if not self.keep_ids or engine.dialect.name != "postgresql":
+            return
+        db.execute(sql_text(
+            f"SELECT setval(pg_get_serial_sequence('{self.table}', 'id'), (SELECT MAX(id) FROM {self.table}))"
+        ))
+        db.commit()
+
+
+def _print_progress(started: float):
+    def report(state: Dict):
+        stats = state["stats"]
+        elapsed = time.perf_counter() - started
+        percent = state["offset"] / state["source_size"] * 100 if state["source_size"] else 100.0
+        rate = stats["records"] / elapsed if elapsed > 0 else 0
+        skipped = sum(stats["skipped"].values())
+        print(f"⏳ {percent:5.1f}% 已读 {stats['records']} 条，导入 {stats['inserted']}"
+              f"（通过 {stats['approved']} / 待审 {stats['pending']} / 拒绝 {stats['rejected']}），"
+              f"跳过 {skipped}，{rate:.0f} 条/秒")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量导入评论/观后感")
+    parser.add_argument("table", choices=IMPORT_TABLES)
+    parser.add_argument("source", help="NDJSON或CSV文件（与导出格式一致）")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, default=None, help="默认按扩展名判断")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=1, help="质量评分进程数")
+    parser.add_argument("--keep-ids", action="store_true",
+                        help="保留源数据中的id；默认分配新id，回复的parent_id按源id映射到新id")
+    parser.add_argument("--checkpoint", default=None, help="检查点文件，默认为 <source>.checkpoint")
+    parser.add_argument("--restart", action="store_true", help="忽略已有检查点，从头导入")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    importer = BulkImporter(
+        args.table, args.source, args.format, batch_size=args.batch_size, workers=args.workers,
+        keep_ids=args.keep_ids, checkpoint_path=args.checkpoint, progress=_print_progress(started)
+    )
+
+    ensure_schema()  # 已有数据库补齐comments.video_id等新增结构
+    db = SessionLocal()
+    try:
+        if not args.restart and importer.resume(db):
+            if importer.state["completed"]:
+                print(f"✅ {args.source} 已导入完成（检查点 {importer.checkpoint_path}），使用 --restart 重新导入")
+                return
+            print(f"⏩ 从检查点继续：偏移 {importer.state['offset']}，已读 {importer.state['stats']['records']} 条")
+        result = importer.run(db)
+    finally:
+        db.close()
+
+    print(f"🎉 导入完成：{json.dumps(result, ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# backend/app/services/leases.py
+"""
+定时任务租约
+多进程部署（uvicorn --workers N）时每个进程都会启动同样的定时任务，
+需要全局只执行一份的任务先取得数据库中的租约行：未过期的租约只允许持有者续约，
+持有进程退出后租约到期，由下一个执行的进程接手。
+"""
+import os
+import socket
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.job_lease import JobLease
+
+# 本进程的持有者标识
+PROCESS_OWNER = f"{socket.gethostname()}-{os.getpid()}"
+
+
+def acquire_lease(name: str, lease_seconds: int, db: Session, owner: str = PROCESS_OWNER) -> bool:
+    """取得或续约租约并提交，返回False表示租约由其他进程持有且未过期"""
+    now = datetime.utcnow()
+    until = now + timedelta(seconds=lease_seconds)
+    result = db.execute(
+        update(JobLease)
+        .where(JobLease.name == name, or_(JobLease.locked_by == owner, JobLease.locked_until < now))
+        .values(locked_by=owner, locked_until=until)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 1:
+        db.commit()
+        return True
+
+    # 租约行不存在时创建；其他进程同时创建时主键冲突，由对方持有
+    try:
+        db.execute(insert(JobLease).values(name=name, locked_by=owner, locked_until=until))
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+
+
+def hold_until(name: str, until: datetime, db: Session, owner: str = PROCESS_OWNER):
+    """
+    直接设置租约到期时间并提交（不检查持有者），用作多进程共享的时效标记；
+    until不晚于当前时间即解除
+    """
+    result = db.execute(
+        update(JobLease)
+        .where(JobLease.name == name)
+        .values(locked_by=owner, locked_until=until)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        try:
+            db.execute(insert(JobLease).values(name=name, locked_by=owner, locked_until=until))
+        except IntegrityError:
+            db.rollback()
+            return hold_until(name, until, db, owner)
+    db.commit()
+
+
+def lease_active(name: str, db: Session) -> bool:
+    """租约（或时效标记）是否存在且未到期"""
+    until = db.execute(select(JobLease.locked_until).where(JobLease.name == name)).scalar()
+    return until is not None and until > datetime.utcnow()
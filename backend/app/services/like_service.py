@@ -0,0 +1,341 @@
+# backend/app/services/like_service.py
+"""
+评论点赞
+点赞记录表（comment_id, user_id 主键）负责去重，是点赞数的准确来源；
+Comment.like_count 是读路径使用的缓存计数，不在点赞请求中更新：
+点赞/取消只写入或删除记录表中该用户自己的一行，计数增量在内存中按评论合并，
+定时批量写回（每条评论每个刷写周期一条 col = col + delta），热门评论不会因逐次UPDATE形成行锁争用。
+
+读路径得到的是最终一致的计数：未刷写的增量最多延迟一个刷写周期；进程崩溃时未刷写的增量丢失，
+由定时对账从记录表重新计数修正。多进程部署时每个进程各自缓冲，增量可直接叠加。
+
+对账与缓冲的增量并存：记录表中已提交的点赞，其增量可能还在某个进程的缓冲中，
+直接按记录表重新计数，增量写回后会重复计入。因此对账只在持有租约的一个进程中执行：
+    1. 在租约表中设置直写标记；各进程的刷写任务每个周期读取标记，标记有效期间先写回缓冲，
+       此后的点赞在写入记录的同一事务中直接 col = col ± 1，不再进入缓冲；
+    2. 等待两个刷写周期，所有进程的缓冲都已写回；
+    3. 一条查询取得计数与记录表不一致的评论，按 col = col + (记录表计数 - 计数) 相对修正，
+       查询之后提交的点赞同时改变两边，不影响差值；
+    4. 清除直写标记，恢复缓冲。
+"""
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, delete, func, inspect, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.base import SessionLocal
+from ..models.comment import Comment, CommentStatus
+from ..models.comment_like import CommentLike
+from .leases import acquire_lease, hold_until, lease_active
+
+# 对账时每批写回的评论数
+RECONCILE_BATCH_SIZE = 5000
+
+# 对账租约名；租约时长为两个对账周期，持有进程每轮续约
+RECONCILE_LEASE = "like_count_reconciliation"
+
+# 直写标记名（租约表中的一行，到期时间即标记有效期）；对账进程异常退出时最多在等待之后再保持该时长
+WRITE_THROUGH_FLAG = "like_write_through"
+WRITE_THROUGH_TIMEOUT = 60
+
+
+class LikeBuffer:
+    """按评论合并的点赞数增量（线程安全）"""
+
+    def __init__(self):
+        self._deltas: Dict[int, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        # 定时刷写与关闭时的刷写互斥
+        self.flush_lock = threading.RLock()
+        # 对账期间为True：点赞直接更新计数，不进入缓冲（见模块说明）
+        self.write_through = False
+
+        # 指标
+        self.flushed_rows = 0
+        self.flushes = 0
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._deltas)
+
+    def add(self, comment_id: int, delta: int):
+        with self._lock:
+            self._deltas[comment_id] += delta
+
+    def pending(self, comment_id: int) -> int:
+        """该评论尚未写回的增量"""
+        with self._lock:
+            return self._deltas.get(comment_id, 0)
+
+    def drain(self) -> Dict[int, int]:
+        """取出全部增量（抵消为0的评论不需要写回）"""
+        with self._lock:
+            deltas, self._deltas = self._deltas, defaultdict(int)
+        return {comment_id: delta for comment_id, delta in deltas.items() if delta}
+
+    def restore(self, deltas: Dict[int, int]):
+        """写回失败时放回，下次刷写重试"""
+        with self._lock:
+            for comment_id, delta in deltas.items():
+                self._deltas[comment_id] += delta
+
+    def flush(self, db: Session) -> int:
+        """
+        批量写回增量并提交，返回写回的评论数
+        按comment_id顺序更新，多个进程同时刷写时加锁顺序一致，不会互相死锁
+        """
+        with self.flush_lock:
+            return self._flush(db)
+
+    def _flush(self, db: Session) -> int:
+        deltas = self.drain()
+        if not deltas:
+            return 0
+
+        table = Comment.__table__
+        statement = (
+            table.update()
+            .where(table.c.id == bindparam("comment_id"))
+            .values(
+                like_count=func.coalesce(table.c.like_count, 0) + bindparam("delta"),
+                updated_at=table.c.updated_at
+            )
+        )
+        params = [{"comment_id": comment_id, "delta": deltas[comment_id]} for comment_id in sorted(deltas)]
+        try:
+            for start in range(0, len(params), settings.likes_flush_batch_size):
+                db.execute(statement, params[start:start + settings.likes_flush_batch_size])
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.restore(deltas)
+            raise
+
+        self.flushes += 1
+        self.flushed_rows += len(params)
+        return len(params)
+
+    def stats(self) -> Dict:
+        return {
+            "pending_comments": self.pending_count,
+            "write_through": self.write_through,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows
+        }
+
+
+like_buffer = LikeBuffer()
+
+
+def _insert_like(comment_id: int, user_id: int, db: Session) -> bool:
+    """写入点赞记录，返回False表示该用户已点过赞"""
+    values = {"comment_id": comment_id, "user_id": user_id, "created_at": datetime.utcnow()}
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        result = db.execute(dialect_insert(CommentLike).values(values).on_conflict_do_nothing())
+        return result.rowcount == 1
+
+    try:
+        with db.begin_nested():
+            db.execute(insert(CommentLike).values(values))
+        return True
+    except IntegrityError:
+        return False
+
+
+def _apply_delta(comment_id: int, delta: int, db: Session):
+    """直写计数（对账期间），不提交事务，与点赞记录一起提交"""
+    table = Comment.__table__
+    db.execute(
+        table.update()
+        .where(table.c.id == comment_id)
+        .values(like_count=func.coalesce(table.c.like_count, 0) + delta, updated_at=table.c.updated_at)
+    )
+
+
+def _record_delta(comment_id: int, delta: int, db: Session) -> int:
+    """
+    提交点赞记录并计入增量：直写期间与记录同一事务更新计数，否则提交后进入缓冲
+    返回已直写的增量
+    """
+    if like_buffer.write_through:
+        _apply_delta(comment_id, delta, db)
+        db.commit()
+        return delta
+    db.commit()
+    like_buffer.add(comment_id, delta)
+    return 0
+
+
+def _like_result(comment, changed: bool, liked: bool, applied: int = 0) -> Dict:
+    return {
+        "success": True,
+        "comment_id": comment.id,
+        "liked": liked,
+        "changed": changed,
+        # 查询时的计数加上本次直写的增量与本进程未写回的增量
+        "like_count": (comment.like_count or 0) + applied + like_buffer.pending(comment.id)
+    }
+
+
+def like_comment(comment_id: int, user_id: int, db: Session) -> Dict:
+    """点赞（重复点赞不计数）"""
+    comment = db.execute(
+        select(Comment.id, Comment.status, Comment.like_count).where(Comment.id == comment_id)
+    ).first()
+    if comment is None:
+        return {"success": False, "error": "评论不存在", "code": "NOT_FOUND"}
+    if comment.status != CommentStatus.APPROVED:
+        return {"success": False, "error": "只能给已通过审核的评论点赞", "code": "NOT_APPROVED"}
+
+    inserted = _insert_like(comment_id, user_id, db)
+    if not inserted:
+        db.commit()
+        return _like_result(comment, False, True)
+    return _like_result(comment, True, True, _record_delta(comment_id, 1, db))
+
+
+def unlike_comment(comment_id: int, user_id: int, db: Session) -> Dict:
+    """取消点赞（未点过赞时不计数）"""
+    comment = db.execute(
+        select(Comment.id, Comment.like_count).where(Comment.id == comment_id)
+    ).first()
+    if comment is None:
+        return {"success": False, "error": "评论不存在", "code": "NOT_FOUND"}
+
+    result = db.execute(
+        delete(CommentLike)
+        .where(CommentLike.comment_id == comment_id, CommentLike.user_id == user_id)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.commit()
+        return _like_result(comment, False, False)
+    return _like_result(comment, True, False, _record_delta(comment_id, -1, db))
+
+
+def liked_comment_ids(user_id: int, comment_ids: List[int], db: Session) -> set:
+    """列表中当前用户已点赞的评论（一次查询）"""
+    if not comment_ids:
+        return set()
+    return set(db.execute(
+        select(CommentLike.comment_id).where(
+            CommentLike.user_id == user_id, CommentLike.comment_id.in_(comment_ids)
+        )
+    ).scalars())
+
+
+def delete_likes(comment_ids: List[int], db: Session):
+    """删除评论前删除其点赞记录（外键约束），不提交事务"""
+    if not comment_ids or not inspect(db.connection()).has_table(CommentLike.__tablename__):
+        return
+    db.execute(
+        delete(CommentLike)
+        .where(CommentLike.comment_id.in_(comment_ids))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def flush_like_counts() -> int:
+    """
+    使用独立会话写回本进程缓冲的增量（供刷写任务每个周期调用）
+    先读取直写标记：标记有效时本进程此后的点赞直接更新计数，缓冲在本次写回后保持为空
+    """
+    db = SessionLocal()
+    try:
+        like_buffer.write_through = lease_active(WRITE_THROUGH_FLAG, db)
+        return like_buffer.flush(db)
+    finally:
+        db.close()
+
+
+def _like_totals(db: Session):
+    """计数与记录表不一致的评论：(评论id, 计数, 记录表计数)"""
+    likes = select(
+        CommentLike.comment_id,
+        func.count().label("total")
+    ).group_by(CommentLike.comment_id).subquery()
+
+    actual = func.coalesce(likes.c.total, 0)
+    return db.execute(
+        select(Comment.id, Comment.like_count, actual.label("actual"))
+        .outerjoin(likes, likes.c.comment_id == Comment.id)
+        .where(func.coalesce(Comment.like_count, -1) != actual)
+    )
+
+
+def reconcile_like_counts(db: Session, settle_seconds: Optional[float] = None) -> Dict:
+    """
+    点赞数对账（见模块说明）
+    设置直写标记后等待settle_seconds（默认两个刷写周期加1秒），各进程缓冲写回后
+    一次分组查询从记录表重新计数，只对存在偏差的评论按主键批量相对修正。
+    没有其他进程写入时（如生成测试数据）可传0
+    """
+    if settle_seconds is None:
+        settle_seconds = settings.likes_flush_interval_seconds * 2 + 1
+
+    hold_until(
+        WRITE_THROUGH_FLAG,
+        datetime.utcnow() + timedelta(seconds=settle_seconds + WRITE_THROUGH_TIMEOUT),
+        db
+    )
+    like_buffer.write_through = True
+    try:
+        time.sleep(settle_seconds)
+        like_buffer.flush(db)
+
+        corrections = [
+            {"comment_id": row.id, "delta": row.actual - (row.like_count or 0)}
+            for row in _like_totals(db)
+        ]
+        table = Comment.__table__
+        statement = (
+            table.update()
+            .where(table.c.id == bindparam("comment_id"))
+            .values(
+                like_count=func.coalesce(table.c.like_count, 0) + bindparam("delta"),
+                updated_at=table.c.updated_at
+            )
+        )
+        for start in range(0, len(corrections), RECONCILE_BATCH_SIZE):
+            db.execute(statement, corrections[start:start + RECONCILE_BATCH_SIZE])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        hold_until(WRITE_THROUGH_FLAG, datetime.utcnow(), db)
+        like_buffer.write_through = False
+
+    total_likes = db.execute(select(func.count()).select_from(CommentLike)).scalar()
+    total_counted = db.execute(select(func.coalesce(func.sum(Comment.like_count), 0))).scalar()
+    return {
+        "corrected_comments": len(corrections),
+        "drift": sum(item["delta"] for item in corrections),  # 修正的总偏差（正数表示计数偏少）
+        "total_likes": total_likes,
+        "consistent": total_likes == total_counted
+    }
+
+
+def run_like_reconciliation() -> Dict:
+    """使用独立会话执行对账（供定时任务调用），未取得租约时跳过"""
+    db = SessionLocal()
+    try:
+        if not acquire_lease(RECONCILE_LEASE, settings.stats_reconcile_interval_seconds * 2, db):
+            return {"skipped": True}
+        return reconcile_like_counts(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
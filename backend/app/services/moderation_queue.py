@@ -0,0 +1,351 @@
+# backend/app/services/moderation_queue.py
+"""
+评论审核队列
+评论提交时只保存为待审核（PENDING）并写入一条审核任务，接口立即返回；
+worker批量认领任务，一次性完成质量与相似度评分，再写回状态、reviewed_at和用户统计。
+
+认领语义：单条 UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED) 将任务标记为运行中，
+写入本次认领令牌与租约到期时间。PostgreSQL下多个worker互不阻塞；SQLite不支持行锁，
+写事务串行执行，同样不会重复认领。worker崩溃后租约到期的任务会被重新认领，
+超过最大尝试次数标记为失败，评论保持待审核交由人工处理。
+
+命令行（独立worker进程，在backend目录下）：
+    python -m app.services.moderation_queue --processes 4
+    python -m app.services.moderation_queue --drain   # 处理完当前队列后退出
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, bindparam, delete, func, inspect, or_, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..events import publish, COMMENT_MODERATED
+from ..metrics import stage_timer
+from ..models.base import SessionLocal, ensure_schema
+from ..models.comment import Comment, CommentStatus
+from ..models.moderation_job import ModerationJob, JobStatus
+from .comment_service import CommentService, comment_stats_cache
+
+
+def enqueue(comment_id: int, db: Session) -> ModerationJob:
+    """写入审核任务，不提交事务，由调用方与评论一起提交"""
+    job = ModerationJob(comment_id=comment_id, status=JobStatus.QUEUED, attempts=0)
+    db.add(job)
+    return job
+
+
+def delete_jobs(comment_ids: List[int], db: Session):
+    """删除评论前删除其审核任务（外键约束）；从未启用队列时任务表不存在，跳过"""
+    if not comment_ids or not inspect(db.connection()).has_table(ModerationJob.__tablename__):
+        return
+    db.execute(
+        delete(ModerationJob)
+        .where(ModerationJob.comment_id.in_(comment_ids))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _claimable(now: datetime):
+    return or_(
+        ModerationJob.status == JobStatus.QUEUED,
+        and_(ModerationJob.status == JobStatus.RUNNING, ModerationJob.locked_until < now)
+    )
+
+
+def claim_jobs(db: Session, worker_id: str, limit: int, lease_seconds: int) -> List[Row]:
+    """
+    认领最多limit个任务并提交
+    返回 (id, comment_id, attempts, locked_by) 行，locked_by即本次认领令牌
+    """
+    now = datetime.utcnow()
+    token = f"{worker_id}:{uuid.uuid4().hex[:12]}"
+
+    candidates = (
+        select(ModerationJob.id)
+        .where(_claimable(now))
+        .order_by(ModerationJob.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    db.execute(
+        update(ModerationJob)
+        .where(ModerationJob.id.in_(candidates), _claimable(now))
+        .values(
+            status=JobStatus.RUNNING,
+            locked_by=token,
+            locked_until=now + timedelta(seconds=lease_seconds),
+            attempts=func.coalesce(ModerationJob.attempts, 0) + 1,
+            updated_at=now
+        )
+        .execution_options(synchronize_session=False)
+    )
+    claimed = db.execute(
+        select(ModerationJob.id, ModerationJob.comment_id, ModerationJob.attempts, ModerationJob.locked_by)
+        .where(ModerationJob.locked_by == token)
+        .order_by(ModerationJob.id)
+    ).all()
+    db.commit()
+    return claimed
+
+
+class ModerationWorker:
+    """
+    审核任务消费者
+    run_once处理一批；run_forever循环处理，队列为空时按间隔轮询
+    """
+
+    def __init__(self, worker_id: Optional[str] = None, batch_size: Optional[int] = None,
+                 lease_seconds: Optional[int] = None, max_attempts: Optional[int] = None):
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = batch_size or settings.moderation_batch_size
+        self.lease_seconds = lease_seconds or settings.moderation_lease_seconds
+        self.max_attempts = max_attempts or settings.moderation_max_attempts
+        self.comment_service = CommentService()
+        self.processed = 0
+        self.failed = 0
+
+    def run_once(self) -> int:
+        """认领并处理一批任务，返回处理的任务数（0表示队列为空）"""
+        db = SessionLocal()
+        try:
+            jobs = claim_jobs(db, self.worker_id, self.batch_size, self.lease_seconds)
+            if not jobs:
+                return 0
+            try:
+                self._process(db, jobs)
+            except Exception as e:
+                db.rollback()
+                self._release(db, jobs, e)
+                raise
+            return len(jobs)
+        finally:
+            db.close()
+
+    def run_forever(self, stop_event: Optional[threading.Event] = None, poll_interval: Optional[float] = None):
+        poll_interval = poll_interval or settings.moderation_poll_interval_seconds
+        while stop_event is None or not stop_event.is_set():
+            try:
+                processed = self.run_once()
+            except Exception as e:
+                print(f"❌ 审核任务处理失败: {e}")
+                processed = 0
+            if not processed:
+                time.sleep(poll_interval)
+
+    def drain(self) -> int:
+        """处理到队列为空（租约未到期的运行中任务除外）"""
+        total = 0
+        while True:
+            processed = self.run_once()
+            if not processed:
+                return total
+            total += processed
+
+    def _process(self, db: Session, jobs: List[Row]):
+        token = jobs[0].locked_by
+        comment_ids = [job.comment_id for job in jobs]
+        comments = {
+            row.id: row for row in db.execute(
+                select(Comment.id, Comment.user_id, Comment.video_id, Comment.content, Comment.status)
+                .where(Comment.id.in_(comment_ids))
+            )
+        }
+
+        # 评论已被删除或已人工审核的任务直接完成
+        to_score = [
+            comments[cid] for cid in comment_ids
+            if cid in comments and comments[cid].status == CommentStatus.PENDING
+        ]
+
+        service = self.comment_service
+        with stage_timer("moderation", "quality"):
+            quality_results = service.quality_checker.batch_analyze_texts(
+                [row.content for row in to_score], "comment"
+            )
+        with stage_timer("moderation", "similarity"):
+            similarity_results = service.similarity_detector.batch_check_originality(
+                [(row.id, row.content, row.video_id) for row in to_score], db
+            )
+
+        # 写回前确认任务仍归本worker所有（租约未被其他worker接管）
+        owned = set(db.execute(
+            select(ModerationJob.comment_id).where(
+                ModerationJob.locked_by == token,
+                ModerationJob.status == JobStatus.RUNNING
+            )
+        ).scalars())
+
+        now = datetime.utcnow()
+        comment_updates = []
+        decisions: Dict[int, str] = {}
+        approved = []
+        for row, quality_result in zip(to_score, quality_results):
+            if row.id not in owned:
+                continue
+            similarity_result = similarity_results[row.id]
+            approval = service._determine_approval_status(quality_result, similarity_result)
+            decisions[row.id] = approval["status"]
+            comment_updates.append({
+                "id": row.id,
+                "quality_passed": quality_result["quality_passed"],
+                "quality_issues": "; ".join(quality_result["issues"]) if quality_result["issues"] else None,
+                "similarity_score": similarity_result["similarity_score"],
+                "original_score": similarity_result["originality_score"],
+                "status": CommentStatus(approval["status"]),
+                "reject_reason": approval["reason"] if approval["status"] == "rejected" else None,
+                # 需人工审核的评论由人工审核时记录审核时间
+                "reviewed_at": now if approval["auto_decision"] else None,
+                "updated_at": now
+            })
+            if approval["status"] == "approved":
+                approved.append((row.user_id, similarity_result["originality_score"]))
+
+        job_updates = []
+        for job in jobs:
+            if job.comment_id not in owned:
+                continue
+            comment = comments.get(job.comment_id)
+            decision = decisions.get(job.comment_id) or (comment.status.value if comment else None)
+            job_updates.append({
+                "id": job.id,
+                "status": JobStatus.DONE,
+                "decision": decision,
+                "last_error": None if comment else "评论不存在",
+                "locked_by": None,
+                "locked_until": None,
+                "finished_at": now,
+                "updated_at": now
+            })
+
+        with stage_timer("moderation", "db_commit"):
+            if comment_updates:
+                db.execute(update(Comment), comment_updates)
+            # 按评论id顺序累加原创度指数加权平均，与逐条创建时的顺序一致
+            for user_id, originality_score in approved:
+                service.similarity_detector.update_user_originality_score(user_id, originality_score, db)
+            if job_updates:
+                db.execute(update(ModerationJob), job_updates)
+            db.commit()
+
+        user_ids = {row.id: row.user_id for row in to_score}
+        for values in comment_updates:
+            comment_stats_cache.invalidate(user_ids[values["id"]])
+            publish(user_ids[values["id"]], COMMENT_MODERATED, {
+                "comment_id": values["id"],
+                "status": values["status"].value,
+                "similarity_score": values["similarity_score"],
+                "original_score": values["original_score"],
+                "quality_passed": values["quality_passed"],
+                "reject_reason": values["reject_reason"]
+            })
+        self.processed += len(job_updates)
+
+    def _release(self, db: Session, jobs: List[Row], error: Exception):
+        """处理失败：未超过最大尝试次数的任务放回队列，否则标记失败（只释放仍归本worker所有的任务）"""
+        now = datetime.utcnow()
+        table = ModerationJob.__table__
+        params = []
+        for job in jobs:
+            exhausted = (job.attempts or 0) >= self.max_attempts
+            params.append({
+                "job_id": job.id,
+                "token": job.locked_by,
+                "status": JobStatus.FAILED if exhausted else JobStatus.QUEUED,
+                "finished_at": now if exhausted else None
+            })
+            if exhausted:
+                self.failed += 1
+
+        db.execute(
+            table.update()
+            .where(table.c.id == bindparam("job_id"), table.c.locked_by == bindparam("token"))
+            .values(
+                status=bindparam("status"),
+                finished_at=bindparam("finished_at"),
+                last_error=str(error)[:500],
+                locked_by=None,
+                locked_until=None,
+                updated_at=now
+            ),
+            params
+        )
+        db.commit()
+
+
+def get_moderation_status(comment_id: int, db: Session) -> Optional[Dict]:
+    """评论审核状态（评论不存在时返回None）"""
+    row = db.execute(
+        select(
+            Comment.id, Comment.status, Comment.similarity_score, Comment.original_score,
+            Comment.quality_passed, Comment.reject_reason, Comment.reviewed_at,
+            ModerationJob.status.label("job_status"), ModerationJob.attempts, ModerationJob.last_error,
+            ModerationJob.finished_at
+        )
+        .outerjoin(ModerationJob, ModerationJob.comment_id == Comment.id)
+        .where(Comment.id == comment_id)
+    ).first()
+    if row is None:
+        return None
+
+    job_status = row.job_status.value if row.job_status else None
+    return {
+        "comment_id": row.id,
+        "status": row.status.value if row.status else None,
+        # 没有任务（同步审核创建）或任务已结束
+        "finished": job_status in (None, JobStatus.DONE.value, JobStatus.FAILED.value),
+        "job_status": job_status,
+        "attempts": row.attempts,
+        "error": row.last_error,
+        "similarity_score": row.similarity_score,
+        "original_score": row.original_score,
+        "quality_passed": row.quality_passed,
+        "reject_reason": row.reject_reason,
+        "reviewed_at": row.reviewed_at,
+        "finished_at": row.finished_at
+    }
+
+
+def _worker_process(index: int, drain: bool):
+    worker = ModerationWorker(worker_id=f"{socket.gethostname()}-{os.getpid()}-{index}")
+    if drain:
+        print(f"✅ worker {index} 处理 {worker.drain()} 个任务")
+    else:
+        worker.run_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="评论审核队列worker")
+    parser.add_argument("--processes", type=int, default=1, help="worker进程数")
+    parser.add_argument("--drain", action="store_true", help="处理完当前队列后退出")
+    args = parser.parse_args()
+
+    ensure_schema()  # 已有数据库补齐任务表与comments.video_id等新增结构
+    if args.processes <= 1:
+        _worker_process(0, args.drain)
+        return
+
+    processes = [
+        multiprocessing.Process(target=_worker_process, args=(index, args.drain))
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
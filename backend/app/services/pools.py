@@ -0,0 +1,131 @@
+# backend/app/services/pools.py
+import asyncio
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from ..config import settings
+
+
+class PoolSaturatedError(RuntimeError):
+    """线程池排队已满"""
+
+
+class BoundedExecutor:
+    """
+    有界线程池
+    将CPU密集的同步调用移出事件循环；同时执行+排队的任务数有上限，
+    超过上限立即拒绝，避免突发流量无限堆积。记录排队深度与等待时间指标
+    """
+
+    # 所有线程池实例，供指标导出
+    instances: "weakref.WeakSet" = weakref.WeakSet()
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+        # 指标
+        self.pending = 0  # 已提交未完成（排队+执行中）
+        self.running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        BoundedExecutor.instances.add(self)
+
+    @property
+    def queue_depth(self) -> int:
+        """排队中（尚未开始执行）的任务数"""
+        return max(0, self.pending - self.running)
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """在线程池中执行同步函数并等待结果"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturatedError(f"{self.name} 线程池已满")
+
+        enqueued_at = time.perf_counter()
+        with self._lock:
+            self.submitted += 1
+            self.pending += 1
+
+        def task():
+            waited = time.perf_counter() - enqueued_at
+            with self._lock:
+                self.running += 1
+                self.total_wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.running -= 1
+
+        try:
+            result = await asyncio.wrap_future(self._executor.submit(task))
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        else:
+            with self._lock:
+                self.completed += 1
+        finally:
+            with self._lock:
+                self.pending -= 1
+            self._slots.release()
+
+        return result
+
+    @property
+    def available(self) -> bool:
+        """是否还能接收新任务"""
+        return not self._shutdown and self.pending < self.max_workers + self.max_queue
+
+    def stats(self) -> Dict:
+        """线程池指标"""
+        with self._lock:
+            started = self.submitted - self.queue_depth
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self.running,
+                "queue_depth": self.queue_depth,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "average_wait_ms": round(self.total_wait_seconds / started * 1000, 2) if started > 0 else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 2)
+            }
+
+    def shutdown(self, wait: bool = False):
+        self._shutdown = True
+        self._executor.shutdown(wait=wait)
+
+
+# 密码哈希专用线程池（bcrypt在C实现中释放GIL，线程池即可并行）
+hashing_pool = BoundedExecutor(
+    "password-hashing",
+    max_workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_queue_size
+)
+
+# 评分线程池（分词、TF-IDF、质量检测及启动预热）
+scoring_pool = BoundedExecutor(
+    "scoring",
+    max_workers=settings.scoring_workers,
+    max_queue=settings.scoring_queue_size
+)
@@ -1,6 +1,5 @@
 # backend/app/services/quality_checker.py
 import re
-import jieba
 from typing import Dict, List, Tuple
 from ..config import settings
 
@@ -59,7 +58,8 @@ class QualityChecker:
         word_count = len(text)
         sentence_count = len(re.split(r'[。！？\n]', text))
 
-        # 分词分析
+        # 分词分析（jieba延迟导入，由启动预热阶段提前加载词典）
+        import jieba
         words = jieba.lcut(text)
         unique_words = set(words)
 
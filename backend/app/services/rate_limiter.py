@@ -0,0 +1,169 @@
+# backend/app/services/rate_limiter.py
+import math
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from ..config import settings
+
+
+class RateLimitDecision(NamedTuple):
+    allowed: bool
+    retry_after: int = 0  # 被拒绝时建议等待的秒数
+    limited_by: Optional[str] = None  # 触发限流的维度（ip/username）
+
+
+class RateLimitBackend:
+    """
+    限流计数存储接口
+    默认使用进程内存储；多进程/多实例部署可实现该接口接入共享存储（如Redis）
+    """
+
+    def check(self, key: str, limit: int, window_seconds: int, now: float) -> Tuple[bool, float]:
+        """
+        检查是否超限（不计数）
+        返回：(是否放行, 被拒绝时需要等待的秒数)
+        """
+        raise NotImplementedError
+
+    def add(self, key: str, window_seconds: int, now: float):
+        """计入一次尝试"""
+        raise NotImplementedError
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    进程内滑动窗口计数
+    每个键只保存当前窗口与上一窗口的计数，估算值 = 上一窗口计数 × 未过去的比例 + 当前窗口计数
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._windows: Dict[str, list] = {}  # key -> [窗口起点, 当前计数, 上一窗口计数]
+        self._lock = threading.Lock()
+
+    def _state(self, key: str, window_seconds: int, now: float) -> Optional[list]:
+        """滚动到当前窗口后的计数状态（调用方持有锁）；键不存在时返回None"""
+        window_start = now - (now % window_seconds)
+        state = self._windows.get(key)
+        if state is not None and state[0] != window_start:
+            # 滚动窗口：只相差一个窗口时保留上一窗口计数
+            state[2] = state[1] if window_start - state[0] == window_seconds else 0
+            state[1] = 0
+            state[0] = window_start
+        return state
+
+    def check(self, key: str, limit: int, window_seconds: int, now: float) -> Tuple[bool, float]:
+        with self._lock:
+            state = self._state(key, window_seconds, now)
+            if state is None:
+                return True, 0.0
+
+            elapsed_ratio = (now - state[0]) / window_seconds
+            estimated = state[2] * (1 - elapsed_ratio) + state[1]
+            if estimated >= limit:
+                return False, window_seconds - (now - state[0])
+            return True, 0.0
+
+    def add(self, key: str, window_seconds: int, now: float):
+        with self._lock:
+            state = self._state(key, window_seconds, now)
+            if state is None:
+                if len(self._windows) >= self.max_keys:
+                    self._evict(now, window_seconds)
+                state = [now - (now % window_seconds), 0, 0]
+                self._windows[key] = state
+            state[1] += 1
+
+    def _evict(self, now: float, window_seconds: int):
+        """淘汰已完全过期的键，仍然超限时清空最早的一半"""
+        expired = [key for key, state in self._windows.items() if now - state[0] >= 2 * window_seconds]
+        for key in expired:
+            del self._windows[key]
+
+        if len(self._windows) >= self.max_keys:
+            oldest = sorted(self._windows.items(), key=lambda item: item[1][0])[:self.max_keys // 2]
+            for key, _ in oldest:
+                del self._windows[key]
+
+
+class AuthRateLimiter:
+    """
+    登录/注册限流
+    按IP和用户名两个维度限流，在任何哈希计算和数据库查询之前拒绝。
+    IP维度计入每次放行的尝试；用户名维度只计入密码验证失败（record_login_failure），
+    成功的登录不占用该用户的额度。
+    先检查全部维度，全部放行后才计数，被拒绝的尝试不占用任何维度的额度
+    """
+
+    def __init__(self, backend: Optional[RateLimitBackend] = None):
+        self.backend = backend or InMemoryRateLimitBackend()
+        self.enabled = settings.auth_rate_limit_enabled
+        self._lock = threading.Lock()
+        self.admitted: Dict[str, int] = {"login": 0, "register": 0}
+        self.rejected: Dict[str, int] = {"login": 0, "register": 0}
+
+    def set_backend(self, backend: RateLimitBackend):
+        """替换存储后端（例如接入共享存储）"""
+        self.backend = backend
+
+    def check_login(self, username: Optional[str], client_ip: Optional[str]) -> RateLimitDecision:
+        """登录尝试限流"""
+        rules = []
+        if client_ip:
+            rules.append(("ip", f"login:ip:{client_ip}", settings.login_rate_limit_per_ip, True))
+        if username:
+            rules.append(("username", self._username_key(username), settings.login_rate_limit_per_username, False))
+        return self._check("login", rules, settings.login_rate_limit_window_seconds)
+
+    def record_login_failure(self, username: Optional[str]):
+        """密码验证失败（含用户不存在）时计入用户名维度"""
+        if self.enabled and username:
+            self.backend.add(self._username_key(username), settings.login_rate_limit_window_seconds, time.time())
+
+    @staticmethod
+    def _username_key(username: str) -> str:
+        return f"login:user:{username.lower()}"
+
+    def check_registration(self, client_ip: Optional[str]) -> RateLimitDecision:
+        """注册尝试限流"""
+        rules = []
+        if client_ip:
+            rules.append(("ip", f"register:ip:{client_ip}", settings.register_rate_limit_per_ip, True))
+        return self._check("register", rules, settings.register_rate_limit_window_seconds)
+
+    def _check(self, action: str, rules: list, window_seconds: int) -> RateLimitDecision:
+        """rules: (维度, 键, 上限, 放行时是否计数)"""
+        if not self.enabled:
+            return RateLimitDecision(allowed=True)
+
+        now = time.time()
+        for dimension, key, limit, _ in rules:
+            allowed, retry_after = self.backend.check(key, limit, window_seconds, now)
+            if not allowed:
+                with self._lock:
+                    self.rejected[action] += 1
+                return RateLimitDecision(
+                    allowed=False,
+                    retry_after=max(1, math.ceil(retry_after)),
+                    limited_by=dimension
+                )
+
+        for _, key, _, counted in rules:
+            if counted:
+                self.backend.add(key, window_seconds, now)
+        with self._lock:
+            self.admitted[action] += 1
+        return RateLimitDecision(allowed=True)
+
+    def stats(self) -> Dict:
+        """放行/拒绝计数"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "admitted": dict(self.admitted),
+                "rejected": dict(self.rejected)
+            }
+
+
+auth_rate_limiter = AuthRateLimiter()
@@ -1,14 +1,22 @@
 # backend/app/services/reflection_service.py
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer_group
+from sqlalchemy import func, case, select
 from typing import Dict, List, Optional
 from datetime import datetime
 
 from ..models.reflection import Reflection
 from ..models.video import Video
-from ..models.user import User
 from ..models.user_progress import UserProgress
+from ..models.projections import reflection_summaries
 from .quality_checker import QualityChecker
+from .user_stats import increment_user_stats
+from .cache import TTLCache
 from ..config import settings
+from ..events import publish, REFLECTION_MODERATED
+
+# 观后感统计缓存，观后感写入时失效
+reflection_stats_cache = TTLCache("reflection_stats", settings.stats_cache_ttl_seconds)
+REFLECTION_STATS_KEY = "overview"
 
 class ReflectionService:
     """
@@ -93,14 +101,14 @@ class ReflectionService:
         if not approval_result["approved"]:
             new_reflection.feedback = approval_result["feedback"]
 
-        # 8. 保存到数据库
+        # 8. 保存到数据库（用户统计在同一事务内原子更新）
         db.add(new_reflection)
-        db.commit()
-        db.refresh(new_reflection)
-
-        # 9. 更新用户统计
         if approval_result["approved"]:
             self._update_user_stats(user_id, db)
+        db.commit()
+        db.refresh(new_reflection)
+        reflection_stats_cache.invalidate(REFLECTION_STATS_KEY)
+        self._publish_result(new_reflection)
 
         return {
             "success": True,
@@ -172,12 +180,19 @@ class ReflectionService:
             "auto_decision": False
         }
 
-    def _update_user_stats(self, user_id: int, db: Session):
-        """更新用户统计信息"""
-        user = db.query(User).filter(User.id == user_id).first()
-        if user:
-            user.reflections_written += 1
-            db.commit()
+    def _publish_result(self, reflection: Reflection):
+        """向作者推送审核结果（提交后调用）"""
+        publish(reflection.user_id, REFLECTION_MODERATED, lambda: {
+            "reflection_id": reflection.id,
+            "video_id": reflection.video_id,
+            "is_approved": reflection.is_approved,
+            "quality_score": reflection.quality_score,
+            "feedback": reflection.feedback
+        })
+
+    def _update_user_stats(self, user_id: int, db: Session, delta: int = 1):
+        """更新用户统计信息（SQL端原子自增，由调用方提交）"""
+        increment_user_stats(user_id, db, reflections_written=delta)
 
     def update_reflection(self, reflection_id: int, new_content: str, db: Session) -> Dict:
         """
@@ -224,6 +239,8 @@ class ReflectionService:
 
         db.commit()
         db.refresh(reflection)
+        reflection_stats_cache.invalidate(REFLECTION_STATS_KEY)
+        self._publish_result(reflection)
 
         return {
             "success": True,
@@ -232,60 +249,85 @@ class ReflectionService:
             "approval_result": approval_result
         }
 
+    def get_reflection_detail(self, reflection_id: int, db: Session) -> Optional[Reflection]:
+        """获取观后感详情（加载全文）"""
+        return db.query(Reflection).options(undefer_group("text")).filter(
+            Reflection.id == reflection_id
+        ).first()
+
     def get_user_reflections(self, user_id: int, db: Session) -> List[Reflection]:
-        """获取用户的所有观后感"""
-        return db.query(Reflection).filter(
+        """获取用户的所有观后感（加载全文）"""
+        return db.query(Reflection).options(undefer_group("text")).filter(
+            Reflection.user_id == user_id
+        ).order_by(Reflection.created_at.desc()).all()
+
+    def get_user_reflection_summaries(self, user_id: int, db: Session) -> List:
+        """获取用户的所有观后感（摘要行，不含全文）"""
+        return reflection_summaries(db, with_preview=True).filter(
             Reflection.user_id == user_id
         ).order_by(Reflection.created_at.desc()).all()
 
     def get_video_reflections(self, video_id: int, db: Session, approved_only: bool = True) -> List[Dict]:
-        """获取视频的所有观后感"""
-        query = db.query(Reflection).filter(Reflection.video_id == video_id)
+        """获取视频的所有观后感（摘要行，作者信息通过JOIN一次取回）"""
+        query = reflection_summaries(db, with_preview=True, with_username=True).filter(
+            Reflection.video_id == video_id
+        )
 
         if approved_only:
             query = query.filter(Reflection.is_approved == True)
 
-        reflections = query.order_by(Reflection.created_at.desc()).all()
+        rows = query.order_by(Reflection.created_at.desc()).all()
 
-        # 添加用户信息
         result = []
-        for reflection in reflections:
-            user = db.query(User).filter(User.id == reflection.user_id).first()
+        for row in rows:
+            reflection = row._asdict()
+            username = reflection.pop("username")
             result.append({
                 "reflection": reflection,
                 "user": {
-                    "id": user.id,
-                    "username": user.username
-                } if user else None
+                    "id": row.user_id,
+                    "username": username
+                } if username is not None else None
             })
 
         return result
 
     def get_reflection_stats(self, db: Session) -> Dict:
-        """获取观后感统计信息"""
-        total_reflections = db.query(Reflection).count()
-        approved_reflections = db.query(Reflection).filter(Reflection.is_approved == True).count()
-
-        # 平均质量分数
-        avg_quality = db.query(Reflection.quality_score).all()
-        avg_score = sum(score[0] for score in avg_quality) / len(avg_quality) if avg_quality else 0
-
-        # 各种质量指标统计
-        has_thought_count = db.query(Reflection).filter(Reflection.has_thought_words == True).count()
-        has_examples_count = db.query(Reflection).filter(Reflection.has_specific_examples == True).count()
-        has_questions_count = db.query(Reflection).filter(Reflection.has_questions == True).count()
-
-        return {
+        """
+        获取观后感统计信息
+        单条聚合语句完成计数与平均分计算，结果缓存至下一次写入
+        """
+        cached = reflection_stats_cache.get(REFLECTION_STATS_KEY)
+        if cached is not None:
+            return cached
+
+        row = db.execute(
+            select(
+                func.count(Reflection.id).label("total"),
+                func.sum(case((Reflection.is_approved == True, 1), else_=0)).label("approved"),
+                func.avg(Reflection.quality_score).label("avg_quality"),
+                func.sum(case((Reflection.has_thought_words == True, 1), else_=0)).label("has_thought"),
+                func.sum(case((Reflection.has_specific_examples == True, 1), else_=0)).label("has_examples"),
+                func.sum(case((Reflection.has_questions == True, 1), else_=0)).label("has_questions")
+            )
+        ).one()
+
+        total_reflections = row.total or 0
+        approved_reflections = row.approved or 0
+
+        stats = {
             "total_reflections": total_reflections,
             "approved_reflections": approved_reflections,
             "approval_rate": (approved_reflections / total_reflections * 100) if total_reflections > 0 else 0,
-            "average_quality_score": round(avg_score, 2),
+            "average_quality_score": round(row.avg_quality or 0, 2),
             "quality_indicators": {
-                "has_thought_words": has_thought_count,
-                "has_specific_examples": has_examples_count,
-                "has_questions": has_questions_count
+                "has_thought_words": row.has_thought or 0,
+                "has_specific_examples": row.has_examples or 0,
+                "has_questions": row.has_questions or 0
             }
         }
+        reflection_stats_cache.set(REFLECTION_STATS_KEY, stats)
+        return stats
 
     def manual_review_reflection(self, reflection_id: int, approved: bool,
                                  reviewer_feedback: str, db: Session) -> Dict:
@@ -299,16 +341,22 @@ class ReflectionService:
                 "error": "观后感不存在"
             }
 
+        was_approved = bool(reflection.is_approved)
+
         # 更新审核状态
         reflection.is_approved = approved
         reflection.feedback = reviewer_feedback
         reflection.reviewed_at = datetime.utcnow()
 
-        # 如果通过审核，更新用户统计
-        if approved and not reflection.is_approved:  # 之前未通过，现在通过
+        # 审核结论变化时同步用户统计
+        if approved and not was_approved:  # 之前未通过，现在通过
             self._update_user_stats(reflection.user_id, db)
+        elif was_approved and not approved:  # 撤销已通过的观后感
+            self._update_user_stats(reflection.user_id, db, delta=-1)
 
         db.commit()
+        reflection_stats_cache.invalidate(REFLECTION_STATS_KEY)
+        self._publish_result(reflection)
 
         return {
             "success": True,
@@ -318,26 +366,29 @@ class ReflectionService:
 
     def get_top_quality_reflections(self, db: Session, limit: int = 10) -> List[Dict]:
         """获取高质量观后感"""
-        reflections = db.query(Reflection).filter(
+        rows = reflection_summaries(
+            db, with_preview=True, with_username=True, with_video_title=True
+        ).filter(
             Reflection.is_approved == True,
             Reflection.quality_score >= 80
         ).order_by(Reflection.quality_score.desc()).limit(limit).all()
 
         result = []
-        for reflection in reflections:
-            user = db.query(User).filter(User.id == reflection.user_id).first()
-            video = db.query(Video).filter(Video.id == reflection.video_id).first()
+        for row in rows:
+            reflection = row._asdict()
+            username = reflection.pop("username")
+            video_title = reflection.pop("video_title")
 
             result.append({
                 "reflection": reflection,
                 "user": {
-                    "id": user.id,
-                    "username": user.username
-                } if user else None,
+                    "id": row.user_id,
+                    "username": username
+                } if username is not None else None,
                 "video": {
-                    "id": video.id,
-                    "title": video.title
-                } if video else None
+                    "id": row.video_id,
+                    "title": video_title
+                } if video_title is not None else None
             })
 
         return result
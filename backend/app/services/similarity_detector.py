@@ -1,14 +1,106 @@
 # backend/app/services/similarity_detector.py
-import jieba
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Tuple, Dict, Optional
+# jieba / numpy / scikit-learn 导入开销大，均在使用处延迟导入，由启动预热阶段提前加载
 import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Tuple, Dict, Optional
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
+from sqlalchemy import update, case, func
 from ..models.comment import Comment
 from ..config import settings
 
+# 原创度指数加权平均中新评论的权重
+ORIGINALITY_EMA_WEIGHT = 0.2
+
+# 从数据库补齐索引缺失文本时每批查询的数量
+INDEX_FILL_BATCH_SIZE = 500
+
+# 批量检测时每次与之相乘的语料行数，限制中间矩阵内存
+BATCH_CHECK_CHUNK_SIZE = 20000
+
+
+class SimilarityIndex:
+    """
+    评论相似度索引
+    缓存评论预处理（分词、去停用词）后的文本，避免每次检测都对全部历史评论重新分词。
+    启动预热时批量加载最近的评论，检测时按需从数据库补齐。
+    索引在进程内，条目按 (id, updated_at) 校验：其他进程（API worker、审核worker、导入命令行）修改评论后
+    updated_at变化，本进程读取时视为缺失并重新预处理；本进程内修改评论时直接移除对应条目
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._texts: "OrderedDict[int, Tuple[Optional[datetime], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.load_seconds = 0.0
+
+    @property
+    def size(self) -> int:
+        return len(self._texts)
+
+    def get_many(self, versions: Dict[int, Optional[datetime]]) -> Dict[int, str]:
+        """批量读取已缓存的预处理文本，versions为 评论id -> updated_at；版本不一致的条目视为缺失"""
+        found = {}
+        with self._lock:
+            for comment_id, updated_at in versions.items():
+                entry = self._texts.get(comment_id)
+                if entry is not None and entry[0] == updated_at:
+                    found[comment_id] = entry[1]
+        return found
+
+    def add(self, comment_id: int, processed_text: str, updated_at: Optional[datetime] = None):
+        with self._lock:
+            self._texts[comment_id] = (updated_at, processed_text)
+            self._texts.move_to_end(comment_id)
+            while len(self._texts) > self.max_size:
+                self._texts.popitem(last=False)
+
+    def remove(self, comment_id: int):
+        with self._lock:
+            self._texts.pop(comment_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._texts.clear()
+        self.loaded = False
+
+    def load(self, db: Session, detector: "SimilarityDetector", limit: int) -> int:
+        """预热：加载最近的评论并预处理"""
+        started = time.perf_counter()
+        rows = db.query(Comment.id, Comment.content, Comment.updated_at).filter(
+            Comment.content.isnot(None)
+        ).order_by(Comment.id.desc()).limit(limit).execution_options(yield_per=1000)
+
+        count = 0
+        for row in rows:
+            self.add(row.id, detector.preprocess_text(row.content), row.updated_at)
+            count += 1
+
+        self.loaded = True
+        self.load_seconds = time.perf_counter() - started
+        return count
+
+    def stats(self) -> Dict:
+        return {
+            "loaded": self.loaded,
+            "size": self.size,
+            "max_size": self.max_size,
+            "load_seconds": round(self.load_seconds, 3)
+        }
+
+
+similarity_index = SimilarityIndex(settings.similarity_index_max_size)
+
+
+def partition_filter(video_id: Optional[int]):
+    """相似度分区条件：同一视频；video_id为空的全站评论自成一个分区"""
+    return Comment.video_id == video_id if video_id is not None else Comment.video_id.is_(None)
+
+
 class SimilarityDetector:
     """
     相似度检测服务
@@ -16,14 +108,19 @@ class SimilarityDetector:
     """
 
     def __init__(self):
-        self.vectorizer = TfidfVectorizer(
+        self.chinese_stopwords = self._load_chinese_stopwords()
+
+    def _new_vectorizer(self):
+        """每次计算使用独立的向量化器，保证多线程评分时互不干扰"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        return TfidfVectorizer(
             max_features=1000,          # 最大特征数
             stop_words=None,            # 中文停用词需要自定义
             ngram_range=(1, 2),         # 1-2gram特征
             min_df=1,                   # 最小文档频率
             max_df=0.8                  # 最大文档频率
         )
-        self.chinese_stopwords = self._load_chinese_stopwords()
 
     def _load_chinese_stopwords(self) -> set:
         """加载中文停用词"""
@@ -51,6 +148,8 @@ class SimilarityDetector:
         # 清理特殊字符，保留中文、英文、数字和基本标点
         text = re.sub(r'[^\u4e00-\u9fa5a-zA-Z0-9，。！？、；：""''（）【】\s]', '', text)
 
+        import jieba
+
         # 中文分词
         words = jieba.lcut(text)
 
@@ -71,15 +170,18 @@ class SimilarityDetector:
             return 0.0
 
         # 预处理文本
-        processed_text1 = self.preprocess_text(text1)
-        processed_text2 = self.preprocess_text(text2)
+        return self._processed_similarity(self.preprocess_text(text1), self.preprocess_text(text2))
 
+    def _processed_similarity(self, processed_text1: str, processed_text2: str) -> float:
+        """计算两个已预处理文本的相似度"""
         if not processed_text1 or not processed_text2:
             return 0.0
 
         try:
+            from sklearn.metrics.pairwise import cosine_similarity
+
             # 计算TF-IDF向量
-            tfidf_matrix = self.vectorizer.fit_transform([processed_text1, processed_text2])
+            tfidf_matrix = self._new_vectorizer().fit_transform([processed_text1, processed_text2])
 
             # 计算余弦相似度
             similarity_matrix = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])
@@ -92,88 +194,138 @@ class SimilarityDetector:
             print(f"相似度计算错误: {e}")
             return 0.0
 
-    def find_most_similar_comment(self, new_text: str, db: Session, exclude_id: Optional[int] = None) -> Tuple[float, Optional[Comment]]:
+    def _candidate_ids(self, db: Session, video_id: Optional[int], exclude_id: Optional[int] = None,
+                       before_id: Optional[int] = None) -> Dict[int, Optional[datetime]]:
+        """
+        参与比较的评论 id -> updated_at（按id升序）：同一视频分区内的评论，开启全站层时并入全站最近的评论
+        分区查询走 (video_id, id) 索引，工作量只与该视频的评论数有关；updated_at用于校验相似度索引条目
         """
-        找到数据库中与新文本最相似的评论
-        返回：(最高相似度, 最相似的评论对象)
+        def restrict(query):
+            if exclude_id:
+                query = query.filter(Comment.id != exclude_id)
+            if before_id is not None:
+                query = query.filter(Comment.id < before_id)
+            return query
+
+        candidates = dict(restrict(
+            db.query(Comment.id, Comment.updated_at).filter(partition_filter(video_id))
+        ).order_by(Comment.id).all())
+
+        if settings.similarity_global_tier_size > 0:
+            recent = restrict(db.query(Comment.id, Comment.updated_at)).order_by(Comment.id.desc()).limit(
+                settings.similarity_global_tier_size
+            )
+            candidates.update(recent.all())
+            candidates = dict(sorted(candidates.items()))
+        return candidates
+
+    def find_most_similar_comment(self, new_text: str, db: Session, exclude_id: Optional[int] = None,
+                                  video_id: Optional[int] = None) -> Tuple[float, Optional[Row]]:
+        """
+        找到与新文本最相似的评论（同一视频分区内，见_candidate_ids）
+        只查询评论ID，预处理文本取自相似度索引，仅对索引缺失的评论读取内容
+        返回：(最高相似度, 最相似评论的 (id, content) 行)
         """
         if not new_text or len(new_text.strip()) < 10:
             return 0.0, None
 
         # 查询已有评论（排除自己）
-        query = db.query(Comment).filter(Comment.content.isnot(None))
-        if exclude_id:
-            query = query.filter(Comment.id != exclude_id)
-
-        existing_comments = query.all()
+        versions = self._candidate_ids(db, video_id, exclude_id=exclude_id)
 
-        if not existing_comments:
+        if not versions:
             return 0.0, None
 
-        max_similarity = 0.0
-        most_similar_comment = None
+        processed_texts = self._get_processed_texts(versions, db)
+        candidates = [(cid, processed_texts.get(cid, "")) for cid in versions]
+        processed_new = self.preprocess_text(new_text)
 
         # 批量计算相似度（优化性能）
-        if len(existing_comments) > 50:  # 如果评论太多，采用批量处理
-            return self._batch_similarity_check(new_text, existing_comments)
+        if len(candidates) > 50:  # 如果评论太多，采用批量处理
+            max_similarity, best_id = self._batch_similarity_check(processed_new, candidates)
+        else:
+            max_similarity, best_id = self._pairwise_similarity_check(processed_new, candidates)
+
+        if best_id is None:
+            return max_similarity, None
+
+        most_similar_comment = db.query(Comment.id, Comment.content).filter(Comment.id == best_id).first()
+        return max_similarity, most_similar_comment
+
+    def _get_processed_texts(self, versions: Dict[int, Optional[datetime]], db: Session) -> Dict[int, str]:
+        """从索引读取预处理文本，缺失或版本已过期的部分从数据库读取内容并补入索引"""
+        processed_texts = similarity_index.get_many(versions)
+        missing_ids = [cid for cid in versions if cid not in processed_texts]
+
+        for start in range(0, len(missing_ids), INDEX_FILL_BATCH_SIZE):
+            batch = missing_ids[start:start + INDEX_FILL_BATCH_SIZE]
+            rows = db.query(Comment.id, Comment.content, Comment.updated_at).filter(Comment.id.in_(batch)).all()
+            for row in rows:
+                processed = self.preprocess_text(row.content) if row.content else ""
+                similarity_index.add(row.id, processed, row.updated_at)
+                processed_texts[row.id] = processed
+
+        return processed_texts
 
-        # 逐一比较
-        for comment in existing_comments:
-            similarity = self.calculate_similarity(new_text, comment.content)
+    def _pairwise_similarity_check(self, processed_new: str,
+                                   candidates: List[Tuple[int, str]]) -> Tuple[float, Optional[int]]:
+        """逐一比较相似度，返回 (最高相似度, 评论ID)"""
+        max_similarity = 0.0
+        most_similar_id = None
+
+        for comment_id, processed_text in candidates:
+            similarity = self._processed_similarity(processed_new, processed_text)
             if similarity > max_similarity:
                 max_similarity = similarity
-                most_similar_comment = comment
+                most_similar_id = comment_id
 
-        return max_similarity, most_similar_comment
+        return max_similarity, most_similar_id
 
-    def _batch_similarity_check(self, new_text: str, comments: List[Comment]) -> Tuple[float, Optional[Comment]]:
+    def _batch_similarity_check(self, processed_new: str,
+                                candidates: List[Tuple[int, str]]) -> Tuple[float, Optional[int]]:
         """
         批量相似度检测（适用于大量评论的情况）
+        返回 (最高相似度, 评论ID)
         """
         try:
-            # 预处理所有文本
-            processed_new = self.preprocess_text(new_text)
-            processed_comments = [self.preprocess_text(comment.content) for comment in comments]
+            import numpy as np
+            from sklearn.metrics.pairwise import cosine_similarity
 
             # 过滤空文本
-            valid_pairs = [(i, text) for i, text in enumerate(processed_comments) if text]
-            if not valid_pairs:
+            valid_pairs = [(comment_id, text) for comment_id, text in candidates if text]
+            if not valid_pairs or not processed_new:
                 return 0.0, None
 
-            valid_indices = [pair[0] for pair in valid_pairs]
+            valid_ids = [pair[0] for pair in valid_pairs]
             valid_texts = [pair[1] for pair in valid_pairs]
 
             # 构建文档列表
             all_texts = [processed_new] + valid_texts
 
             # 计算TF-IDF
-            tfidf_matrix = self.vectorizer.fit_transform(all_texts)
+            tfidf_matrix = self._new_vectorizer().fit_transform(all_texts)
 
             # 计算相似度矩阵
             similarity_matrix = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:])
 
             # 找到最高相似度
             similarities = similarity_matrix[0]
-            max_idx = np.argmax(similarities)
+            max_idx = int(np.argmax(similarities))
             max_similarity = float(similarities[max_idx] * 100)
 
-            # 返回结果
-            original_idx = valid_indices[max_idx]
-            most_similar_comment = comments[original_idx]
-
-            return max_similarity, most_similar_comment
+            return max_similarity, valid_ids[max_idx]
 
         except Exception as e:
             print(f"批量相似度检测错误: {e}")
             # 降级到逐一比较
-            return self.find_most_similar_comment(new_text, None)
+            return self._pairwise_similarity_check(processed_new, candidates)
 
-    def check_comment_originality(self, text: str, db: Session, exclude_id: Optional[int] = None) -> Dict:
+    def check_comment_originality(self, text: str, db: Session, exclude_id: Optional[int] = None,
+                                  video_id: Optional[int] = None) -> Dict:
         """
         检查评论原创性
         返回检测结果和建议
         """
-        similarity_score, similar_comment = self.find_most_similar_comment(text, db, exclude_id)
+        similarity_score, similar_comment = self.find_most_similar_comment(text, db, exclude_id, video_id)
 
         # 计算原创度分数 (100 - 相似度)
         originality_score = max(0, 100 - similarity_score)
@@ -202,31 +354,117 @@ class SimilarityDetector:
             "similar_comment_content": similar_comment.content[:100] + "..." if similar_comment and len(similar_comment.content) > 100 else similar_comment.content if similar_comment else None
         }
 
-    def update_user_originality_score(self, user_id: int, new_score: float, db: Session):
+    def batch_check_originality(self, comments: List[Tuple[int, str, Optional[int]]], db: Session) -> Dict[int, Dict]:
         """
-        更新用户的原创度分数
-        采用加权平均的方式
+        批量检测已保存评论的原创性（审核队列使用），comments为 (id, 内容, video_id)
+        按视频分区分组；每条评论只与同一分区内id更小（提交时已存在）的评论比较，与逐条在线检测口径一致；
+        每个分区的语料只读取、向量化一次，不再为每条评论重新拟合TF-IDF
+        返回 comment_id -> {"similarity_score", "originality_score", "similar_comment_id"}
         """
-        from ..models.user import User
-
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            return
+        partitions: Dict[Optional[int], List[Tuple[int, str]]] = {}
+        for comment_id, text, video_id in comments:
+            partitions.setdefault(video_id, []).append((comment_id, text))
+
+        results = {}
+        for video_id, items in partitions.items():
+            results.update(self._check_partition(items, video_id, db))
+        return results
+
+    def _check_partition(self, comments: List[Tuple[int, str]], video_id: Optional[int],
+                         db: Session) -> Dict[int, Dict]:
+        """同一分区内的一组评论"""
+        max_id = max(comment_id for comment_id, _ in comments)
+        versions = self._candidate_ids(db, video_id, before_id=max_id)
+        processed_texts = self._get_processed_texts(versions, db)
+        candidates = [(cid, processed_texts.get(cid, "")) for cid in versions]
+        items = [
+            (comment_id, processed_texts[comment_id] if comment_id in processed_texts else self.preprocess_text(text))
+            for comment_id, text in comments
+        ]
 
-        # 获取用户的评论数量
-        comment_count = db.query(Comment).filter(
-            Comment.user_id == user_id,
-            Comment.status == "approved"
-        ).count()
+        scores = None
+        if len(candidates) > 50:
+            try:
+                scores = self._prefix_similarity(items, candidates)
+            except Exception as e:
+                print(f"批量相似度检测错误: {e}")
+
+        if scores is None:
+            # 语料较少或批量计算失败：逐条检测
+            scores = []
+            for comment_id, processed in items:
+                prefix = [pair for pair in candidates if pair[0] < comment_id]
+                if len(prefix) > 50:
+                    scores.append(self._batch_similarity_check(processed, prefix))
+                else:
+                    scores.append(self._pairwise_similarity_check(processed, prefix))
+
+        results = {}
+        for (comment_id, _), (similarity, similar_id) in zip(items, scores):
+            results[comment_id] = {
+                "similarity_score": round(similarity, 2),
+                "originality_score": round(max(0, 100 - similarity), 2),
+                "similar_comment_id": similar_id
+            }
+        return results
+
+    def _prefix_similarity(self, items: List[Tuple[int, str]],
+                           candidates: List[Tuple[int, str]]) -> List[Tuple[float, Optional[int]]]:
+        """
+        一次拟合后分块计算 新评论 × 语料 的余弦相似度（TF-IDF已L2归一化，点积即余弦）
+        candidates按id升序，每行只保留id小于该评论的列
+        """
+        import numpy as np
+
+        vectorizer = self._new_vectorizer()
+        matrix = vectorizer.fit_transform([text for _, text in candidates] + [text for _, text in items])
+        corpus = matrix[:len(candidates)]
+        batch = matrix[len(candidates):]
+
+        candidate_ids = np.array([cid for cid, _ in candidates])
+        limits = np.searchsorted(candidate_ids, [comment_id for comment_id, _ in items])
+        best = np.zeros(len(items))
+        best_positions = np.full(len(items), -1)
+        rows = np.arange(len(items))
+
+        for start in range(0, len(candidates), BATCH_CHECK_CHUNK_SIZE):
+            block = (batch @ corpus[start:start + BATCH_CHECK_CHUNK_SIZE].T).toarray()
+            columns = np.arange(start, start + block.shape[1])
+            block[columns[None, :] >= limits[:, None]] = 0.0
+            positions = block.argmax(axis=1)
+            maxima = block[rows, positions]
+            improved = maxima > best
+            best[improved] = maxima[improved]
+            best_positions[improved] = positions[improved] + start
+
+        return [
+            (float(min(score, 1.0) * 100), int(candidate_ids[position]) if position >= 0 else None)
+            for score, position in zip(best, best_positions)
+        ]
 
-        if comment_count == 0:
-            # 第一个评论
-            user.originality_score = new_score
-        else:
-            # 加权平均：新评论权重20%，历史平均权重80%
-            user.originality_score = user.originality_score * 0.8 + new_score * 0.2
+    def update_user_originality_score(self, user_id: int, new_score: float, db: Session):
+        """
+        更新用户的原创度分数，同时累加通过的评论数
+        采用指数加权平均：首条通过的评论直接取其分数，之后新评论权重20%、历史权重80%
+        单条UPDATE完成，不查询评论数、不提交事务，由调用方提交
+        """
+        from ..models.user import User
 
-        db.commit()
+        approved_count = func.coalesce(User.comments_approved, 0)
+        previous_score = func.coalesce(User.originality_score, new_score)
+
+        db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                originality_score=case(
+                    (approved_count == 0, new_score),
+                    else_=previous_score * (1 - ORIGINALITY_EMA_WEIGHT) + new_score * ORIGINALITY_EMA_WEIGHT
+                ),
+                comments_approved=approved_count + 1
+            )
+            .execution_options(synchronize_session=False)
+        )
 
     def get_similarity_stats(self, db: Session) -> Dict:
         """
@@ -237,11 +475,9 @@ class SimilarityDetector:
             Comment.reject_reason.like("%相似度%")
         ).count()
 
-        avg_similarity = db.query(Comment.similarity_score).filter(
+        avg_score = db.query(func.avg(Comment.similarity_score)).filter(
             Comment.similarity_score > 0
-        ).all()
-
-        avg_score = np.mean([score[0] for score in avg_similarity]) if avg_similarity else 0
+        ).scalar() or 0
 
         return {
             "total_comments": total_comments,
@@ -0,0 +1,236 @@
+# backend/app/services/thread_service.py
+"""
+评论回复树
+reply_count为直接回复数（不区分审核状态），在插入/删除回复的同一事务中以 col = col ± n 原子维护，
+定时对账从parent_id重新计数修正偏差（包括维护逻辑上线前的历史数据）。
+
+取回整棵子树只执行一条递归CTE（摘要列+内容摘要，不加载全文），结果按 (depth, id) 排序，
+父节点总在子节点之前，按id建立映射后一次遍历即可组装成树，O(n)。
+顶层评论按id倒序游标分页，可选在同一条CTE中一并取回本页各评论的回复。
+"""
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import bindparam, func, literal, select, update
+from sqlalchemy.orm import Session, aliased
+
+from ..config import settings
+from ..models.base import SessionLocal
+from ..models.comment import Comment, CommentStatus
+from ..models.projections import COMMENT_SUMMARY_COLUMNS, comment_summaries, content_preview
+from .leases import acquire_lease
+
+# 对账时每批写回的评论数
+RECONCILE_BATCH_SIZE = 5000
+
+# 对账租约名；租约时长为两个对账周期，持有进程每轮续约
+RECONCILE_LEASE = "reply_count_reconciliation"
+
+
+def add_reply(parent_id: int, db: Session) -> bool:
+    """
+    父评论回复数+1，不提交事务，由调用方与新回复一起提交
+    返回False表示父评论不存在
+    """
+    result = db.execute(
+        update(Comment)
+        .where(Comment.id == parent_id)
+        .values(reply_count=func.coalesce(Comment.reply_count, 0) + 1, updated_at=Comment.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def adjust_reply_counts(deltas: Dict[int, int], db: Session) -> None:
+    """按父评论批量调整回复数（批量导入、删除），一次executemany，不提交事务"""
+    params = [
+        {"parent": parent_id, "delta": delta}
+        for parent_id, delta in deltas.items()
+        if parent_id is not None and delta
+    ]
+    if not params:
+        return
+
+    table = Comment.__table__
+    db.execute(
+        table.update()
+        .where(table.c.id == bindparam("parent"))
+        .values(
+            reply_count=func.coalesce(table.c.reply_count, 0) + bindparam("delta"),
+            updated_at=table.c.updated_at
+        ),
+        params
+    )
+
+
+def _summary_columns(entity, with_preview: bool) -> tuple:
+    columns = tuple(getattr(entity, column.key) for column in COMMENT_SUMMARY_COLUMNS)
+    return columns + ((content_preview(entity.content),) if with_preview else ())
+
+
+def subtree(root_condition, max_depth: Optional[int] = None,
+            approved_only: bool = False, with_preview: bool = True):
+    """
+    满足root_condition的评论及其全部回复（递归CTE）
+    approved_only时未通过的回复连同其下的回复一起剔除；max_depth为None时不限层级
+    """
+    anchor = select(*_summary_columns(Comment, with_preview), literal(0).label("depth")).where(root_condition)
+    if approved_only:
+        anchor = anchor.where(Comment.status == CommentStatus.APPROVED)
+    tree = anchor.cte("thread", recursive=True)
+
+    child = aliased(Comment)
+    step = select(
+        *_summary_columns(child, with_preview), (tree.c.depth + 1).label("depth")
+    ).join(tree, child.parent_id == tree.c.id)
+    if max_depth is not None:
+        step = step.where(tree.c.depth < max_depth)
+    if approved_only:
+        step = step.where(child.status == CommentStatus.APPROVED)
+
+    return tree.union_all(step)
+
+
+def _fetch_tree_rows(db: Session, tree, max_nodes: int):
+    rows = db.execute(
+        select(tree).order_by(tree.c.depth, tree.c.id).limit(max_nodes + 1)
+    ).all()
+    return rows[:max_nodes], len(rows) > max_nodes
+
+
+def _node(row) -> Dict:
+    node = row._asdict()
+    node["status"] = row.status.value if row.status else None
+    node["replies"] = []
+    return node
+
+
+def assemble(rows: Iterable) -> List[Dict]:
+    """
+    按 (depth, id) 有序的行组装为树，返回根节点列表
+    父节点先于子节点出现，每行只做一次字典查找；同级回复按id（发表时间）升序
+    """
+    roots: List[Dict] = []
+    nodes: Dict[int, Dict] = {}
+    for row in rows:
+        node = nodes[row.id] = _node(row)
+        parent = nodes.get(row.parent_id) if row.depth else None
+        if parent is None:
+            roots.append(node)
+        else:
+            parent["replies"].append(node)
+    return roots
+
+
+def get_thread(comment_id: int, db: Session, max_depth: Optional[int] = None,
+               approved_only: bool = True) -> Optional[Dict]:
+    """
+    获取评论及其回复树（评论不存在或不可见时返回None）
+    节点数超过上限时按层截断，truncated为True；被截断处的回复可以该节点为根再次请求
+    """
+    max_depth = min(max_depth or settings.thread_max_depth, settings.thread_max_depth)
+    tree = subtree(Comment.id == comment_id, max_depth, approved_only)
+    rows, truncated = _fetch_tree_rows(db, tree, settings.thread_max_nodes)
+    if not rows:
+        return None
+
+    return {
+        "thread": assemble(rows)[0],
+        "total": len(rows),
+        "truncated": truncated
+    }
+
+
+def list_threads(db: Session, video_id: Optional[int] = None, before_id: Optional[int] = None,
+                 limit: Optional[int] = None, depth: int = 0, approved_only: bool = True) -> Dict:
+    """
+    顶层评论分页（按id倒序，游标为上一页最后一条的id），指定video_id时只返回该视频下的评论
+    depth>0时用一条递归CTE同时取回本页各评论depth层以内的回复
+    """
+    limit = min(limit or settings.thread_page_size, settings.thread_page_size * 5)
+
+    query = comment_summaries(db, with_preview=True).filter(Comment.parent_id.is_(None))
+    if video_id is not None:
+        query = query.filter(Comment.video_id == video_id)
+    if approved_only:
+        query = query.filter(Comment.status == CommentStatus.APPROVED)
+    if before_id is not None:
+        query = query.filter(Comment.id < before_id)
+    page = query.order_by(Comment.id.desc()).limit(limit + 1).all()
+
+    has_more = len(page) > limit
+    page = page[:limit]
+    next_cursor = page[-1].id if has_more else None
+
+    if depth <= 0 or not page:
+        return {
+            "threads": [dict(_node(row), depth=0) for row in page],
+            "next_cursor": next_cursor,
+            "truncated": False
+        }
+
+    depth = min(depth, settings.thread_max_depth)
+    tree = subtree(Comment.id.in_([row.id for row in page]), depth, approved_only)
+    rows, truncated = _fetch_tree_rows(db, tree, settings.thread_max_nodes)
+    roots = {node["id"]: node for node in assemble(rows)}
+
+    return {
+        "threads": [roots[row.id] for row in page if row.id in roots],
+        "next_cursor": next_cursor,
+        "truncated": truncated
+    }
+
+
+def count_replies(rows: Iterable) -> Counter:
+    """按parent_id统计行数（批量插入后调整父评论回复数）"""
+    return Counter(row["parent_id"] for row in rows if row.get("parent_id") is not None)
+
+
+def reconcile_reply_counts(db: Session) -> Dict:
+    """
+    回复数对账
+    一次分组查询按parent_id重新计数，只对存在偏差的评论按 col = col + (实际值 - 查询时的值)
+    批量相对修正，查询之后提交的回复同时改变两边，不会被对账覆盖
+    """
+    replies = select(
+        Comment.parent_id.label("id"),
+        func.count().label("total")
+    ).where(Comment.parent_id.isnot(None)).group_by(Comment.parent_id).subquery()
+
+    actual = func.coalesce(replies.c.total, 0)
+    query = select(Comment.id, Comment.reply_count, actual.label("actual")).outerjoin(
+        replies, replies.c.id == Comment.id
+    ).where(func.coalesce(Comment.reply_count, -1) != actual)
+
+    corrections = [
+        {"comment_id": row.id, "delta": row.actual - (row.reply_count or 0)}
+        for row in db.execute(query)
+    ]
+    table = Comment.__table__
+    statement = (
+        table.update()
+        .where(table.c.id == bindparam("comment_id"))
+        .values(
+            reply_count=func.coalesce(table.c.reply_count, 0) + bindparam("delta"),
+            updated_at=table.c.updated_at
+        )
+    )
+    for start in range(0, len(corrections), RECONCILE_BATCH_SIZE):
+        db.execute(statement, corrections[start:start + RECONCILE_BATCH_SIZE])
+    db.commit()
+
+    return {"corrected_comments": len(corrections)}
+
+
+def run_reply_count_reconciliation() -> Dict:
+    """使用独立会话执行对账（供定时任务调用），未取得租约时跳过"""
+    db = SessionLocal()
+    try:
+        if not acquire_lease(RECONCILE_LEASE, settings.stats_reconcile_interval_seconds * 2, db):
+            return {"skipped": True}
+        return reconcile_reply_counts(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,188 @@
+# backend/app/services/user_stats.py
+from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, func, select, update
+from typing import Dict
+
+from ..config import settings
+from ..models.base import SessionLocal
+from ..models.user import User
+from ..models.user_progress import UserProgress
+from ..models.reflection import Reflection
+from ..models.comment import Comment, CommentStatus
+from .leases import acquire_lease
+
+# 允许原子更新的用户计数字段
+COUNTER_FIELDS = ("videos_completed", "reflections_written", "comments_approved")
+
+# 对账时每批处理的用户数
+RECONCILE_BATCH_SIZE = 5000
+
+# 对账租约名；租约时长为两个对账周期，持有进程每轮续约
+RECONCILE_LEASE = "user_stats_reconciliation"
+
+
+def increment_user_stats(user_id: int, db: Session, **deltas: int) -> None:
+    """
+    原子更新用户统计计数
+    在SQL端执行 col = col + delta，不加载User行，多个计数合并为一条UPDATE
+    不提交事务，由调用方统一提交
+    """
+    values = {}
+    for field, delta in deltas.items():
+        if field not in COUNTER_FIELDS:
+            raise ValueError(f"未知的统计字段: {field}")
+        if delta:
+            column = getattr(User, field)
+            values[column] = func.coalesce(column, 0) + delta
+
+    if not values:
+        return
+
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def reconcile_user_stats(db: Session) -> Dict:
+    """
+    用户统计对账
+    一次分组查询从源表重新计算 videos_completed / reflections_written / comments_approved，
+    只对存在偏差的用户按 col = col + (实际值 - 查询时的值) 批量相对修正：
+    查询之后提交的计数增量同时改变两边，不会被对账覆盖
+    """
+    completed = select(
+        UserProgress.user_id,
+        func.count().label("total")
+    ).where(UserProgress.is_completed == True).group_by(UserProgress.user_id).subquery()
+
+    reflections = select(
+        Reflection.user_id,
+        func.count().label("total")
+    ).where(Reflection.is_approved == True).group_by(Reflection.user_id).subquery()
+
+    comments = select(
+        Comment.user_id,
+        func.count().label("total")
+    ).where(Comment.status == CommentStatus.APPROVED).group_by(Comment.user_id).subquery()
+
+    query = select(
+        User.id,
+        User.videos_completed,
+        User.reflections_written,
+        User.comments_approved,
+        func.coalesce(completed.c.total, 0).label("actual_videos_completed"),
+        func.coalesce(reflections.c.total, 0).label("actual_reflections_written"),
+        func.coalesce(comments.c.total, 0).label("actual_comments_approved")
+    ).outerjoin(
+        completed, completed.c.user_id == User.id
+    ).outerjoin(
+        reflections, reflections.c.user_id == User.id
+    ).outerjoin(
+        comments, comments.c.user_id == User.id
+    ).execution_options(yield_per=RECONCILE_BATCH_SIZE)
+
+    checked = 0
+    corrections = []
+    for row in db.execute(query):
+        checked += 1
+        if (row.videos_completed != row.actual_videos_completed or
+                row.reflections_written != row.actual_reflections_written or
+                row.comments_approved != row.actual_comments_approved):
+            corrections.append({
+                "user_id": row.id,
+                "videos_completed_delta": row.actual_videos_completed - (row.videos_completed or 0),
+                "reflections_written_delta": row.actual_reflections_written - (row.reflections_written or 0),
+                "comments_approved_delta": row.actual_comments_approved - (row.comments_approved or 0)
+            })
+
+    # 按主键批量相对修正
+    table = User.__table__
+    statement = table.update().where(table.c.id == bindparam("user_id")).values({
+        field: func.coalesce(table.c[field], 0) + bindparam(f"{field}_delta")
+        for field in COUNTER_FIELDS
+    })
+    for start in range(0, len(corrections), RECONCILE_BATCH_SIZE):
+        db.execute(statement, corrections[start:start + RECONCILE_BATCH_SIZE])
+    db.commit()
+
+    return {
+        "checked_users": checked,
+        "corrected_users": len(corrections)
+    }
+
+
+def recompute_originality_scores(db: Session) -> Dict:
+    """
+    批量重算用户原创度分数
+    按用户、时间顺序重放已通过评论的指数加权平均，使用向量化分组计算：
+    长度为n的序列最终值 = (1-w)^(n-1)·x0 + Σ w·(1-w)^(n-1-k)·xk (k≥1)
+    """
+    import numpy as np
+    from .similarity_detector import ORIGINALITY_EMA_WEIGHT
+
+    rows = db.execute(
+        select(Comment.user_id, Comment.original_score)
+        .where(Comment.status == CommentStatus.APPROVED)
+        .order_by(Comment.user_id, Comment.created_at, Comment.id)
+    ).all()
+
+    # 没有通过评论的用户恢复默认分数
+    db.execute(
+        update(User)
+        .where(User.id.not_in(
+            select(Comment.user_id).where(Comment.status == CommentStatus.APPROVED)
+        ))
+        .values(originality_score=100.0, comments_approved=0)
+        .execution_options(synchronize_session=False)
+    )
+
+    if not rows:
+        db.commit()
+        return {"recomputed_users": 0, "approved_comments": 0}
+
+    user_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    scores = np.fromiter(
+        (row[1] if row[1] is not None else 100.0 for row in rows), dtype=np.float64, count=len(rows)
+    )
+
+    # 分组边界与组内位置
+    starts = np.flatnonzero(np.r_[True, user_ids[1:] != user_ids[:-1]])
+    lengths = np.diff(np.r_[starts, len(user_ids)])
+    group_index = np.repeat(np.arange(len(starts)), lengths)
+    distance_to_end = lengths[group_index] - 1 - (np.arange(len(user_ids)) - starts[group_index])
+
+    decay = 1 - ORIGINALITY_EMA_WEIGHT
+    weights = ORIGINALITY_EMA_WEIGHT * np.power(decay, distance_to_end)
+    weights[starts] = np.power(decay, lengths - 1)
+
+    ema_scores = np.bincount(group_index, weights=weights * scores)
+
+    updates = [
+        {"id": int(user_id), "originality_score": float(score), "comments_approved": int(count)}
+        for user_id, score, count in zip(user_ids[starts], ema_scores, lengths)
+    ]
+    for start in range(0, len(updates), RECONCILE_BATCH_SIZE):
+        db.execute(update(User), updates[start:start + RECONCILE_BATCH_SIZE])
+    db.commit()
+
+    return {
+        "recomputed_users": len(updates),
+        "approved_comments": len(rows)
+    }
+
+
+def run_user_stats_reconciliation() -> Dict:
+    """使用独立会话执行对账（供定时任务调用），未取得租约时跳过"""
+    db = SessionLocal()
+    try:
+        if not acquire_lease(RECONCILE_LEASE, settings.stats_reconcile_interval_seconds * 2, db):
+            return {"skipped": True}
+        return reconcile_user_stats(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
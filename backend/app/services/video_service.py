@@ -1,6 +1,6 @@
 # backend/app/services/video_service.py
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy.orm import Session, undefer_group
+from sqlalchemy import and_, case, func, desc
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 
@@ -9,6 +9,9 @@ from ..models.user_progress import UserProgress
 from ..models.user import User
 from ..models.reflection import Reflection
 from ..models.comment import Comment, CommentStatus
+from .user_stats import increment_user_stats
+from ..metrics import stage_timer
+from ..events import publish, VIDEO_COMPLETED, VIDEO_UNLOCKED
 
 class VideoService:
     """
@@ -21,7 +24,7 @@ class VideoService:
         获取视频详情及用户进度
         """
         # 获取视频信息
-        video = db.query(Video).filter(
+        video = db.query(Video).options(undefer_group("text")).filter(
             Video.id == video_id,
             Video.is_published == True
         ).first()
@@ -70,10 +73,11 @@ class VideoService:
             Reflection.is_approved == True
         ).count()
 
-        # 评论数量
+        # 评论数量（该视频下已通过的评论，走 (video_id, id) 索引）
         comment_count = db.query(Comment).filter(
+            Comment.video_id == video_id,
             Comment.status == CommentStatus.APPROVED
-        ).count()  # 这里假设评论是全局的，如果需要按视频分类需要调整模型
+        ).count()
 
         return {
             "total_viewers": total_viewers,
@@ -103,16 +107,17 @@ class VideoService:
         """
         更新观看进度的智能算法
         """
-        # 获取视频信息
-        video = db.query(Video).filter(Video.id == video_id).first()
-        if not video:
-            return {"success": False, "error": "视频不存在"}
-
-        # 查找或创建进度记录
-        progress = db.query(UserProgress).filter(
-            UserProgress.user_id == user_id,
-            UserProgress.video_id == video_id
-        ).first()
+        with stage_timer("update_watch_progress", "load"):
+            # 获取视频信息
+            video = db.query(Video).filter(Video.id == video_id).first()
+            if not video:
+                return {"success": False, "error": "视频不存在"}
+
+            # 查找或创建进度记录
+            progress = db.query(UserProgress).filter(
+                UserProgress.user_id == user_id,
+                UserProgress.video_id == video_id
+            ).first()
 
         if not progress:
             progress = UserProgress(
@@ -144,50 +149,69 @@ class VideoService:
         progress.completion_percentage = completion_percentage
 
         # 判断是否完成（90%以上且观看时间足够）
+        just_completed = False
         if (completion_percentage >= 90 and
                 watched_time >= video.duration * 0.8 and
                 not progress.is_completed):
 
             progress.is_completed = True
             progress.completed_at = datetime.utcnow()
+            just_completed = True
 
-            # 更新用户统计
-            user = db.query(User).filter(User.id == user_id).first()
-            if user:
-                user.videos_completed += 1
+            # 更新用户统计（SQL端原子自增，与进度同一事务提交）
+            increment_user_stats(user_id, db, videos_completed=1)
 
         progress.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(progress)
+        with stage_timer("update_watch_progress", "db_commit"):
+            db.commit()
+            db.refresh(progress)
+
+        with stage_timer("update_watch_progress", "recommendation"):
+            next_video_id = self._recommended_next_video_id(progress, db)
+
+        if just_completed:
+            publish(user_id, VIDEO_COMPLETED, {
+                "video_id": video_id,
+                "completed_at": progress.completed_at,
+                "next_video_id": next_video_id
+            })
+            if next_video_id is not None:
+                publish(user_id, VIDEO_UNLOCKED, {"video_id": next_video_id, "previous_video_id": video_id})
 
         return {
             "success": True,
             "progress": progress,
             "newly_completed": progress.is_completed and completion_percentage >= 90,
-            "next_video_recommended": self._should_recommend_next_video(progress, db)
+            "next_video_recommended": next_video_id is not None
         }
 
-    def _should_recommend_next_video(self, progress: UserProgress, db: Session) -> bool:
-        """判断是否应该推荐下一个视频"""
+    def _recommended_next_video_id(self, progress: UserProgress, db: Session) -> Optional[int]:
+        """应推荐的下一个视频ID（已完成当前视频且尚未开始下一个视频时），否则为None"""
         if not progress.is_completed:
-            return False
+            return None
 
-        # 检查是否已经开始下一个视频
-        video = db.query(Video).filter(Video.id == progress.video_id).first()
-        if not video:
-            return False
+        # 单条查询：取下一个已发布视频，并外连接该用户在其上的进度记录
+        current_order = db.query(Video.order_index).filter(
+            Video.id == progress.video_id
+        ).scalar_subquery()
 
-        next_video = self._get_next_video(video.order_index, db)
-        if not next_video:
-            return False
+        next_video = db.query(Video.id).filter(
+            Video.order_index > current_order,
+            Video.is_published == True
+        ).order_by(Video.order_index).limit(1).subquery()
 
-        # 检查是否已经有下一个视频的进度
-        next_progress = db.query(UserProgress).filter(
-            UserProgress.user_id == progress.user_id,
-            UserProgress.video_id == next_video.id
+        row = db.query(next_video.c.id, UserProgress.id).outerjoin(
+            UserProgress,
+            and_(
+                UserProgress.video_id == next_video.c.id,
+                UserProgress.user_id == progress.user_id
+            )
         ).first()
 
-        return next_progress is None  # 如果没有进度记录，则推荐
+        # 存在下一个视频且没有进度记录时推荐
+        if row is None or row[1] is not None:
+            return None
+        return row[0]
 
     def get_user_learning_path(self, user_id: int, db: Session) -> Dict:
         """
@@ -263,7 +287,7 @@ class VideoService:
             return True
 
         prev_progress = next((p for p in user_progresses if p.video_id == prev_video.id), None)
-        return prev_progress and prev_progress.is_completed
+        return bool(prev_progress and prev_progress.is_completed)
 
     def _generate_learning_recommendations(self, user_id: int, learning_path: List[Dict],
                                            db: Session) -> List[str]:
@@ -311,7 +335,7 @@ class VideoService:
             Video.duration,
             Video.category,
             func.count(UserProgress.user_id).label('viewer_count'),
-            func.sum(func.cast(UserProgress.is_completed, db.bind.dialect.name == 'sqlite' and 'INTEGER' or 'INT')).label('completion_count'),
+            func.sum(case((UserProgress.is_completed == True, 1), else_=0)).label('completion_count'),
             func.avg(UserProgress.completion_percentage).label('avg_progress')
         ).outerjoin(UserProgress).filter(
             Video.is_published == True
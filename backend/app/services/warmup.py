@@ -0,0 +1,99 @@
+# backend/app/services/warmup.py
+"""
+启动预热
+在工作进程开始接收流量前加载重量级依赖、jieba词典和相似度索引，
+避免首个请求承担数秒的导入和建词典开销
+"""
+import os
+import time
+from typing import Callable, Dict
+
+from ..config import settings
+
+# 预热状态：pending -> warming -> ready / failed
+warmup_state: Dict = {
+    "status": "pending",
+    "stages": {},  # 阶段名 -> 耗时（毫秒）
+    "total_ms": 0.0,
+    "error": None
+}
+
+
+def is_ready() -> bool:
+    return warmup_state["status"] == "ready"
+
+
+def _run_stage(name: str, func: Callable):
+    started = time.perf_counter()
+    result = func()
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+    warmup_state["stages"][name] = elapsed_ms
+    print(f"⏱️  预热阶段 {name}: {elapsed_ms}ms")
+    return result
+
+
+def _import_dependencies():
+    """导入重量级依赖"""
+    import numpy  # noqa: F401
+    import jieba  # noqa: F401
+    from sklearn.feature_extraction.text import TfidfVectorizer  # noqa: F401
+    from sklearn.metrics.pairwise import cosine_similarity  # noqa: F401
+
+
+def _load_jieba_dictionary():
+    """
+    加载jieba前缀词典
+    使用配置的缓存文件：首次构建后序列化到该文件，之后的进程直接反序列化加载
+    """
+    import jieba
+
+    cache_file = os.path.abspath(settings.jieba_cache_file)
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    jieba.dt.cache_file = cache_file
+    jieba.initialize()
+
+
+def _load_similarity_index() -> int:
+    """加载相似度索引"""
+    from ..models.base import SessionLocal
+    from .similarity_detector import SimilarityDetector, similarity_index
+
+    db = SessionLocal()
+    try:
+        return similarity_index.load(db, SimilarityDetector(), settings.similarity_index_warmup_limit)
+    finally:
+        db.close()
+
+
+def _exercise_scoring():
+    """执行一次完整评分，预热正则和向量化代码路径"""
+    from .quality_checker import QualityChecker
+    from .similarity_detector import SimilarityDetector
+
+    sample = "我觉得这个视频讲解得非常清楚，比如机器学习的部分让我理解了算法的核心原理。"
+    QualityChecker().analyze_text_quality(sample, "comment")
+    SimilarityDetector().calculate_similarity(sample, sample + "很有启发。")
+
+
+def warm_up() -> Dict:
+    """执行全部预热阶段（同步，应在线程池中调用）"""
+    warmup_state["status"] = "warming"
+    warmup_state["error"] = None
+    started = time.perf_counter()
+
+    try:
+        _run_stage("import_dependencies", _import_dependencies)
+        _run_stage("jieba_dictionary", _load_jieba_dictionary)
+        index_size = _run_stage("similarity_index", _load_similarity_index)
+        _run_stage("scoring_self_test", _exercise_scoring)
+    except Exception as e:
+        warmup_state["status"] = "failed"
+        warmup_state["error"] = str(e)
+        print(f"❌ 启动预热失败: {e}")
+    else:
+        warmup_state["status"] = "ready"
+        warmup_state["index_size"] = index_size
+    finally:
+        warmup_state["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    return warmup_state
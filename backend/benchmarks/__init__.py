@@ -0,0 +1,4 @@
+# backend/benchmarks/__init__.py
+"""
+基准测试与测试数据生成工具（不随应用部署）
+"""
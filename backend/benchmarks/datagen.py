@@ -0,0 +1,333 @@
+# backend/benchmarks/datagen.py
+"""
+生产规模测试数据生成
+
+用法（在backend目录下）：
+    python -m benchmarks.datagen --preset ci --database sqlite:////tmp/load.db --truncate
+    python -m benchmarks.datagen --preset production --database postgresql://... --truncate
+    python -m benchmarks.datagen --preset ci --comments 500000 --duplicate-rate 0.1
+
+数据由种子完全确定；写入绕过ORM：PostgreSQL使用COPY，其他数据库使用DBAPI executemany批量插入。
+写入完成后按实际数据对账用户统计字段与评论点赞数
+"""
+import argparse
+import io
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .textgen import TOPICS, TextGenerator
+
+PRESETS: Dict[str, Dict[str, int]] = {
+    "ci": {"videos": 50, "users": 2000, "progress": 50000, "comments": 20000, "reflections": 10000},
+    "staging": {"videos": 500, "users": 100000, "progress": 2000000, "comments": 200000, "reflections": 200000},
+    "production": {"videos": 500, "users": 1000000, "progress": 50000000, "comments": 2000000, "reflections": 2000000},
+}
+
+CATEGORIES = [("AI基础", "beginner"), ("机器学习", "intermediate"), ("深度学习", "advanced"), ("数据工程", "intermediate")]
+
+# 所有用户共用的密码（password123），避免为每个用户计算bcrypt
+SHARED_PASSWORD = "password123"
+
+BASE_TIME = datetime(2025, 1, 1)
+
+
+def _timestamp(rng: random.Random, days: int = 365) -> str:
+    moment = BASE_TIME + timedelta(seconds=rng.randrange(days * 86400))
+    return moment.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+class BulkWriter:
+    """
+    批量写入
+    PostgreSQL(psycopg2)走COPY FROM STDIN，其余方言使用原始DBAPI的executemany
+    """
+
+    def __init__(self, engine, batch_size: int = 10000):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.use_copy = engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2"
+
+    def write(self, table: str, columns: Sequence[str], rows: Iterable[Tuple]) -> int:
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            total = 0
+            batch: List[Tuple] = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    total += self._flush(cursor, table, columns, batch)
+                    batch = []
+            if batch:
+                total += self._flush(cursor, table, columns, batch)
+            connection.commit()
+            return total
+        finally:
+            connection.close()
+
+    def _flush(self, cursor, table: str, columns: Sequence[str], batch: List[Tuple]) -> int:
+        if self.use_copy:
+            buffer = io.StringIO()
+            for row in batch:
+                buffer.write("\t".join(_copy_value(value) for value in row))
+                buffer.write("\n")
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+        else:
+            placeholder = "?" if self.engine.dialect.paramstyle == "qmark" else "%s"
+            sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join([placeholder] * len(columns))})"
+            cursor.executemany(sql, batch)
+        return len(batch)
+
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+class DatasetGenerator:
+    """按种子确定性生成各表数据行"""
+
+    def __init__(self, seed: int, duplicate_rate: float, hashed_password: str):
+        self.seed = seed
+        self.duplicate_rate = duplicate_rate
+        self.hashed_password = hashed_password
+
+    def _rng(self, stream: str) -> random.Random:
+        # 每张表独立的随机流：调整某张表的规模不影响其他表的内容
+        return random.Random(f"{self.seed}:{stream}")
+
+    def videos(self, count: int) -> Iterator[Tuple]:
+        rng = self._rng("videos")
+        text = TextGenerator(rng.randrange(2 ** 31))
+        for i in range(1, count + 1):
+            category, difficulty = CATEGORIES[(i - 1) * len(CATEGORIES) // count]
+            yield (i, f"第{i}课：{rng.choice(TOPICS)}", text.comment(), rng.randint(300, 2400),
+                   i, category, difficulty, 1, 1, _timestamp(rng), _timestamp(rng))
+
+    def users(self, count: int) -> Iterator[Tuple]:
+        rng = self._rng("users")
+        for i in range(1, count + 1):
+            created = _timestamp(rng)
+            yield (i, f"user{i:07d}", f"user{i:07d}@example.com", self.hashed_password,
+                   0, 0, 0, 100.0, created, created, 1, 0)
+
+    def progress(self, total: int, users: int, videos: int) -> Iterator[Tuple]:
+        """每个用户按课程顺序观看前k个视频，除最后一个外均已完成"""
+        rng = self._rng("progress")
+        average = max(1.0, total / max(users, 1))
+        produced = 0
+        for user_id in range(1, users + 1):
+            if produced >= total:
+                break
+            watched = min(videos, total - produced, max(1, int(rng.gauss(average, average / 2))))
+            for video_id in range(1, watched + 1):
+                completed = video_id < watched or rng.random() < 0.3
+                percentage = 100.0 if completed else round(rng.uniform(5, 89), 1)
+                started = _timestamp(rng)
+                yield (user_id, video_id, rng.randint(60, 2400), percentage, int(completed),
+                       rng.randint(0, 2400), rng.randint(1, 4), started,
+                       started if completed else None, started)
+            produced += watched
+
+    def comments(self, count: int, users: int, videos: int) -> Iterator[Tuple]:
+        """近似重复的评论标记为已拒绝，并带上较高的相似度"""
+        rng = self._rng("comments")
+        video_rng = self._rng("comment_videos")  # 独立的随机流，评论内容与之前的版本保持一致
+        text = TextGenerator(rng.randrange(2 ** 31))
+        pool: List[str] = []
+        for _ in range(count):
+            if pool and rng.random() < self.duplicate_rate:
+                content = text.near_duplicate(rng.choice(pool))
+                similarity = round(rng.uniform(65, 98), 2)
+                status = "REJECTED"
+            else:
+                content = text.comment()
+                similarity = round(rng.uniform(0, 45), 2)
+                status = "APPROVED" if rng.random() < 0.9 else "PENDING"
+                _remember(pool, content, rng)
+            created = _timestamp(rng)
+            yield (_skewed_user(rng, users), content, len(content), similarity, round(100 - similarity, 2),
+                   1, status, rng.randint(0, 20), 0, created, created,
+                   created if status != "PENDING" else None, video_rng.randint(1, videos))
+
+    def comment_likes(self, comment_ids: Iterable[int], users: int) -> Iterator[Tuple]:
+        """每条评论由若干不同用户点赞；评论的like_count在对账时按点赞记录重新计数"""
+        rng = self._rng("comment_likes")
+        for comment_id in comment_ids:
+            count = min(users, rng.randint(0, MAX_LIKES_PER_COMMENT))
+            for user_id in rng.sample(range(1, users + 1), count):
+                yield (comment_id, user_id, _timestamp(rng))
+
+    def reflections(self, count: int, users: int, videos: int) -> Iterator[Tuple]:
+        rng = self._rng("reflections")
+        text = TextGenerator(rng.randrange(2 ** 31))
+        pool: List[str] = []
+        for _ in range(count):
+            if pool and rng.random() < self.duplicate_rate:
+                content = text.near_duplicate(rng.choice(pool))
+            else:
+                content = text.reflection()
+                _remember(pool, content, rng)
+            score = round(rng.uniform(30, 98), 1)
+            created = _timestamp(rng)
+            yield (_skewed_user(rng, users), rng.randint(1, videos), content, len(content), score,
+                   int("觉得" in content or "认为" in content), int("比如" in content or "例如" in content),
+                   int("？" in content), int(score >= 60), created, created, created)
+
+
+# 供去重复制的近期文本池容量，避免在内存中保留全部语料
+DUPLICATE_POOL_SIZE = 5000
+
+# 每条评论的最大点赞数
+MAX_LIKES_PER_COMMENT = 20
+
+
+def _remember(pool: List[str], content: str, rng: random.Random):
+    if len(pool) < DUPLICATE_POOL_SIZE:
+        pool.append(content)
+    else:
+        pool[rng.randrange(DUPLICATE_POOL_SIZE)] = content
+
+
+def _skewed_user(rng: random.Random, users: int) -> int:
+    """少数活跃用户贡献大部分内容"""
+    return int(users * rng.random() ** 3) + 1
+
+
+TABLE_COLUMNS = {
+    "videos": ("id", "title", "description", "duration", "order_index", "category", "difficulty_level",
+               "is_published", "is_free", "created_at", "updated_at"),
+    "users": ("id", "username", "email", "hashed_password", "videos_completed", "reflections_written",
+              "comments_approved", "originality_score", "created_at", "updated_at", "is_active", "is_verified"),
+    "user_progress": ("user_id", "video_id", "watched_time", "completion_percentage", "is_completed",
+                      "last_watched_position", "watch_count", "started_at", "completed_at", "updated_at"),
+    "comments": ("user_id", "content", "word_count", "similarity_score", "original_score", "quality_passed",
+                 "status", "like_count", "reply_count", "created_at", "updated_at", "reviewed_at", "video_id"),
+    "comment_likes": ("comment_id", "user_id", "created_at"),
+    "reflections": ("user_id", "video_id", "content", "word_count", "quality_score", "has_thought_words",
+                    "has_specific_examples", "has_questions", "is_approved", "created_at", "updated_at",
+                    "reviewed_at"),
+}
+
+
+def generate(volumes: Dict[str, int], seed: int, duplicate_rate: float, batch_size: int,
+             truncate: bool, reconcile: bool) -> Dict:
+    """生成数据集并返回各表行数与耗时"""
+    from sqlalchemy import text as sql_text
+    from app.models.base import SessionLocal, create_tables, engine
+    from app.services.auth_service import AuthService
+
+    create_tables()
+    _check_empty(engine, truncate)
+
+    if engine.dialect.name == "sqlite":
+        # 一次性数据装载：关闭同步刷盘
+        with engine.connect() as connection:
+            connection.execute(sql_text("PRAGMA journal_mode=MEMORY"))
+            connection.execute(sql_text("PRAGMA synchronous=OFF"))
+
+    generator = DatasetGenerator(seed, duplicate_rate, AuthService().get_password_hash(SHARED_PASSWORD))
+    writer = BulkWriter(engine, batch_size)
+    report: Dict[str, Dict] = {}
+
+    steps = [
+        ("videos", lambda: generator.videos(volumes["videos"])),
+        ("users", lambda: generator.users(volumes["users"])),
+        ("user_progress", lambda: generator.progress(volumes["progress"], volumes["users"], volumes["videos"])),
+        ("comments", lambda: generator.comments(volumes["comments"], volumes["users"], volumes["videos"])),
+        ("comment_likes", lambda: generator.comment_likes(_comment_ids(engine), volumes["users"])),
+        ("reflections", lambda: generator.reflections(volumes["reflections"], volumes["users"], volumes["videos"])),
+    ]
+    for table, rows in steps:
+        started = time.perf_counter()
+        count = writer.write(table, TABLE_COLUMNS[table], rows())
+        elapsed = time.perf_counter() - started
+        report[table] = {"rows": count, "seconds": round(elapsed, 2),
+                         "rows_per_second": round(count / elapsed) if elapsed > 0 else None}
+        print(f"✅ {table}: {count} 行，{elapsed:.1f}s")
+
+    if engine.dialect.name == "postgresql":
+        # 显式写入了主键，需要同步序列
+        with engine.begin() as connection:
+            for table in ("videos", "users"):
+                connection.execute(sql_text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"
+                ))
+
+    if reconcile:
+        from app.services.user_stats import reconcile_user_stats, recompute_originality_scores
+        from app.services.like_service import reconcile_like_counts
+
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            report["user_stats"] = reconcile_user_stats(db)
+            report["originality"] = recompute_originality_scores(db)
+            report["like_counts"] = reconcile_like_counts(db, settle_seconds=0)
+            db.commit()
+        finally:
+            db.close()
+        print(f"✅ 用户统计对账完成，{time.perf_counter() - started:.1f}s")
+
+    return report
+
+
+def _comment_ids(engine) -> Iterable[int]:
+    """刚写入的评论id（一次性写入时id连续，无需读出全部id）"""
+    from sqlalchemy import text as sql_text
+
+    with engine.connect() as connection:
+        low, high, count = connection.execute(sql_text("SELECT MIN(id), MAX(id), COUNT(*) FROM comments")).one()
+        if not count:
+            return []
+        if high - low + 1 == count:
+            return range(low, high + 1)
+        return [row[0] for row in connection.execute(sql_text("SELECT id FROM comments ORDER BY id"))]
+
+
+def _check_empty(engine, truncate: bool):
+    from sqlalchemy import text as sql_text
+
+    with engine.begin() as connection:
+        for table in reversed(list(TABLE_COLUMNS)):
+            if truncate:
+                connection.execute(sql_text(f"DELETE FROM {table}"))
+            elif connection.execute(sql_text(f"SELECT 1 FROM {table} LIMIT 1")).first():
+                raise SystemExit(f"❌ 表 {table} 已有数据，使用 --truncate 清空后再生成")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成测试数据集")
+    parser.add_argument("--database", default=None, help="数据库URL，默认使用DATABASE_URL环境变量")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="ci")
+    for name in PRESETS["ci"]:
+        parser.add_argument(f"--{name}", type=int, default=None, help=f"覆盖预设的{name}数量")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--duplicate-rate", type=float, default=0.05, help="评论/观后感近似重复比例")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--truncate", action="store_true", help="生成前清空相关表")
+    parser.add_argument("--skip-reconcile", action="store_true", help="跳过用户统计与点赞数对账")
+    args = parser.parse_args()
+
+    # 必须在导入app之前设置
+    if args.database:
+        os.environ["DATABASE_URL"] = args.database
+
+    volumes = dict(PRESETS[args.preset])
+    for name in volumes:
+        override: Optional[int] = getattr(args, name)
+        if override is not None:
+            volumes[name] = override
+
+    started = time.perf_counter()
+    generate(volumes, args.seed, args.duplicate_rate, args.batch_size, args.truncate, not args.skip_reconcile)
+    print(f"🎉 数据集生成完成，总耗时 {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# backend/benchmarks/loadtest.py
+"""
+本地压测：按真实客户端行为回放流量，逐级提升并发直到找到饱和点
+
+流量模型：
+- 观看者：每隔heartbeat秒上报一次观看进度；偶尔撰写评论，输入过程中按防抖间隔调用预检测，最后提交
+- 看板：每隔poll秒轮询各统计接口
+
+用法（先启动服务：uvicorn app.main:app --workers 2）：
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --start-users 10 --step 10 --max-users 200
+    python -m benchmarks.loadtest --users 50 --stage-seconds 60 --output load.json   # 固定并发，单阶段
+
+每个阶段输出各接口的吞吐与p50/p95/p99；当p95超过SLO、错误率超限或吞吐不再增长时判定饱和
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from .textgen import TextGenerator
+
+STATS_ENDPOINTS = [
+    ("videos.stats", "/api/videos/stats/overview"),
+    ("reflections.stats", "/api/reflections/stats/overview"),
+    ("comments.stats", "/api/comments/system/stats"),
+]
+
+
+class Recorder:
+    """按接口记录延迟和错误"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            failed = response.status_code >= 500 or response.status_code == 429
+        except httpx.HTTPError:
+            response = None
+            failed = True
+        self.latencies[name].append((time.perf_counter() - started) * 1000)
+        if failed:
+            self.errors[name] += 1
+        return response
+
+    def summary(self, duration: float) -> Dict:
+        endpoints = {}
+        all_latencies: List[float] = []
+        total_errors = 0
+        for name, values in sorted(self.latencies.items()):
+            all_latencies.extend(values)
+            total_errors += self.errors[name]
+            endpoints[name] = _distribution(values, duration, self.errors[name])
+        overall = _distribution(all_latencies, duration, total_errors) if all_latencies else {}
+        return {"overall": overall, "endpoints": endpoints}
+
+
+def _distribution(values: List[float], duration: float, errors: int) -> Dict:
+    ordered = sorted(values)
+
+    def percentile(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 2)
+
+    return {
+        "requests": len(ordered),
+        "throughput_rps": round(len(ordered) / duration, 2) if duration > 0 else 0.0,
+        "error_rate": round(errors / len(ordered), 4) if ordered else 0.0,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+    }
+
+
+async def viewer(client: httpx.AsyncClient, recorder: Recorder, video_ids: List[int], deadline: float,
+                 config: argparse.Namespace, seed: int):
+    """观看者：进度心跳 + 偶尔撰写评论（防抖预检测后提交）"""
+    rng = random.Random(seed)
+    text = TextGenerator(seed)
+    video_id = rng.choice(video_ids)
+    position = 0
+    # 错开各用户的首个心跳，避免同步尖峰
+    await asyncio.sleep(rng.uniform(0, config.heartbeat_seconds))
+
+    while time.monotonic() < deadline:
+        position += config.heartbeat_seconds
+        await recorder.request(client, "videos.progress", "POST", f"/api/videos/{video_id}/progress",
+                               json={"watched_time": config.heartbeat_seconds, "last_watched_position": position})
+
+        if rng.random() < config.comment_probability:
+            await _compose_comment(client, recorder, text, rng, config, video_id)
+
+        if rng.random() < 0.02:
+            video_id = rng.choice(video_ids)
+            position = 0
+
+        await asyncio.sleep(config.heartbeat_seconds)
+
+
+async def _compose_comment(client: httpx.AsyncClient, recorder: Recorder, text: TextGenerator,
+                           rng: random.Random, config: argparse.Namespace, video_id: int):
+    """模拟输入：每次停顿超过防抖间隔时触发一次预检测，输入完成后提交"""
+    content = text.comment()
+    bursts = rng.randint(1, 4)
+    for i in range(1, bursts + 1):
+        draft = content[:max(10, len(content) * i // bursts)]
+        await asyncio.sleep(config.debounce_ms / 1000 + rng.uniform(0, 1.0))
+        await recorder.request(client, "comments.preview", "POST", "/api/comments/preview", json={"content": draft})
+    await recorder.request(client, "comments.create", "POST", "/api/comments/", json={"content": content, "video_id": video_id})
+
+
+async def dashboard(client: httpx.AsyncClient, recorder: Recorder, deadline: float,
+                    config: argparse.Namespace, seed: int):
+    """看板：轮询统计接口"""
+    rng = random.Random(seed)
+    await asyncio.sleep(rng.uniform(0, config.poll_seconds))
+    while time.monotonic() < deadline:
+        for name, path in STATS_ENDPOINTS:
+            await recorder.request(client, name, "GET", path)
+        await asyncio.sleep(config.poll_seconds)
+
+
+async def run_stage(config: argparse.Namespace, users: int, video_ids: List[int]) -> Dict:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=users + 10, max_keepalive_connections=users + 10)
+    async with httpx.AsyncClient(base_url=config.url, timeout=config.timeout, limits=limits) as client:
+        started = time.monotonic()
+        deadline = started + config.stage_seconds
+        dashboards = max(1, int(users * config.dashboard_ratio))
+        tasks = [viewer(client, recorder, video_ids, deadline, config, config.seed + i)
+                 for i in range(users - dashboards)]
+        tasks += [dashboard(client, recorder, deadline, config, config.seed + 100000 + i) for i in range(dashboards)]
+        await asyncio.gather(*tasks)
+        duration = time.monotonic() - started
+
+    summary = recorder.summary(duration)
+    summary["users"] = users
+    summary["duration_seconds"] = round(duration, 2)
+    return summary
+
+
+def _saturation_reason(stage: Dict, previous: Optional[Dict], config: argparse.Namespace) -> Optional[str]:
+    overall = stage["overall"]
+    if not overall:
+        return "无请求完成"
+    if overall["p95_ms"] > config.p95_slo_ms:
+        return f"p95 {overall['p95_ms']}ms 超过SLO {config.p95_slo_ms}ms"
+    if overall["error_rate"] > config.max_error_rate:
+        return f"错误率 {overall['error_rate']:.2%} 超过 {config.max_error_rate:.2%}"
+    if previous and previous["overall"]:
+        expected_growth = stage["users"] / previous["users"]
+        actual_growth = overall["throughput_rps"] / max(previous["overall"]["throughput_rps"], 1e-9)
+        # 并发增加但吞吐增长不足一半：服务已无法消化新增负载
+        if actual_growth < 1 + (expected_growth - 1) * 0.5:
+            return f"吞吐仅增长 {actual_growth:.2f}x（并发 {expected_growth:.2f}x）"
+    return None
+
+
+async def _load_video_ids(config: argparse.Namespace) -> List[int]:
+    async with httpx.AsyncClient(base_url=config.url, timeout=config.timeout) as client:
+        response = await client.get("/api/videos/", params={"limit": 100})
+        response.raise_for_status()
+        video_ids = [video["id"] for video in response.json()]
+    if not video_ids:
+        raise SystemExit("❌ 服务中没有已发布的视频，先生成测试数据（python -m benchmarks.datagen）")
+    return video_ids
+
+
+def _print_stage(stage: Dict):
+    overall = stage["overall"]
+    print(f"\n👥 并发 {stage['users']}：{overall.get('throughput_rps', 0)} req/s，"
+          f"p50={overall.get('p50_ms')}ms p95={overall.get('p95_ms')}ms p99={overall.get('p99_ms')}ms，"
+          f"错误率 {overall.get('error_rate', 0):.2%}")
+    for name, summary in stage["endpoints"].items():
+        print(f"   {name:<20} {summary['requests']:>7} 次 {summary['throughput_rps']:>8} req/s  "
+              f"p50={summary['p50_ms']:<8} p95={summary['p95_ms']:<8} p99={summary['p99_ms']:<8} "
+              f"错误 {summary['error_rate']:.2%}")
+
+
+async def run(config: argparse.Namespace) -> Dict:
+    video_ids = await _load_video_ids(config)
+
+    if config.users:
+        levels = [config.users]
+    else:
+        levels = list(range(config.start_users, config.max_users + 1, config.step))
+
+    stages: List[Dict] = []
+    saturation = None
+    for users in levels:
+        stage = await run_stage(config, users, video_ids)
+        _print_stage(stage)
+        reason = _saturation_reason(stage, stages[-1] if stages else None, config)
+        stages.append(stage)
+        if reason and not config.users:
+            saturation = {
+                "saturated_at_users": users,
+                "max_sustainable_users": stages[-2]["users"] if len(stages) > 1 else None,
+                "reason": reason
+            }
+            print(f"\n🛑 饱和：并发 {users} 时{reason}")
+            break
+
+    if saturation is None and not config.users:
+        print(f"\n✅ 并发升至 {levels[-1]} 仍未饱和")
+
+    return {"config": {key: value for key, value in vars(config).items() if key != "output"},
+            "stages": stages, "saturation": saturation}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地压测")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=None, help="固定并发（不逐级提升）")
+    parser.add_argument("--start-users", type=int, default=10)
+    parser.add_argument("--step", type=int, default=10)
+    parser.add_argument("--max-users", type=int, default=500)
+    parser.add_argument("--stage-seconds", type=float, default=30)
+    parser.add_argument("--heartbeat-seconds", type=float, default=10, help="进度心跳间隔")
+    parser.add_argument("--poll-seconds", type=float, default=5, help="看板轮询间隔")
+    parser.add_argument("--debounce-ms", type=float, default=800, help="评论预检测防抖间隔")
+    parser.add_argument("--comment-probability", type=float, default=0.05, help="每次心跳后开始撰写评论的概率")
+    parser.add_argument("--dashboard-ratio", type=float, default=0.05, help="看板用户占比")
+    parser.add_argument("--p95-slo-ms", type=float, default=500)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", "-o", default=None, help="结果JSON文件")
+    config = parser.parse_args()
+
+    report = asyncio.run(run(config))
+    if config.output:
+        with open(config.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"✅ 结果已保存到 {config.output}")
+
+
+if __name__ == "__main__":
+    main()
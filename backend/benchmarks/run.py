@@ -0,0 +1,291 @@
+# backend/benchmarks/run.py
+"""
+评分引擎与进度更新的基准测试
+
+用法（在backend目录下）：
+    python -m benchmarks.run run --output bench-head.json
+    python -m benchmarks.run run --sizes 1000,10000 --output bench-head.json
+    python -m benchmarks.run compare bench-base.json bench-head.json --threshold 0.15
+
+run 在临时SQLite数据库上执行全部基准并输出JSON；
+compare 对比两次结果的中位耗时，退化超过阈值时以非零状态退出，可用于提交间回归检查
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from .textgen import TextGenerator
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+
+def _prepare_database(path: Optional[str]) -> str:
+    """基准使用独立的SQLite文件，必须在导入app之前设置DATABASE_URL"""
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.db")
+    if os.path.exists(path):
+        os.remove(path)
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    return path
+
+
+def measure(func: Callable, repeat: int, warmup: int = 1) -> Dict:
+    """重复执行func，返回耗时分布（毫秒）"""
+    for _ in range(warmup):
+        func()
+
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - started) * 1000)
+
+    return _summarize(durations)
+
+
+def _summarize(durations: List[float]) -> Dict:
+    ordered = sorted(durations)
+    total = sum(ordered)
+
+    def percentile(p: float) -> float:
+        index = min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))
+        return round(ordered[index], 4)
+
+    return {
+        "runs": len(ordered),
+        "mean_ms": round(total / len(ordered), 4),
+        "p50_ms": round(statistics.median(ordered), 4),
+        "p95_ms": percentile(0.95),
+        "min_ms": round(ordered[0], 4),
+        "max_ms": round(ordered[-1], 4),
+        "ops_per_second": round(len(ordered) / (total / 1000), 2) if total > 0 else None
+    }
+
+
+# ---- 基准用例 ----
+
+def bench_calculate_similarity(generator: TextGenerator, pairs: int) -> Dict:
+    from app.services.similarity_detector import SimilarityDetector
+
+    detector = SimilarityDetector()
+    samples = [(generator.comment(), generator.comment()) for _ in range(pairs)]
+    iterator = iter(samples * 2)
+    return measure(lambda: detector.calculate_similarity(*next(iterator)), repeat=pairs, warmup=min(pairs, 5))
+
+
+def bench_find_most_similar(generator: TextGenerator, size: int, queries: int) -> Dict:
+    """在size条评论的语料上执行查重，分别记录索引冷启动和已预热的耗时"""
+    from sqlalchemy import delete, insert
+    from app.models.base import SessionLocal
+    from app.models.comment import Comment, CommentStatus
+    from app.services.similarity_detector import SimilarityDetector, similarity_index
+
+    corpus = generator.corpus(size, duplicate_rate=0.05)
+    db = SessionLocal()
+    try:
+        db.execute(delete(Comment))
+        db.execute(insert(Comment), [
+            {"user_id": 1, "content": text, "word_count": len(text), "status": CommentStatus.APPROVED}
+            for text in corpus
+        ])
+        db.commit()
+
+        similarity_index.clear()
+        detector = SimilarityDetector()
+        probes = [generator.near_duplicate(generator.random.choice(corpus)) for _ in range(queries + 1)]
+
+        started = time.perf_counter()
+        detector.find_most_similar_comment(probes[0], db)
+        cold_ms = (time.perf_counter() - started) * 1000
+
+        iterator = iter(probes[1:])
+        result = measure(lambda: detector.find_most_similar_comment(next(iterator), db), repeat=queries, warmup=0)
+        result["cold_index_ms"] = round(cold_ms, 4)
+        result["corpus_size"] = size
+        return result
+    finally:
+        db.close()
+
+
+def bench_quality(generator: TextGenerator, count: int) -> Dict:
+    from app.services.quality_checker import QualityChecker
+
+    checker = QualityChecker()
+    texts = generator.corpus(count, duplicate_rate=0.0, long_text=True)
+    iterator = iter(texts * 2)
+    single = measure(lambda: checker.analyze_text_quality(next(iterator), "reflection"), repeat=count, warmup=5)
+
+    batch = measure(lambda: checker.batch_analyze_texts(texts, "reflection"), repeat=3, warmup=0)
+    batch["texts_per_batch"] = count
+    return {"analyze_text_quality": single, "batch_analyze_texts": batch}
+
+
+def bench_update_watch_progress(generator: TextGenerator, updates: int, users: int = 200, videos: int = 50) -> Dict:
+    from sqlalchemy import delete, insert
+    from app.models.base import SessionLocal
+    from app.models.user import User
+    from app.models.user_progress import UserProgress
+    from app.models.video import Video
+    from app.services.video_service import VideoService
+
+    db = SessionLocal()
+    try:
+        for model in (UserProgress, Video, User):
+            db.execute(delete(model))
+        db.execute(insert(User), [
+            {"id": i, "username": f"bench_{i}", "email": f"bench_{i}@example.com", "hashed_password": "x"}
+            for i in range(1, users + 1)
+        ])
+        db.execute(insert(Video), [
+            {"id": i, "title": f"基准视频{i}", "duration": 600, "order_index": i, "is_published": True}
+            for i in range(1, videos + 1)
+        ])
+        db.commit()
+
+        service = VideoService()
+        rng = generator.random
+        calls = [
+            (rng.randint(1, videos), rng.randint(1, users), rng.randint(5, 120), rng.randint(0, 600))
+            for _ in range(updates)
+        ]
+        iterator = iter(calls)
+
+        def update():
+            video_id, user_id, watched, position = next(iterator)
+            service.update_watch_progress(video_id, user_id, watched, position, db)
+
+        return measure(update, repeat=updates, warmup=0)
+    finally:
+        db.close()
+
+
+def run_benchmarks(sizes: List[int], seed: int, queries: int, quality_texts: int,
+                   progress_updates: int, database: Optional[str]) -> Dict:
+    db_path = _prepare_database(database)
+
+    from app.models.base import create_tables
+    create_tables()
+
+    results: Dict[str, Dict] = {}
+
+    def record(name: str, func: Callable):
+        print(f"⏱️  {name} ...", flush=True)
+        results[name] = func()
+        summary = results[name]
+        if "p50_ms" in summary:
+            print(f"   p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms")
+
+    generator = TextGenerator(seed)
+    record("similarity.calculate_similarity", lambda: bench_calculate_similarity(generator, 200))
+
+    for size in sizes:
+        # 大语料每次查重耗时较长，按规模减少重复次数
+        repeat = max(3, min(queries, queries * 1000 // size))
+        record(f"similarity.find_most_similar_comment[{size}]",
+               lambda: bench_find_most_similar(TextGenerator(seed + size), size, repeat))
+
+    quality = bench_quality(TextGenerator(seed + 1), quality_texts)
+    for name, summary in quality.items():
+        results[f"quality.{name}"] = summary
+        print(f"⏱️  quality.{name}: p50={summary['p50_ms']}ms")
+
+    record("video.update_watch_progress", lambda: bench_update_watch_progress(TextGenerator(seed + 2), progress_updates))
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "seed": seed,
+            "database": db_path
+        },
+        "results": results
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(base: Dict, head: Dict, threshold: float, metric: str = "p50_ms") -> List[Dict]:
+    """对比两次结果，返回每个用例的变化比例（正数表示变慢）"""
+    rows = []
+    for name, head_summary in head["results"].items():
+        base_summary = base["results"].get(name)
+        if not base_summary or metric not in head_summary or not base_summary.get(metric):
+            continue
+        change = (head_summary[metric] - base_summary[metric]) / base_summary[metric]
+        rows.append({
+            "name": name,
+            "base": base_summary[metric],
+            "head": head_summary[metric],
+            "change": round(change, 4),
+            "regressed": change > threshold
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="评分引擎基准测试")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="执行基准测试")
+    run_parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="查重语料规模，逗号分隔")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--queries", type=int, default=20, help="每个规模的查重次数上限")
+    run_parser.add_argument("--quality-texts", type=int, default=300)
+    run_parser.add_argument("--progress-updates", type=int, default=2000)
+    run_parser.add_argument("--database", default=None, help="SQLite文件路径（会被覆盖），默认使用临时目录")
+    run_parser.add_argument("--output", "-o", default=None, help="结果JSON文件")
+
+    compare_parser = subparsers.add_parser("compare", help="对比两次基准结果")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.add_argument("--threshold", type=float, default=0.15, help="允许的变慢比例")
+    compare_parser.add_argument("--metric", default="p50_ms")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        sizes = [int(size) for size in args.sizes.split(",") if size]
+        report = run_benchmarks(sizes, args.seed, args.queries, args.quality_texts,
+                                args.progress_updates, args.database)
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(output)
+            print(f"✅ 结果已保存到 {args.output}")
+        else:
+            print(output)
+        return
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.head, encoding="utf-8") as f:
+        head = json.load(f)
+
+    rows = compare_results(base, head, args.threshold, args.metric)
+    regressions = [row for row in rows if row["regressed"]]
+    for row in rows:
+        flag = "❌" if row["regressed"] else "✅"
+        print(f"{flag} {row['name']}: {row['base']} -> {row['head']} ({row['change'] * 100:+.1f}%)")
+
+    if regressions:
+        print(f"❌ {len(regressions)} 个用例退化超过 {args.threshold * 100:.0f}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# backend/benchmarks/serialization.py
+"""
+响应序列化基准：jsonable_encoder + JSONResponse（原路径）对比预编译TypeAdapter + dump_json
+
+用法（在backend目录下）：
+    python -m benchmarks.serialization --videos 500 --feed-items 2000 --repeat 50
+"""
+import argparse
+import json
+from datetime import datetime, timedelta
+from typing import Dict
+
+from .run import measure
+from .textgen import TextGenerator
+
+
+def build_payloads(videos: int, feed_items: int, seed: int) -> Dict[str, tuple]:
+    """构造与服务层返回结构一致的大负载（含ORM对象）"""
+    from app.models.comment import CommentStatus
+    from app.models.user_progress import UserProgress
+    from app.models.video import Video
+    from app.schemas.responses import LearningPathResponse, ReflectionFeedItem, CommentSummary
+    from typing import List
+
+    text = TextGenerator(seed)
+    now = datetime(2025, 1, 1)
+
+    video_rows = [
+        Video(id=i, title=f"第{i}课", duration=600 + i, order_index=i, category="机器学习",
+              difficulty_level="intermediate", is_published=True, is_free=True,
+              created_at=now, updated_at=now)
+        for i in range(1, videos + 1)
+    ]
+    progress_rows = [
+        UserProgress(id=i, user_id=1, video_id=i, watched_time=600, completion_percentage=100.0,
+                     is_completed=True, last_watched_position=600, watch_count=1,
+                     started_at=now, completed_at=now + timedelta(hours=1), updated_at=now)
+        for i in range(1, videos // 2 + 1)
+    ]
+    progress_by_video = {progress.video_id: progress for progress in progress_rows}
+    learning_path = {
+        "learning_path": [
+            {"video": video, "progress": progress_by_video.get(video.id),
+             "status": "completed" if video.id in progress_by_video else "not_started",
+             "can_access": video.id <= videos // 2 + 1}
+            for video in video_rows
+        ],
+        "total_videos": videos,
+        "completed_videos": len(progress_rows),
+        "completion_rate": 50.0,
+        "current_video": video_rows[videos // 2],
+        "recommendations": ["保持良好的学习节奏", "建议为已完成的视频写观后感，加深理解"]
+    }
+
+    reflection_feed = [
+        {
+            "reflection": {"id": i, "user_id": i % 100 + 1, "video_id": i % videos + 1, "word_count": 180,
+                           "quality_score": 85.5, "has_thought_words": True, "has_specific_examples": True,
+                           "has_questions": False, "is_approved": True, "created_at": now,
+                           "content_preview": text.comment()[:100]},
+            "user": {"id": i % 100 + 1, "username": f"user{i % 100 + 1}"},
+            "video": {"id": i % videos + 1, "title": f"第{i % videos + 1}课"}
+        }
+        for i in range(1, feed_items + 1)
+    ]
+
+    comment_feed = [
+        {"id": i, "user_id": i % 100 + 1, "word_count": 60, "similarity_score": 12.5, "original_score": 87.5,
+         "quality_passed": True, "status": CommentStatus.APPROVED, "reject_reason": None, "like_count": i % 7,
+         "reply_count": 0, "parent_id": None, "created_at": now, "content_preview": text.comment()[:100]}
+        for i in range(1, feed_items + 1)
+    ]
+
+    return {
+        "learning_path": (LearningPathResponse, learning_path),
+        "reflection_feed": (List[ReflectionFeedItem], reflection_feed),
+        "comment_feed": (List[CommentSummary], comment_feed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="响应序列化基准")
+    parser.add_argument("--videos", type=int, default=500)
+    parser.add_argument("--feed-items", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", "-o", default=None)
+    args = parser.parse_args()
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from app.responses import adapter_for, serialize
+
+    results = {}
+    for name, (model, payload) in build_payloads(args.videos, args.feed_items, args.seed).items():
+        adapter = adapter_for(model)
+        baseline = measure(lambda: JSONResponse(jsonable_encoder(payload)).body, args.repeat)
+        fast = measure(lambda: serialize(adapter, payload), args.repeat)
+        size = len(serialize(adapter, payload))
+        speedup = round(baseline["p50_ms"] / fast["p50_ms"], 2) if fast["p50_ms"] else None
+        results[name] = {"bytes": size, "jsonable_encoder": baseline, "type_adapter": fast, "speedup": speedup}
+        print(f"⏱️  {name} ({size / 1024:.0f}KB): jsonable_encoder p50={baseline['p50_ms']}ms，"
+              f"TypeAdapter p50={fast['p50_ms']}ms，提升 {speedup}x")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"✅ 结果已保存到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
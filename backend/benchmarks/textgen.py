@@ -0,0 +1,79 @@
+# backend/benchmarks/textgen.py
+"""
+合成中文文本
+按固定种子生成评论/观后感，词汇覆盖质量检测用到的思考、情感、描述性词汇，
+并可按比例生成近似重复文本，用于相似度检测的基准测试
+"""
+import random
+from typing import List
+
+SUBJECTS = ["我", "我们", "老师", "这个视频", "这节课", "作者", "同学们", "讲解", "这个案例", "课程内容"]
+
+TOPICS = [
+    "人工智能", "机器学习", "深度学习", "神经网络", "梯度下降", "决策树", "支持向量机", "数据预处理",
+    "特征工程", "过拟合", "正则化", "卷积网络", "循环网络", "注意力机制", "强化学习", "损失函数",
+    "模型评估", "交叉验证", "聚类算法", "推荐系统", "自然语言处理", "计算机视觉", "知识图谱", "迁移学习"
+]
+
+THOUGHTS = ["觉得", "认为", "理解了", "意识到", "发现", "体会到", "思考了", "注意到", "学到了", "领悟到"]
+
+EMOTIONS = ["很喜欢", "非常感动", "有点担心", "很惊讶", "特别满意", "十分欣赏", "有些失望", "很激动"]
+
+DESCRIPTIONS = ["具体的", "详细的", "清楚的", "生动的", "深刻的", "关键的", "核心的", "重要的"]
+
+OBJECTS = ["原理", "概念", "方法", "步骤", "细节", "应用场景", "本质", "意义", "局限性", "实现过程"]
+
+CONNECTORS = ["因为", "所以", "但是", "而且", "比如", "例如", "同时", "另外", "总之", "首先", "其次", "最后"]
+
+QUESTIONS = ["为什么会这样呢？", "这在实际项目中怎么用？", "还有没有更好的方法？", "它的边界在哪里？"]
+
+
+class TextGenerator:
+    """按种子确定性生成中文文本"""
+
+    def __init__(self, seed: int = 42):
+        self.random = random.Random(seed)
+
+    def sentence(self) -> str:
+        r = self.random
+        pattern = r.randrange(4)
+        if pattern == 0:
+            return f"{r.choice(SUBJECTS)}{r.choice(THOUGHTS)}{r.choice(TOPICS)}的{r.choice(OBJECTS)}。"
+        if pattern == 1:
+            return f"{r.choice(CONNECTORS)}{r.choice(TOPICS)}{r.choice(DESCRIPTIONS)}{r.choice(OBJECTS)}让我{r.choice(EMOTIONS)}。"
+        if pattern == 2:
+            return f"{r.choice(CONNECTORS)}{r.choice(SUBJECTS)}用{r.choice(TOPICS)}解释了{r.choice(TOPICS)}的{r.choice(OBJECTS)}，{r.choice(SUBJECTS)}{r.choice(THOUGHTS)}其中{r.choice(DESCRIPTIONS)}联系。"
+        return f"关于{r.choice(TOPICS)}的{r.choice(OBJECTS)}，{r.choice(QUESTIONS)}"
+
+    def text(self, min_sentences: int = 2, max_sentences: int = 6) -> str:
+        count = self.random.randint(min_sentences, max_sentences)
+        return "".join(self.sentence() for _ in range(count))
+
+    def comment(self) -> str:
+        return self.text(2, 5)
+
+    def reflection(self) -> str:
+        return self.text(6, 14)
+
+    def near_duplicate(self, text: str, edit_ratio: float = 0.1) -> str:
+        """在原文上做少量替换/插入，模拟抄袭或轻度改写"""
+        chars = list(text)
+        edits = max(1, int(len(chars) * edit_ratio))
+        for _ in range(edits):
+            position = self.random.randrange(len(chars))
+            if self.random.random() < 0.5:
+                chars[position] = self.random.choice("的了是在也都很就还")
+            else:
+                chars.insert(position, self.random.choice("，其实确实真的"))
+        return "".join(chars)
+
+    def corpus(self, size: int, duplicate_rate: float = 0.05, long_text: bool = False) -> List[str]:
+        """生成语料，其中约duplicate_rate比例为已有文本的近似重复"""
+        texts: List[str] = []
+        make = self.reflection if long_text else self.comment
+        for _ in range(size):
+            if texts and self.random.random() < duplicate_rate:
+                texts.append(self.near_duplicate(self.random.choice(texts)))
+            else:
+                texts.append(make())
+        return texts
@@ -2,6 +2,7 @@
 import requests
 import json
 import time
+from contextlib import contextmanager
 
 BASE_URL = "http://127.0.0.1:8000/api"
 
@@ -226,6 +227,292 @@ def test_video_services():
         print(f"   ❌ 异常: {e}")
 
 
+def test_learning_path_without_progress():
+    """没有学习进度的用户：学习路径响应应能通过模型校验（不依赖后端服务，使用内存数据库）"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.models import Base, Video
+    from app.responses import adapter_for, serialize
+    from app.schemas.responses import LearningPathResponse
+    from app.services.video_service import VideoService
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        db.add_all([
+            Video(title=f"第{index}课", duration=600, order_index=index)
+            for index in range(1, 4)
+        ])
+        db.commit()
+
+        learning_data = VideoService().get_user_learning_path(1, db)
+        result = json.loads(serialize(adapter_for(LearningPathResponse), learning_data))
+    finally:
+        db.close()
+        engine.dispose()
+
+    assert [item["can_access"] for item in result["learning_path"]] == [True, False, False]
+    assert result["completed_videos"] == 0
+
+
+
+@contextmanager
+def _memory_db():
+    """内存数据库会话（建好全部表），用于不依赖后端服务的测试"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.models import Base
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        yield db
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def _add_users(db, count):
+    from app.models import User
+
+    users = [User(username=f"user{index}", email=f"user{index}@example.com", hashed_password="x")
+             for index in range(count)]
+    db.add_all(users)
+    db.commit()
+    return users
+
+
+def test_like_buffer_and_reconciliation():
+    """点赞增量缓冲：写回失败放回缓冲、写回后计数正确；对账租约互斥，按记录表相对修正且不改updated_at"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.models import Comment
+    from app.models.comment import CommentStatus
+    from app.services import like_service
+    from app.services.leases import acquire_lease, lease_active
+
+    buffer = like_service.like_buffer
+    buffer.drain()
+    with _memory_db() as db:
+        users = _add_users(db, 3)
+        comment = Comment(user_id=users[0].id, content="评论", status=CommentStatus.APPROVED)
+        db.add(comment)
+        db.commit()
+        updated_at = comment.updated_at
+
+        for user in users:
+            assert like_service.like_comment(comment.id, user.id, db)["changed"]
+        repeat = like_service.like_comment(comment.id, users[0].id, db)
+        assert not repeat["changed"] and repeat["like_count"] == 3
+        assert like_service.unlike_comment(comment.id, users[2].id, db)["like_count"] == 2
+        assert buffer.pending(comment.id) == 2
+
+        # 写回失败（库中没有表）时增量放回缓冲
+        broken_engine = create_engine("sqlite://")
+        broken = sessionmaker(bind=broken_engine)()
+        failed = False
+        try:
+            buffer.flush(broken)
+        except Exception:
+            failed = True
+        finally:
+            broken.close()
+            broken_engine.dispose()
+        assert failed and buffer.pending(comment.id) == 2
+
+        assert buffer.flush(db) == 1
+        assert buffer.pending_count == 0
+        db.refresh(comment)
+        assert comment.like_count == 2
+
+        # 直写期间点赞与计数在同一事务中更新，不进入缓冲
+        buffer.write_through = True
+        try:
+            assert like_service.like_comment(comment.id, users[2].id, db)["like_count"] == 3
+            assert like_service.unlike_comment(comment.id, users[2].id, db)["like_count"] == 2
+        finally:
+            buffer.write_through = False
+        assert buffer.pending_count == 0
+
+        # 对账租约：未过期时只有持有者能续约
+        assert acquire_lease(like_service.RECONCILE_LEASE, 60, db, owner="worker-a")
+        assert not acquire_lease(like_service.RECONCILE_LEASE, 60, db, owner="worker-b")
+        assert acquire_lease(like_service.RECONCILE_LEASE, -1, db, owner="worker-a")
+        assert acquire_lease(like_service.RECONCILE_LEASE, 60, db, owner="worker-b")
+
+        # 计数偏差（如进程崩溃丢失增量）由对账修正，本进程缓冲中的增量先写回不会重复计入
+        db.execute(Comment.__table__.update().values(like_count=7, updated_at=Comment.__table__.c.updated_at))
+        db.commit()
+        buffer.add(comment.id, 1)
+        result = like_service.reconcile_like_counts(db, settle_seconds=0)
+        assert result["consistent"] and result["total_likes"] == 2
+        assert not lease_active(like_service.WRITE_THROUGH_FLAG, db)
+        assert not buffer.write_through and buffer.pending_count == 0
+        db.refresh(comment)
+        assert comment.like_count == 2
+        assert comment.updated_at == updated_at
+
+
+
+def test_moderation_claim_and_lease_expiry():
+    """审核任务认领：同一任务不会被两个worker同时认领，租约到期后可被重新认领并累计尝试次数"""
+    from datetime import datetime, timedelta
+
+    from sqlalchemy import update
+
+    from app.models import Comment
+    from app.models.moderation_job import ModerationJob, JobStatus
+    from app.services.moderation_queue import claim_jobs, enqueue
+
+    with _memory_db() as db:
+        users = _add_users(db, 1)
+        comments = [Comment(user_id=users[0].id, content=f"评论{index}") for index in range(3)]
+        db.add_all(comments)
+        db.flush()
+        for comment in comments:
+            enqueue(comment.id, db)
+        db.commit()
+
+        first = claim_jobs(db, "worker-a", 2, lease_seconds=60)
+        second = claim_jobs(db, "worker-b", 2, lease_seconds=60)
+        assert [job.comment_id for job in first] == [comments[0].id, comments[1].id]
+        assert [job.comment_id for job in second] == [comments[2].id]
+        assert {job.locked_by for job in first}.isdisjoint(job.locked_by for job in second)
+        assert claim_jobs(db, "worker-c", 2, lease_seconds=60) == []
+
+        # worker-a 崩溃：租约到期后任务被重新认领，令牌更换
+        db.execute(
+            update(ModerationJob)
+            .where(ModerationJob.id == first[0].id)
+            .values(locked_until=datetime.utcnow() - timedelta(seconds=1))
+        )
+        db.commit()
+        reclaimed = claim_jobs(db, "worker-c", 2, lease_seconds=60)
+        assert [job.id for job in reclaimed] == [first[0].id]
+        assert reclaimed[0].attempts == 2
+        assert reclaimed[0].locked_by != first[0].locked_by
+        assert db.get(ModerationJob, first[0].id).status == JobStatus.RUNNING
+
+
+
+def test_delete_comment_subtree():
+    """删除评论：递归删除整棵子树及其点赞、审核任务，父评论回复数与作者通过评论数同步扣减"""
+    from sqlalchemy import func, select
+
+    from app.models import Comment, User
+    from app.models.comment import CommentStatus
+    from app.models.comment_like import CommentLike
+    from app.models.moderation_job import ModerationJob
+    from app.services.comment_service import CommentService
+    from app.services.moderation_queue import enqueue
+    from app.services.thread_service import add_reply, get_thread
+
+    with _memory_db() as db:
+        users = _add_users(db, 2)
+
+        def reply(parent, author, status=CommentStatus.APPROVED):
+            comment = Comment(user_id=author.id, content="回复", status=status,
+                              parent_id=parent.id if parent else None)
+            db.add(comment)
+            if parent is not None:
+                add_reply(parent.id, db)
+            db.flush()
+            return comment
+
+        root = reply(None, users[0])
+        branch = reply(root, users[1])
+        leaf = reply(branch, users[1])
+        pending = reply(leaf, users[0], CommentStatus.PENDING)
+        sibling = reply(root, users[1])
+        enqueue(pending.id, db)
+        db.add(CommentLike(comment_id=leaf.id, user_id=users[0].id))
+        users[0].comments_approved, users[1].comments_approved = 1, 3
+        db.commit()
+        assert db.get(Comment, root.id).reply_count == 2
+        subtree_ids = [pending.id, leaf.id, branch.id]
+
+        result = CommentService().delete_comment(subtree_ids[-1], db, user_id=users[1].id)
+        assert result["success"] and result["deleted"] == 3
+        # 由深到浅删除
+        assert result["deleted_ids"] == subtree_ids
+
+        db.expire_all()
+        assert db.get(Comment, root.id).reply_count == 1
+        assert db.get(User, users[1].id).comments_approved == 1
+        assert db.get(User, users[0].id).comments_approved == 1
+        assert db.execute(select(func.count()).select_from(CommentLike)).scalar() == 0
+        assert db.execute(select(func.count()).select_from(ModerationJob)).scalar() == 0
+        assert [node["id"] for node in get_thread(root.id, db)["thread"]["replies"]] == [sibling.id]
+
+        assert CommentService().delete_comment(root.id, db, user_id=users[1].id)["code"] == "FORBIDDEN"
+
+
+
+def test_import_resume_after_commit_and_parent_remap():
+    """批量导入：批次提交后、写检查点前中断，续传时按pending判断已落库不重复导入，回复的parent_id换算为新id"""
+    import os
+    import tempfile
+
+    from sqlalchemy import select
+
+    from app.models import Comment
+    from app.services.import_service import BulkImporter, load_checkpoint
+
+    class Interrupted(Exception):
+        pass
+
+    class CrashingImporter(BulkImporter):
+        """第一批提交后、写入id映射和检查点之前中断"""
+
+        def _append_id_map(self, mapping):
+            raise Interrupted()
+
+    text = "这个视频讲解得非常详细，我从中学到了很多关于机器学习的基础知识，第{}部分尤其清楚。"
+    records = [
+        {"id": 101, "user_id": 1, "content": text.format(1)},
+        {"id": 102, "user_id": 2, "content": text.format(2), "parent_id": 101},
+        {"id": 103, "user_id": 1, "content": text.format(3), "parent_id": 102},
+        {"id": 104, "user_id": 2, "content": text.format(4), "parent_id": 999},
+    ]
+
+    with _memory_db() as db, tempfile.TemporaryDirectory() as directory:
+        _add_users(db, 2)
+        # 目标库已有评论，新id与源id不同
+        db.add_all([Comment(user_id=1, content="已有评论") for _ in range(5)])
+        db.commit()
+
+        source = os.path.join(directory, "comments.ndjson")
+        with open(source, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+        crashed = False
+        try:
+            CrashingImporter("comments", source, batch_size=2).run(db)
+        except Interrupted:
+            crashed = True
+        assert crashed
+        assert load_checkpoint(source + ".checkpoint")["pending"]["last_id"] == 7
+
+        importer = BulkImporter("comments", source, batch_size=2)
+        assert importer.resume(db)
+        assert importer.state["offset"] > 0 and importer.id_map == {101: 6, 102: 7}
+        result = importer.run(db)
+
+        rows = {row.id: row for row in db.execute(
+            select(Comment.id, Comment.parent_id, Comment.reply_count).where(Comment.id > 5)
+        )}
+        assert sorted(rows) == [6, 7, 8]
+        assert rows[7].parent_id == 6 and rows[8].parent_id == 7
+        assert rows[6].reply_count == 1 and rows[7].reply_count == 1
+        assert result["records"] == 4 and result["inserted"] == 3
+        assert result["skipped"] == {"PARENT_NOT_FOUND": 1}
+
+
 def test_system_stats():
     """测试系统统计功能"""
     print("\n📊 测试系统统计")